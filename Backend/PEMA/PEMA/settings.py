@@ -57,6 +57,7 @@ CUSTOM_APPS = [
     'expenses',  # App for expense tracking
     'income',  # App for managing income records
     'reports',  # App for generating reports
+    'api',  # API routing and the load test harness
 ]
 
 # Combine all app lists into INSTALLED_APPS
@@ -144,8 +145,8 @@ DJOSER = {
     'USERNAME_CHANGED_EMAIL_CONFIRMATION': True,  # Send confirmation email if username is changed
     'PASSWORD_CHANGED_EMAIL_CONFIRMATION': True,  # Send confirmation email if password is changed
 
-    # Require password retype during user creation for verification
-    'USER_CREATE_PASSWORD_RETYPE': True,
+    # Registration goes through the 'user_create' serializer, which checks the retyped password itself
+    'USER_CREATE_PASSWORD_RETYPE': False,
 }
 
 #      ╭──────────────────────────────────────────────────────────╮
@@ -167,6 +168,9 @@ SIMPLE_JWT = {
 
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+
+    # Announces JWT logins with the user_logged_in signal, so they are recorded like session logins
+    "TOKEN_OBTAIN_SERIALIZER": "users.api.serializers.TokenObtainPairSerializer",
 }
 
 SPECTACULAR_SETTINGS = {
@@ -254,6 +258,53 @@ CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
 CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
+# Number of profiles credited per UPDATE statement by the monthly balance rollover
+BALANCE_ROLLOVER_CHUNK_SIZE = int(environ.get('BALANCE_ROLLOVER_CHUNK_SIZE', 5000))
+
+# Minimum number of user ids per rollover shard, and maximum number of shards credited in parallel
+BALANCE_ROLLOVER_SHARD_SIZE = int(environ.get('BALANCE_ROLLOVER_SHARD_SIZE', 50000))
+BALANCE_ROLLOVER_CONCURRENCY = int(environ.get('BALANCE_ROLLOVER_CONCURRENCY', 8))
+
+# Seconds without progress after which a running rollover is considered crashed, and resumed by the next run
+BALANCE_ROLLOVER_STALE_AFTER = int(environ.get('BALANCE_ROLLOVER_STALE_AFTER', 900))
+
+# Number of expenses written per checkpoint by the export jobs, and seconds a task works
+# on a job before handing the rest over to a new task
+EXPORT_JOB_CHUNK_SIZE = int(environ.get('EXPORT_JOB_CHUNK_SIZE', 10000))
+EXPORT_JOB_TIME_BUDGET = int(environ.get('EXPORT_JOB_TIME_BUDGET', 60))
+
+# With LAST_LOGIN_FLUSH_ASYNC, logins only append to the login activity and the flush_last_logins
+# task copies the latest ones onto the users every LAST_LOGIN_FLUSH_INTERVAL seconds, in one UPDATE
+LAST_LOGIN_FLUSH_ASYNC = environ.get('LAST_LOGIN_FLUSH_ASYNC') == '1'
+LAST_LOGIN_FLUSH_INTERVAL = int(environ.get('LAST_LOGIN_FLUSH_INTERVAL', 60))
+
+# Number of ledger entries a user may append after their latest checkpoint before the
+# checkpoint_ledgers task appends a new one, and number of users it checks per query
+LEDGER_CHECKPOINT_INTERVAL = int(environ.get('LEDGER_CHECKPOINT_INTERVAL', 100))
+LEDGER_CHECKPOINT_CHUNK_SIZE = int(environ.get('LEDGER_CHECKPOINT_CHUNK_SIZE', 5000))
+
+#      ╭──────────────────────────────────────────────────────────╮
+#      │                   CACHE CONFIGURATION                    │
+#      ╰──────────────────────────────────────────────────────────╯
+# ━━ REPORT RESPONSES ARE CACHED IN REDIS, ON A SEPARATE DATABASE FROM THE CELERY BROKER ━━
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': environ.get('REDIS_CACHE_URL', 'redis://localhost:6379/1'),
+        'KEY_PREFIX': 'pema',
+        'OPTIONS': {
+            # Fail fast so an unreachable cache degrades to uncached reports instead of hanging requests
+            'socket_connect_timeout': 1,
+            'socket_timeout': 1,
+        },
+    }
+}
+
+# Cache alias and lifetime (in seconds) of the cached report responses
+REPORT_CACHE_ALIAS = 'default'
+REPORT_CACHE_TIMEOUT = int(environ.get('REPORT_CACHE_TIMEOUT', 15 * 60))
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -339,6 +390,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# User uploaded and generated files (profile pictures, expense exports)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = environ.get('MEDIA_ROOT', BASE_DIR / 'media')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
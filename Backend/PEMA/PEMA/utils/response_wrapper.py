@@ -1,5 +1,13 @@
+from hashlib import sha256
+from logging import getLogger
+
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status as http_status
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
 
+logger = getLogger(__name__)
+
 
 def custom_response(status, data=None, message=None, errors=None, status_code=200):
     """
@@ -14,3 +22,69 @@ def custom_response(status, data=None, message=None, errors=None, status_code=20
         },
         status=status_code,
     )
+
+
+class NotModified(APIException):
+    """Raised when the representation the client holds, identified by its ETag, is still current."""
+    status_code = http_status.HTTP_304_NOT_MODIFIED
+    default_detail = "Not modified."
+    default_code = "not_modified"
+
+
+class ConditionalGetMixin:
+    """
+    Adds strong ETags and conditional GET support to a view answering with custom_response.
+
+    Views override `get_etag_version`, returning a cheap value that changes whenever the
+    response body would (e.g. a data version), or None (the default) to skip conditional handling. The ETag is
+    derived from it, the user and the requested URL once authentication and permissions have
+    passed, so a matching `If-None-Match` is answered with 304 before the handler queries
+    or serializes anything.
+    """
+    etag_methods = ("GET", "HEAD")
+
+    def get_etag_version(self, request):
+        """Returns the version the ETag is derived from, None by default: no ETag and never a 304."""
+        return None
+
+    def get_etag(self, request):
+        """Returns the quoted ETag of the response to the request, or None."""
+        if request.method not in self.etag_methods:
+            return None
+        try:
+            version = self.get_etag_version(request)
+        except Exception as e:
+            logger.warning(f"Unable to compute the ETag of {request.path}: {e}")
+            return None
+        if version is None:
+            return None
+
+        accepted = getattr(request, "accepted_media_type", "")
+        fingerprint = f"{request.user.pk}|{request.get_full_path()}|{accepted}|{version}"
+        return quote_etag(sha256(fingerprint.encode()).hexdigest()[:32])
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.get_etag(request)
+        if self.etag is None:
+            return
+
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match:
+            # If-None-Match uses the weak comparison, a W/ prefix does not prevent a match
+            client_etags = [etag.removeprefix("W/") for etag in parse_etags(if_none_match)]
+            if "*" in client_etags or self.etag in client_etags:
+                raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=exc.status_code)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # Without a version, or when initial did not run, the response is left unconditional
+        etag = getattr(self, "etag", None)
+        if etag is not None and response.status_code in (http_status.HTTP_200_OK, http_status.HTTP_304_NOT_MODIFIED):
+            response["ETag"] = etag
+        return response
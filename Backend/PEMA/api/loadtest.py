@@ -0,0 +1,220 @@
+"""
+Locust-style HTTP load test of the API.
+
+Every virtual user is a thread logging in through the JWT endpoint and then running weighted tasks, creating
+expenses, polling its monthly statistics and updating its income, with a random pause between them. Requests go
+over real HTTP, either to a given host or to a server started in-process on a free port, and their latencies and
+failures are collected per endpoint so runs before and after an optimization can be compared.
+"""
+import http.client
+import json
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from random import Random
+from statistics import quantiles
+from time import monotonic, perf_counter, sleep
+from urllib.parse import urlsplit
+
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+from django.urls import reverse
+
+# Endpoints exercised by the virtual users, reported under their URL name without the api namespace
+ENDPOINTS = [
+    'auth:jwt-create',
+    'reports:monthly-statistics',
+    'expenses:expense-create',
+    'income:update_income',
+]
+
+# Tasks of the virtual users once logged in, with their relative weights
+TASK_WEIGHTS = {
+    'monthly_statistics': 6,
+    'create_expense': 3,
+    'update_income': 1,
+}
+
+
+def percentile(latencies, percent):
+    """Returns the given percentile of the latencies, None when there are none."""
+    if len(latencies) < 2:
+        return latencies[0] if latencies else None
+    return quantiles(latencies, n=100, method='inclusive')[percent - 1]
+
+
+def summarize(latencies, failures, duration):
+    """Returns the request count, error rate, throughput and latency percentiles (in ms) of an endpoint."""
+    requests = len(latencies)
+
+    def rounded(value):
+        return round(value, 2) if value is not None else None
+
+    return {
+        'requests': requests,
+        'failures': failures,
+        'error_rate': round(failures / requests, 4) if requests else 0.0,
+        'rps': round(requests / duration, 2) if duration else 0.0,
+        'avg_ms': rounded(sum(latencies) / requests if requests else None),
+        'p50_ms': rounded(percentile(latencies, 50)),
+        'p95_ms': rounded(percentile(latencies, 95)),
+        'p99_ms': rounded(percentile(latencies, 99)),
+        'max_ms': rounded(max(latencies) if latencies else None),
+    }
+
+
+class LoadTestStats:
+    """Thread-safe record of the latency and outcome of every request, per endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.failures = defaultdict(int)
+        self.errors = defaultdict(lambda: defaultdict(int))
+
+    def record(self, name, latency_ms, error=None):
+        """Records a request of the endpoint, error being a short description of its failure if it failed."""
+        with self._lock:
+            self.latencies[name].append(latency_ms)
+            if error:
+                self.failures[name] += 1
+                self.errors[name][error] += 1
+
+    def report(self, duration):
+        """Returns the summary of every endpoint and of all requests together, see summarize."""
+        with self._lock:
+            endpoints = {
+                name: {**summarize(latencies, self.failures[name], duration), 'errors': dict(self.errors[name])}
+                for name, latencies in sorted(self.latencies.items())
+            }
+            everything = [latency for latencies in self.latencies.values() for latency in latencies]
+            total = summarize(everything, sum(self.failures.values()), duration)
+        return {'endpoints': endpoints, 'total': total}
+
+
+class VirtualUser(threading.Thread):
+    """
+    Thread acting like a client of the API: it obtains a JWT and then runs weighted tasks until the deadline,
+    logging in again whenever its access token is rejected. The connection is kept alive between requests.
+    """
+
+    def __init__(self, host, email, password, category_ids, stats, deadline, wait=(0.5, 2.0), seed=0, timeout=30):
+        super().__init__(daemon=True)
+        parts = urlsplit(host)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+        self.prefix = parts.path.rstrip('/')
+        self.email = email
+        self.password = password
+        self.category_ids = category_ids
+        self.stats = stats
+        self.deadline = deadline
+        self.wait = wait
+        self.rng = Random(seed)
+        self.access = None
+        self.paths = {name: reverse(f'api:{name}') for name in ENDPOINTS}
+        self.tasks = [getattr(self, task) for task in TASK_WEIGHTS]
+        self.weights = list(TASK_WEIGHTS.values())
+
+    def request(self, name, method, body=None, expected=200):
+        """Sends a JSON request to the endpoint and records it, returns the status and decoded body."""
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if self.access:
+            headers['Authorization'] = f'Bearer {self.access}'
+        started = perf_counter()
+        try:
+            self.connection.request(method, self.prefix + self.paths[name],
+                                    json.dumps(body) if body is not None else None, headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self.connection.close()
+            self.stats.record(name, (perf_counter() - started) * 1000, type(e).__name__)
+            return None, None
+        latency = (perf_counter() - started) * 1000
+
+        self.stats.record(name, latency, None if response.status == expected else f'HTTP {response.status}')
+        try:
+            return response.status, json.loads(content) if content else None
+        except ValueError:
+            return response.status, None
+
+    def login(self):
+        status, body = self.request('auth:jwt-create', 'POST', {'email': self.email, 'password': self.password})
+        # The tokens come wrapped in the data of custom_response
+        tokens = body.get('data') if status == 200 and isinstance(body, dict) else None
+        self.access = tokens.get('access') if isinstance(tokens, dict) else None
+
+    def monthly_statistics(self):
+        return self.request('reports:monthly-statistics', 'GET')
+
+    def create_expense(self):
+        expense = {
+            'amount': f'{max(0.5, self.rng.lognormvariate(3, 0.8)):.2f}',
+            'description': 'Load test expense',
+        }
+        if self.category_ids:
+            expense['category_id'] = self.rng.choice(self.category_ids)
+        return self.request('expenses:expense-create', 'POST', expense, expected=201)
+
+    def update_income(self):
+        return self.request('income:update_income', 'PATCH', {'amount': f'{self.rng.uniform(1000, 5000):.2f}'})
+
+    def run(self):
+        try:
+            while monotonic() < self.deadline:
+                if not self.access:
+                    self.login()
+                else:
+                    status, _ = self.rng.choices(self.tasks, self.weights)[0]()
+                    if status == 401:
+                        self.access = None
+                sleep(min(self.rng.uniform(*self.wait), max(0.0, self.deadline - monotonic())))
+        finally:
+            self.connection.close()
+
+
+def run_load_test(host, credentials, category_ids, duration, spawn_rate=5.0, wait=(0.5, 2.0), seed=0, timeout=30):
+    """
+    Starts one virtual user per (email, password) pair at spawn_rate users per second, lets them run until
+    duration seconds after the first one started and returns the report of LoadTestStats with the elapsed time.
+    """
+    stats = LoadTestStats()
+    started = monotonic()
+    deadline = started + duration
+    users = []
+    for index, (email, password) in enumerate(credentials):
+        if index and spawn_rate:
+            sleep(1 / spawn_rate)
+        if monotonic() >= deadline:
+            break
+        user = VirtualUser(host, email, password, category_ids, stats, deadline,
+                           wait=wait, seed=seed + index, timeout=timeout)
+        user.start()
+        users.append(user)
+    for user in users:
+        user.join()
+
+    elapsed = monotonic() - started
+    return {**stats.report(elapsed), 'duration': round(elapsed, 2), 'users': len(users)}
+
+
+class QuietWSGIRequestHandler(WSGIRequestHandler):
+    """Request handler not logging every request, which would flood the output and slow the server down."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def local_server(address='127.0.0.1', port=0):
+    """Serves the project's WSGI application from a background thread, yielding its base URL."""
+    server = ThreadedWSGIServer((address, port), QuietWSGIRequestHandler, allow_reuse_address=False)
+    server.set_app(get_internal_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://{address}:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
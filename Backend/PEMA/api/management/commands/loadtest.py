@@ -0,0 +1,168 @@
+import json
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from api.loadtest import local_server, run_load_test
+
+# In-process stand-in for the Redis cache, so a load test runs without any service next to the database
+LOCAL_MEMORY_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pema-loadtest',
+    }
+}
+
+# Balance the virtual users' profiles are topped up to, so their expenses are not refused for lack of funds
+MINIMUM_BALANCE = Decimal('1000000.00')
+
+COLUMNS = ('requests', 'failures', 'error_rate', 'rps', 'avg_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms')
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the API over HTTP with virtual users logging in, creating expenses, polling their monthly "
+        "statistics and updating their income. Without --host, the project is served in-process with a local "
+        "memory cache standing in for Redis. Reports throughput, latency percentiles and error rates per endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help="Number of concurrent virtual users")
+        parser.add_argument('--spawn-rate', type=float, default=5, help="Virtual users started per second")
+        parser.add_argument('--duration', type=float, default=30, help="Length of the run in seconds")
+        parser.add_argument('--min-wait', type=float, default=0.5, help="Shortest pause between tasks in seconds")
+        parser.add_argument('--max-wait', type=float, default=2.0, help="Longest pause between tasks in seconds")
+        parser.add_argument(
+            '--host',
+            help="Base URL of a running server, e.g. http://127.0.0.1:8000. Defaults to an in-process server",
+        )
+        parser.add_argument(
+            '--cache', choices=['locmem', 'settings'], default='locmem',
+            help="Cache of the in-process server: a local memory stand-in for Redis or the configured one",
+        )
+        parser.add_argument(
+            '--prefix', default='synthetic',
+            help="Prefix of the virtual users' emails, matching generate_synthetic_data. Missing users are created",
+        )
+        parser.add_argument('--password', default='synthetic-password', help="Password of the virtual users")
+        parser.add_argument('--seed', type=int, default=42, help="Seed of the virtual users' random choices")
+        parser.add_argument('--timeout', type=float, default=30, help="Timeout of every request in seconds")
+        parser.add_argument('--json', metavar='PATH', help="Write the report to PATH as JSON")
+        parser.add_argument('--compare', metavar='PATH', help="JSON report of an earlier run to compare with")
+
+    def handle(self, *args, **options):
+        from expenses.models import Category
+
+        if options['users'] < 1 or options['duration'] <= 0:
+            raise CommandError("--users and --duration must be positive")
+        if options['min_wait'] > options['max_wait']:
+            raise CommandError("--min-wait must not exceed --max-wait")
+        baseline = self._load_baseline(options['compare']) if options['compare'] else None
+
+        credentials = self._credentials(options['prefix'], options['password'], options['users'])
+        category_ids = list(Category.objects.values_list('pk', flat=True))
+
+        if options['host']:
+            server = nullcontext(options['host'].rstrip('/'))
+            caches = nullcontext()
+        else:
+            server = local_server()
+            caches = override_settings(CACHES=LOCAL_MEMORY_CACHES) if options['cache'] == 'locmem' else nullcontext()
+
+        with caches, server as host:
+            self.stdout.write(f"Load testing {host} with {len(credentials)} users for {options['duration']:g}s")
+            report = run_load_test(
+                host, credentials, category_ids, options['duration'],
+                spawn_rate=options['spawn_rate'], wait=(options['min_wait'], options['max_wait']),
+                seed=options['seed'], timeout=options['timeout'],
+            )
+
+        report.update({
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'host': options['host'] or 'in-process',
+            'database': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1] if not options['host'] else None,
+            'cache': options['cache'] if not options['host'] else None,
+            'wait': [options['min_wait'], options['max_wait']],
+            'seed': options['seed'],
+        })
+        self._write_table(report)
+        if baseline:
+            self._write_comparison(report, baseline)
+        if options['json']:
+            with open(options['json'], 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+            self.stdout.write(f"Report written to {options['json']}")
+
+    def _credentials(self, prefix, password, count):
+        """
+        Returns the (email, password) pairs of the virtual users, creating the users that do not exist yet
+        and topping their balance up to MINIMUM_BALANCE.
+        """
+        from reports.cache import bump_global_data_version
+        from users.models import LedgerEntry, Profile
+
+        User = get_user_model()
+        emails = [f"{prefix}{index}@example.com" for index in range(count)]
+        existing = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+        for index, email in enumerate(emails):
+            if email not in existing:
+                User.objects.create_user(email=email, password=password, username=f"{prefix}{index}")
+        if len(existing) < count:
+            self.stdout.write(f"Created {count - len(existing)} users with the prefix '{prefix}'")
+        with transaction.atomic():
+            short = Profile.objects.select_for_update().filter(user__email__in=emails, balance__lt=MINIMUM_BALANCE)
+            top_ups = [
+                LedgerEntry(user_id=user_id, kind=LedgerEntry.CREDIT, amount=MINIMUM_BALANCE - balance,
+                            source_type=LedgerEntry.ADJUSTMENT)
+                for user_id, balance in short.values_list('user_id', 'balance')
+            ]
+            if top_ups:
+                Profile.objects.filter(user_id__in=[entry.user_id for entry in top_ups]).update(balance=MINIMUM_BALANCE)
+                LedgerEntry.objects.bulk_create(top_ups)
+                # The update skipped the signals invalidating the cached reports
+                bump_global_data_version()
+        return [(email, password) for email in emails]
+
+    @staticmethod
+    def _load_baseline(path):
+        try:
+            with open(path) as baseline_file:
+                return json.load(baseline_file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read the baseline report {path}: {e}")
+
+    def _write_table(self, report):
+        self.stdout.write(f"\n{'Endpoint':<30}" + ''.join(f"{column:>11}" for column in COLUMNS))
+        rows = [*report['endpoints'].items(), ('total', report['total'])]
+        for name, summary in rows:
+            cells = ''.join(
+                f"{'-' if summary[column] is None else summary[column]:>11}" for column in COLUMNS
+            )
+            self.stdout.write(f"{name:<30}{cells}")
+            for error, occurrences in summary.get('errors', {}).items():
+                self.stdout.write(self.style.WARNING(f"    {occurrences} x {error}"))
+        self.stdout.write(f"\n{report['users']} users, {report['duration']}s, database {report['database'] or '-'}")
+
+    def _write_comparison(self, report, baseline):
+        """Writes the change of throughput, p95 latency and error rate of each endpoint relative to the baseline."""
+        self.stdout.write(f"\nCompared with the run of {baseline.get('generated_at', 'the baseline')}:")
+        current = {**report['endpoints'], 'total': report['total']}
+        previous = {**baseline.get('endpoints', {}), 'total': baseline.get('total', {})}
+        for name, summary in current.items():
+            before = previous.get(name)
+            if not before:
+                self.stdout.write(f"{name:<30} not in the baseline")
+                continue
+            changes = []
+            for column in ('rps', 'p95_ms'):
+                if summary[column] is not None and before.get(column):
+                    changes.append(f"{column} {before[column]} -> {summary[column]} "
+                                   f"({100 * (summary[column] - before[column]) / before[column]:+.1f}%)")
+            changes.append(f"error_rate {before.get('error_rate', 0)} -> {summary['error_rate']}")
+            self.stdout.write(f"{name:<30} " + ', '.join(changes))
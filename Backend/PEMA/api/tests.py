@@ -1,3 +1,281 @@
-from django.test import TestCase
+"""
+Performance regression suite of the API endpoints.
 
-# Create your tests here.
+Every endpoint is exercised against a user owning 10, 1k (and with PEMA_PERF_SIZES, e.g. "10,1000,100000",
+100k) expenses spread over up to five years, next to another user owning as many. For each endpoint the suite
+asserts a query budget, which catches N+1 lookups since a per-row query overflows it even at 10 rows, a p95
+wall-time budget over PEMA_PERF_RUNS requests (time to first byte for streamed responses), and that no query
+on the expense tables needs a full scan. Time budgets can be scaled for slow machines with
+PEMA_PERF_TIME_FACTOR.
+
+Run with `pytest -m perf --perf-json=perf.json` to keep the measurements for trend tracking.
+Registration, activation and password reset are left out: they send emails and do not depend on the data size.
+"""
+import json
+import os
+import re
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from statistics import quantiles
+from time import perf_counter
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from expenses.models import Category, Expense, MonthlyRollup
+from expenses.utils import Period
+from reports.models import ExportJob
+
+User = get_user_model()
+
+pytestmark = [pytest.mark.perf, pytest.mark.django_db]
+
+SIZES = [int(size) for size in os.environ.get('PEMA_PERF_SIZES', '10,1000').split(',')]
+RUNS = int(os.environ.get('PEMA_PERF_RUNS', 20))
+TIME_FACTOR = float(os.environ.get('PEMA_PERF_TIME_FACTOR', 1))
+EXPENSE_TABLES = ('expenses_expense', 'expenses_monthlyrollup')
+PASSWORD = 'PerfPass123!'
+
+
+# Fixtures
+
+def seed_expenses(user, count, categories):
+    """
+    Insert count expenses for the user, spread evenly over up to 60 months ending with the current one,
+    and rebuild the user's monthly rollups.
+    """
+    Expense.objects.bulk_create(
+        (Expense(user=user, amount=Decimal(1 + index % 50), category=categories[index % len(categories)],
+                 description=f'Expense {index}')
+         for index in range(count)),
+        batch_size=5000,
+    )
+
+    ids = list(Expense.objects.filter(user=user).order_by('id').values_list('id', flat=True))
+    months = max(1, min(60, count // 20))
+    per_month = -(-len(ids) // months)
+    first_of_month = date.today().replace(day=1)
+    for month in range(months):
+        month_ids = ids[month * per_month:(month + 1) * per_month]
+        if not month_ids:
+            break
+        year, month_index = divmod(first_of_month.year * 12 + first_of_month.month - 1 - month, 12)
+        Expense.objects.filter(id__gte=month_ids[0], id__lte=month_ids[-1]).update(
+            date=date(year, month_index + 1, min(28, 1 + month))
+        )
+    MonthlyRollup.objects.rebuild([user.pk])
+
+
+@pytest.fixture(params=SIZES, ids=lambda size: f'{size}-expenses')
+def seeded_user(request):
+    """Fixture creating a user with the parametrized number of expenses, next to another user with as many."""
+    size = request.param
+    categories = [Category.objects.create(name=name) for name in ('Food', 'Transport', 'Housing', 'Leisure')]
+    users = [
+        User.objects.create_user(email=f'perf{index}@example.com', password=PASSWORD, username=f'perf{index}')
+        for index in range(2)
+    ]
+    for user in users:
+        seed_expenses(user, size, categories)
+
+    user = users[0]
+    user.profile.balance = Decimal('10000000.00')
+    user.profile.save()
+    user.seeded_size = size
+    user.categories = categories
+    return user
+
+
+@pytest.fixture
+def perf_client(seeded_user):
+    """Fixture for an API client authenticated with a JWT, the way real clients are."""
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(seeded_user).access_token}')
+    return client
+
+
+# Helpers
+
+def find_full_scans(queries):
+    """Returns the plans of the queries that read an expense table without using an index."""
+    full_scans = []
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # Only a missing index can make the planner fall back to a sequential scan then
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        for query in queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT') or not any(table in sql for table in EXPENSE_TABLES):
+                continue
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN {sql}')
+                plan = '\n'.join(row[0] for row in cursor.fetchall())
+                scanned = re.findall(r'Seq Scan on (\w+)', plan)
+            elif connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = '\n'.join(row[-1] for row in cursor.fetchall())
+                scanned = re.findall(r'\bSCAN (\w+)(?! USING (?:COVERING )?INDEX)', plan)
+            else:
+                return []
+            if any(table in EXPENSE_TABLES for table in scanned):
+                full_scans.append(f'{sql}\n{plan}')
+        if connection.vendor == 'postgresql':
+            cursor.execute("SET LOCAL enable_seqscan = on")
+    return full_scans
+
+
+def measure(send, runs):
+    """
+    Sends the request runs times and returns the query log of the first request and the timings in ms.
+    Streamed responses are timed to their first chunk and then drained.
+    """
+    timings = []
+    captured = None
+    for run in range(runs):
+        with CaptureQueriesContext(connection) as queries:
+            started = perf_counter()
+            response = send()
+            if response.streaming:
+                content = iter(response.streaming_content)
+                next(content, None)
+                timings.append((perf_counter() - started) * 1000)
+                for _ in content:
+                    pass
+            else:
+                timings.append((perf_counter() - started) * 1000)
+        assert response.status_code < 400, f"{response.status_code}: {getattr(response, 'data', None)}"
+        if captured is None:
+            captured = queries.captured_queries
+    return captured, timings
+
+
+def p95(timings):
+    return quantiles(timings, n=20, method='inclusive')[-1] if len(timings) > 1 else timings[0]
+
+
+# Endpoint budgets: (name, request factory, maximum queries, p95 budget in ms)
+# Query counts include the authentication lookup and the savepoints of atomic blocks.
+# The report requests bypass the response cache so the budgets cover the queries behind them.
+
+def endpoint_cases(user):
+    category_id = user.categories[0].pk
+    export_job = ExportJob.objects.create(user=user)
+    access = str(RefreshToken.for_user(user).access_token)
+    bulk = [{'amount': '1.00', 'category_id': category_id} for _ in range(10)]
+    bypass = {'HTTP_X_CACHE_BYPASS': '1'}
+    last_month = Period.current()
+    trend_range = {'from': str(last_month.shift(-59)), 'to': str(last_month)}
+
+    return [
+        ('reports:expense-monthly-report', lambda c: c.get(reverse('api:reports:expense-monthly-report'), **bypass),
+         2, 150),
+        ('reports:expense-monthly-report:past-month',
+         lambda c: c.get(reverse('api:reports:expense-monthly-report'), {'year': 2022, 'month': 6}, **bypass),
+         2, 150),
+        ('reports:expense-monthly-by-category-report',
+         lambda c: c.get(reverse('api:reports:expense-monthly-by-category-report'), **bypass), 2, 250),
+        ('reports:expense-monthly-by-category-report:summary',
+         lambda c: c.get(reverse('api:reports:expense-monthly-by-category-report'), {'mode': 'summary'}, **bypass),
+         2, 150),
+        ('reports:monthly-statistics', lambda c: c.get(reverse('api:reports:monthly-statistics'), **bypass), 2, 150),
+        ('reports:monthly-statistics:daily',
+         lambda c: c.get(reverse('api:reports:monthly-statistics'), {'series': 'daily'}, **bypass), 2, 150),
+        # Five-year trends, months and categories are served from the monthly rollups
+        ('reports:trends', lambda c: c.get(reverse('api:reports:trends'), trend_range, **bypass), 2, 50),
+        ('reports:trends:week',
+         lambda c: c.get(reverse('api:reports:trends'), {**trend_range, 'group': 'week'}, **bypass), 2, 150),
+        ('reports:trends:category',
+         lambda c: c.get(reverse('api:reports:trends'), {**trend_range, 'group': 'category'}, **bypass), 2, 50),
+        # The whole history of the range is loaded as arrays, the categories are named with a second query
+        ('reports:insights', lambda c: c.get(reverse('api:reports:insights'), **bypass), 3, 250),
+        ('reports:expense-export', lambda c: c.get(reverse('api:reports:expense-export')), 2, 150),
+        ('reports:export-job-create', lambda c: c.post(reverse('api:reports:export-job-create'), {'format': 'csv'}),
+         4, 150),
+        ('reports:export-job-detail',
+         lambda c: c.get(reverse('api:reports:export-job-detail', kwargs={'pk': export_job.pk})), 2, 150),
+        # Balance changes append to the ledger, in the transaction moving the balance
+        ('expenses:expense-create',
+         lambda c: c.post(reverse('api:expenses:expense-create'), {'amount': '1.00', 'category_id': category_id}),
+         8, 200),
+        ('expenses:expense-bulk-create',
+         lambda c: c.post(reverse('api:expenses:expense-bulk-create'), bulk, format='json'), 8, 300),
+        ('income:update_income', lambda c: c.patch(reverse('api:income:update_income'), {'amount': '2500.00'}),
+         8, 200),
+        ('auth:current_user', lambda c: c.get(reverse('api:auth:current_user')), 1, 150),
+        # Logins append to the login activity and update the two last login columns of the user
+        ('auth:jwt-create',
+         lambda c: APIClient().post(reverse('api:auth:jwt-create'), {'email': user.email, 'password': PASSWORD}),
+         4, 1000),
+        # Refresh tokens are rotated and blacklisted once used, every request issues a new one
+        ('auth:jwt-refresh',
+         lambda c: APIClient().post(reverse('api:auth:jwt-refresh'), {'refresh': str(RefreshToken.for_user(user))}),
+         7, 150),
+        ('auth:jwt-verify', lambda c: APIClient().post(reverse('api:auth:jwt-verify'), {'token': access}), 1, 150),
+    ]
+
+
+# Test Functions
+
+def test_endpoint_budgets(seeded_user, perf_client, perf_results):
+    """
+    Test every endpoint against its query budget, its p95 latency budget and the absence of full scans
+    of the expense tables, for the parametrized number of expenses.
+    """
+    violations = []
+    for name, send, max_queries, p95_budget in endpoint_cases(seeded_user):
+        queries, timings = measure(lambda: send(perf_client), RUNS)
+        latency = p95(timings)
+        full_scans = find_full_scans(queries)
+
+        perf_results.append({
+            'endpoint': name,
+            'expenses': seeded_user.seeded_size,
+            'vendor': connection.vendor,
+            'queries': len(queries),
+            'max_queries': max_queries,
+            'p50_ms': round(sorted(timings)[len(timings) // 2], 2),
+            'p95_ms': round(latency, 2),
+            'p95_budget_ms': p95_budget * TIME_FACTOR,
+            'full_scans': len(full_scans),
+        })
+
+        if len(queries) > max_queries:
+            statements = '\n  '.join(query['sql'] for query in queries)
+            violations.append(f"{name}: {len(queries)} queries, budget {max_queries}:\n  {statements}")
+        if latency > p95_budget * TIME_FACTOR:
+            violations.append(f"{name}: p95 {latency:.1f}ms, budget {p95_budget * TIME_FACTOR:.0f}ms")
+        for plan in full_scans:
+            violations.append(f"{name}: full scan of an expense table:\n{plan}")
+
+    assert not violations, "\n\n".join(violations)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_loadtest_command_reports_every_endpoint(tmp_path):
+    """
+    Test the load test harness end to end against the in-process server: a virtual user logs in, runs its tasks
+    and the JSON report holds the throughput and latency percentiles of every endpoint, without failures.
+    """
+    Category.objects.create(name='Food')
+    report_path = tmp_path / 'loadtest.json'
+
+    call_command('loadtest', users=1, duration=2, min_wait=0, max_wait=0, prefix='loadtest',
+                 json=str(report_path), stdout=StringIO())
+
+    report = json.loads(report_path.read_text())
+    assert report['users'] == 1
+    assert report['total']['failures'] == 0
+    assert report['endpoints']['auth:jwt-create']['requests'] == 1
+    assert set(report['endpoints']) <= {
+        'auth:jwt-create', 'reports:monthly-statistics', 'expenses:expense-create', 'income:update_income'
+    }
+    assert report['total']['requests'] > 10
+    assert report['total']['p95_ms'] >= report['total']['p50_ms'] > 0
+    assert User.objects.filter(email='loadtest0@example.com').exists()
@@ -0,0 +1,70 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--perf-json', metavar='PATH',
+        help="Write the query counts and timings measured by the performance tests to PATH as JSON",
+    )
+
+
+def pytest_configure(config):
+    config.perf_results = []
+
+
+def pytest_sessionfinish(session, exitstatus):
+    path = session.config.getoption('--perf-json')
+    if path and session.config.perf_results:
+        with open(path, 'w') as results_file:
+            json.dump({
+                'generated_at': datetime.now(timezone.utc).isoformat(),
+                'exit_status': int(exitstatus),
+                'results': session.config.perf_results,
+            }, results_file, indent=2)
+
+
+@pytest.fixture
+def perf_results(request):
+    """Fixture collecting the measurements of the performance tests, written out by --perf-json."""
+    return request.config.perf_results
+
+
+@pytest.fixture(autouse=True)
+def local_memory_cache(settings):
+    """Fixture keeping each test's cached reports and data versions in an empty local memory cache."""
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+@pytest.fixture
+def assert_constant_queries():
+    """
+    Fixture asserting that the number of queries of an operation does not depend on the number of rows.
+
+    Usage: assert_constant_queries(render, add_rows) runs render, calls add_rows to create more rows,
+    runs render again and fails if the second run issued a different number of queries,
+    listing them to spot the N+1 lookup. Returns the number of queries per run.
+    """
+
+    def check(render, add_rows):
+        with CaptureQueriesContext(connection) as baseline:
+            render()
+        add_rows()
+        with CaptureQueriesContext(connection) as grown:
+            render()
+
+        queries = "\n".join(query['sql'] for query in grown.captured_queries)
+        assert len(grown) == len(baseline), (
+            f"{len(baseline)} queries before adding rows, {len(grown)} after:\n{queries}"
+        )
+        return len(baseline)
+
+    return check
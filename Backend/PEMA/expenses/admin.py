@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Expense
+from .models import Category, Expense, MonthlyRollup
 
 
 # Registering the Category model in the admin
@@ -30,8 +30,34 @@ class ExpenseAdmin(admin.ModelAdmin):
     # Order expenses by date, newest first
     ordering = ['-date']
 
+    # Join the user and category of each row instead of fetching them one by one
+    list_select_related = ('user', 'category')
+
     # Fields to show when adding or editing an expense
     fields = ('user', 'amount', 'category', 'description')
 
     # Exclude the 'date' field, as it is automatically set
-    exclude = ('date',)
\ No newline at end of file
+    exclude = ('date',)
+
+
+# Registering the MonthlyRollup model in the admin as a read-only view
+@admin.register(MonthlyRollup)
+class MonthlyRollupAdmin(admin.ModelAdmin):
+    # Display these fields in the list view
+    list_display = ('user', 'year', 'month', 'category', 'total', 'count')
+
+    # Filtering options to narrow down results
+    list_filter = ('year', 'month', 'category')
+
+    # Order buckets by period, newest first
+    ordering = ['-year', '-month']
+
+    # Join the user and category of each row instead of fetching them one by one
+    list_select_related = ('user', 'category')
+
+    # Rollups are maintained from the expenses, use the rebuild_monthly_rollups command to repair them
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
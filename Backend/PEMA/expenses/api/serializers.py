@@ -16,12 +16,28 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'name', 'description']
 
 
+class CategoryPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Category lookup by ID that resolves from a prefetched `categories` mapping in the
+    serializer context when one is provided, avoiding a query per validated item.
+    """
+
+    def to_internal_value(self, data):
+        categories = self.context.get('categories')
+        if categories is not None:
+            try:
+                return categories[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass  # Fall back to the regular lookup and its error messages
+        return super().to_internal_value(data)
+
+
 class ExpenseSerializer(serializers.ModelSerializer):
     """Serializer for Expense model with category association by ID only."""
     user = serializers.StringRelatedField(read_only=True, help_text="The user who owns this expense")
     category = CategorySerializer(read_only=True,
                                   help_text="Category details for this expense")  # Display only; not writable
-    category_id = serializers.PrimaryKeyRelatedField(
+    category_id = CategoryPrimaryKeyRelatedField(
         source='category',
         queryset=Category.objects.all(),
         write_only=True,
@@ -1,7 +1,7 @@
 from django.urls import path
 
 # Import views for expense management
-from .views import ExpenseCreateView
+from .views import ExpenseBulkCreateView, ExpenseCreateView
 
 # Application namespace to avoid conflicts
 app_name = 'expenses'
@@ -10,4 +10,7 @@ urlpatterns = [
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ EXPENSES URLS ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     # Endpoint to create a new expense
     path('create/', ExpenseCreateView.as_view(), name='expense-create'),
+
+    # Endpoint to create many expenses at once from a JSON array or an NDJSON stream
+    path('bulk/', ExpenseBulkCreateView.as_view(), name='expense-bulk-create'),
 ]
@@ -1,15 +1,22 @@
+from collections import defaultdict
 from decimal import Decimal, InvalidOperation
 from logging import getLogger
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import IntegrityError
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from django.db import IntegrityError, transaction
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from rest_framework.exceptions import ValidationError, AuthenticationFailed, PermissionDenied
+from rest_framework import status
 from rest_framework.generics import CreateAPIView
+from rest_framework.parsers import JSONParser
+from rest_framework.views import APIView
 
 from PEMA.utils.response_wrapper import custom_response
+from users.models import LedgerEntry, Profile
+from .parsers import NDJSONParser
 from .serializers import ExpenseSerializer
-from ..models import Expense
+from ..models import Category, Expense, MonthlyRollup
+from ..signals import expenses_bulk_created
 
 # Configure logging for detailed error tracking
 logger = getLogger(__name__)
@@ -21,7 +28,7 @@ class ExpenseCreateView(CreateAPIView):
     Only authenticated users are permitted to create new Expense records.
     """
     serializer_class = ExpenseSerializer
-    queryset = Expense.objects.all()
+    queryset = Expense.objects.for_api()
 
     @extend_schema(
         summary="Create a New Expense",
@@ -82,28 +89,218 @@ class ExpenseCreateView(CreateAPIView):
         """
         Assign the authenticated user as the owner of the expense entry,
         and ensure the user's balance can cover the expense.
+        The balance deduction, the expense, its ledger entry and its monthly rollup are committed together.
         """
         user = self.request.user
-        profile = getattr(user, 'profile', None)  # Safely access profile
-
-        if not profile:
-            logger.error("User profile is missing or incomplete.")
-            raise ValidationError("User profile is missing or incomplete.")
-
         amount = serializer.validated_data.get('amount', Decimal(0))
 
         if not isinstance(amount, Decimal):
             logger.error(f"Invalid amount type: {amount}")
             raise ValidationError("The amount must be a valid decimal number.")
 
-        # Validate the user's balance
-        if profile.balance < amount:
-            logger.error(f"Insufficient balance: {profile.balance} < {amount}")
-            raise ValidationError("Insufficient balance to cover this expense.")
+        with transaction.atomic():
+            # Check and deduct the balance in a single round trip
+            if not Profile.objects.debit(user, amount):
+                if not Profile.objects.filter(user=user).exists():
+                    logger.error("User profile is missing or incomplete.")
+                    raise ValidationError("User profile is missing or incomplete.")
+                logger.error(f"Insufficient balance to cover {amount} for user {user.id}")
+                raise ValidationError("Insufficient balance to cover this expense.")
+
+            # Save the expense record, the monthly rollup is updated by the post_save signal
+            expense = serializer.save(user=user)
+            LedgerEntry.objects.record(user.pk, LedgerEntry.DEBIT, amount, LedgerEntry.EXPENSE, expense.pk)
+
+
+class ExpenseBulkCreateView(APIView):
+    """
+    API view to create many Expense entries in a single request.
+    Accepts a JSON array or an NDJSON stream of expenses, validates them together,
+    debits their total with one conditional update and inserts them in chunks.
+    """
+    parser_classes = [JSONParser, NDJSONParser]
+    modes = ("atomic", "best_effort")
+    max_items = 1000
+    chunk_size = 500
+
+    @extend_schema(
+        summary="Create Expenses in Bulk",
+        description="Allows authenticated users to create many expenses at once, as a JSON array or an "
+                    "`application/x-ndjson` stream. In `atomic` mode (default) either every expense is created or "
+                    "none is; in `best_effort` mode valid expenses are created in order while the balance covers "
+                    "them. The response lists the outcome of every item by its index.",
+        tags=["Expenses"],
+        request=ExpenseSerializer(many=True),
+        parameters=[
+            OpenApiParameter(
+                name="mode",
+                description="`atomic` (default) or `best_effort`.",
+                required=False,
+                type=str,
+                enum=["atomic", "best_effort"],
+            ),
+        ],
+        responses={
+            201: OpenApiResponse(description="All expenses created successfully."),
+            207: OpenApiResponse(description="Some expenses were created, see the per-item results."),
+            400: OpenApiResponse(description="Validation error or insufficient balance, nothing was created"),
+            403: OpenApiResponse(description="Forbidden - Authentication required"),
+            500: OpenApiResponse(description="Internal server error"),
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        """Handle POST requests to create a batch of expense entries."""
+        mode = request.query_params.get("mode", "atomic")
+        if mode not in self.modes:
+            return custom_response(
+                status="error",
+                message="Validation error occurred. Please check your input.",
+                errors={"mode": f"Unsupported mode '{mode}', expected one of: {', '.join(self.modes)}."},
+                status_code=400,
+            )
+
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return custom_response(
+                status="error",
+                message="Validation error occurred. Please check your input.",
+                errors={"non_field_errors": ["Expected a non-empty list of expenses."]},
+                status_code=400,
+            )
+        if len(items) > self.max_items:
+            return custom_response(
+                status="error",
+                message="Validation error occurred. Please check your input.",
+                errors={"non_field_errors": [f"A batch cannot contain more than {self.max_items} expenses."]},
+                status_code=400,
+            )
+
+        try:
+            results = self._create_expenses(request.user, items, mode)
+        except Exception as e:
+            logger.error(f"Unhandled exception during bulk creation: {e}", exc_info=True)
+            return custom_response(
+                status="error",
+                message="An unexpected error occurred. Please try again later.",
+                errors=None,  # Hide unhandled exception details
+                status_code=500,
+            )
+
+        created = sum(1 for result in results if result["status"] == "created")
+        data = {"mode": mode, "created": created, "failed": len(results) - created, "results": results}
+        if created == len(results):
+            return custom_response(
+                status="success",
+                message="Expenses created successfully.",
+                data=data,
+                status_code=status.HTTP_201_CREATED,
+            )
+        if created:
+            return custom_response(
+                status="success",
+                message="Some expenses could not be created, see the per-item results.",
+                data=data,
+                status_code=status.HTTP_207_MULTI_STATUS,
+            )
+        return custom_response(
+            status="error",
+            message="No expense was created, see the per-item results.",
+            data=data,
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    def _create_expenses(self, user, items, mode):
+        """Validate, check the balance of and insert the batch, returning the outcome of every item."""
+        results = [None] * len(items)
+        # Only the categories the batch refers to are loaded, unknown ids fail validation as usual
+        category_ids = set()
+        for item in items:
+            try:
+                category_ids.add(int(item.get("category_id")))
+            except (AttributeError, TypeError, ValueError):
+                pass  # The serializer reports malformed items and category ids
+        context = {"request": self.request, "categories": Category.objects.in_bulk(category_ids)}
+
+        serializer = ExpenseSerializer(data=items, many=True, context=context)
+        if serializer.is_valid():
+            valid = list(zip(range(len(items)), serializer.validated_data))
+        else:
+            valid_indexes = [index for index, errors in enumerate(serializer.errors) if not errors]
+            for index, errors in enumerate(serializer.errors):
+                if errors:
+                    results[index] = {"index": index, "status": "invalid", "errors": errors}
+
+            if mode == "atomic" or not valid_indexes:
+                return self._reject(results, "The batch was rejected because some expenses are invalid.")
+
+            serializer = ExpenseSerializer(data=[items[index] for index in valid_indexes], many=True,
+                                           context=context)
+            serializer.is_valid(raise_exception=True)
+            valid = list(zip(valid_indexes, serializer.validated_data))
+
+        with transaction.atomic():
+            if mode == "best_effort":
+                valid = self._debit_covered(user, valid)
+            elif not Profile.objects.debit(user, self._total(valid)):
+                valid = []
+            if not valid:
+                return self._reject(results, "Insufficient balance to cover this expense.")
+
+            expenses = Expense.objects.bulk_create(
+                [Expense(user=user, **validated_data) for _, validated_data in valid],
+                batch_size=self.chunk_size,
+            )
+            LedgerEntry.objects.bulk_create(
+                [LedgerEntry(user=user, kind=LedgerEntry.DEBIT, amount=expense.amount,
+                             source_type=LedgerEntry.EXPENSE, source_id=expense.pk) for expense in expenses],
+                batch_size=self.chunk_size,
+            )
+            self._update_rollups(user, expenses)
+            expenses_bulk_created.send(sender=Expense, user=user, expenses=expenses)
+
+        for (index, _), expense in zip(valid, expenses):
+            results[index] = {"index": index, "status": "created", "id": expense.pk}
+        # Valid expenses left without an outcome are the ones the balance could not cover
+        return self._reject(results, "Insufficient balance to cover this expense.")
+
+    @staticmethod
+    def _total(valid):
+        """Sum of the amounts of the validated expenses."""
+        return sum((validated_data["amount"] for _, validated_data in valid), Decimal(0))
+
+    def _debit_covered(self, user, valid):
+        """
+        Debit the expenses the balance covers, in submission order, and return them.
+        The profile row is locked while the balance is read once, so the covered expenses are
+        picked in Python and debited with a single conditional UPDATE whatever the batch size.
+        """
+        profile = Profile.objects.select_for_update().only('balance').filter(user=user).first()
+        balance = profile.balance if profile else Decimal(0)
+        covered, covered_total = [], Decimal(0)
+        for index, validated_data in valid:
+            if covered_total + validated_data["amount"] <= balance:
+                covered.append((index, validated_data))
+                covered_total += validated_data["amount"]
+        if not covered or not Profile.objects.debit(user, covered_total):
+            return []
+        return covered
+
+    @staticmethod
+    def _reject(results, reason):
+        """Mark every item without an outcome yet as rejected for the given reason."""
+        return [
+            result or {"index": index, "status": "rejected", "errors": reason}
+            for index, result in enumerate(results)
+        ]
 
-        # Deduct the expense amount from the balance
-        profile.balance -= amount
-        profile.save()
+    @staticmethod
+    def _update_rollups(user, expenses):
+        """bulk_create does not send post_save, so fold the batch into the monthly rollups here."""
+        buckets = defaultdict(lambda: [Decimal(0), 0])
+        for expense in expenses:
+            bucket = buckets[(expense.date.year, expense.date.month, expense.category_id)]
+            bucket[0] += expense.amount
+            bucket[1] += 1
 
-        # Save the expense record
-        serializer.save(user=user)
+        for (year, month, category_id), (total, count) in buckets.items():
+            MonthlyRollup.objects.apply(user.pk, year, month, category_id, total, count)
@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from expenses.models import MonthlyRollup
+
+
+class Command(BaseCommand):
+    help = "Backfill or rebuild the monthly expense rollups from the existing Expense rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Number of users whose rollups are rebuilt per transaction",
+        )
+        parser.add_argument(
+            '--user-id', type=int, action='append', dest='user_ids',
+            help="Only rebuild the rollups of this user (can be repeated)",
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        batch_size = options['batch_size']
+
+        users = User.objects.order_by('pk')
+        if options['user_ids']:
+            users = users.filter(pk__in=options['user_ids'])
+
+        # Walk the users by primary key so every batch is an index range scan
+        last_id = 0
+        processed_users = 0
+        created_buckets = 0
+        while True:
+            user_ids = list(users.filter(pk__gt=last_id).values_list('pk', flat=True)[:batch_size])
+            if not user_ids:
+                break
+
+            created_buckets += MonthlyRollup.objects.rebuild(user_ids)
+            processed_users += len(user_ids)
+            last_id = user_ids[-1]
+            self.stdout.write(f"Rebuilt rollups for {processed_users} users (last user id {last_id})")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollups rebuilt for {processed_users} users, {created_buckets} buckets written"
+        ))
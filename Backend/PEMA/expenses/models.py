@@ -1,9 +1,14 @@
-from collections import defaultdict
+from itertools import groupby
+from operator import attrgetter
 
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Avg, Count, F, Max, Min, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear, TruncWeek
 from django.utils import timezone
 
+from .utils import Period
+
 User = get_user_model()
 
 
@@ -29,32 +34,96 @@ class Category(models.Model):
         verbose_name_plural = "Categories"
 
 
-class ExpenseManager(models.Manager):
+class ExpenseQuerySet(models.QuerySet):
+    # Columns read when an expense is rendered by ExpenseSerializer, its summary and its user's name
+    API_FIELDS = (
+        'id', 'user_id', 'amount', 'date', 'category_id', 'description',
+        'category__id', 'category__name', 'category__description',
+        'user__id', 'user__username', 'user__email',
+    )
+
+    def for_api(self):
+        """
+        Prepares the expenses for ExpenseSerializer: the category and the user are joined in the
+        same query and only the rendered columns are loaded, so rendering any number of expenses
+        costs no additional query.
+        """
+        return self.select_related('category', 'user').only(*self.API_FIELDS)
+
+
+class ExpenseManager(models.Manager.from_queryset(ExpenseQuerySet)):
+    def get_expenses_for_period(self, user, period):
+        """
+        Retrieves all expenses of a specified user within a monthly period.
+        Filters on the half-open range of the period's dates, which the (user, date) index
+        can serve directly, unlike year/month extraction.
+        """
+        return self.filter(user=user, **period.as_filter('date'))
+
     def get_expenses_for_current_month(self, user):
         """
         Retrieves all expenses for the current month for a specified user.
         Filters expenses by the authenticated user and the current year and month.
         """
-        now = timezone.now()
-        return self.filter(
-            user=user,
-            date__year=now.year,
-            date__month=now.month
-        )
+        return self.get_expenses_for_period(user, Period.current())
 
-    def get_expenses_by_category_for_current_month(self, user=None):
+    def get_expenses_by_category_for_period(self, user, period):
         """
-        Retrieves and groups expenses by category for the current month for a specified user.
+        Retrieves and groups expenses by category within a monthly period for a specified user.
         This groups each expense by its category, creating a dictionary with category keys
         and lists of expense instances as values.
+        The categories and users are joined in the same query and the rows are grouped
+        in a single pass over the queryset ordered by category.
         """
-        current_month_expenses = self.get_expenses_for_current_month(user)
-        expenses_by_category = defaultdict(list)
+        expenses = (
+            self.get_expenses_for_period(user, period)
+            .for_api()
+            .order_by('category__name', 'category_id', '-date', '-id')
+        )
 
-        for expense in current_month_expenses:
-            expenses_by_category[expense.category].append(expense)
+        return {
+            category: list(category_expenses)
+            for category, category_expenses in groupby(expenses, key=attrgetter('category'))
+        }
 
-        return expenses_by_category
+    def get_expenses_by_category_for_current_month(self, user=None):
+        """Retrieves and groups expenses by category for the current month for a specified user."""
+        return self.get_expenses_by_category_for_period(user, Period.current())
+
+    def get_category_summary_for_period(self, user, period):
+        """
+        Computes per-category totals, counts, minimum, maximum and average amounts
+        within a monthly period for a specified user with a single GROUP BY query.
+        """
+        return (
+            self.get_expenses_for_period(user, period)
+            .values('category_id', 'category__name')
+            .annotate(
+                total=Sum('amount'),
+                count=Count('id'),
+                minimum=Min('amount'),
+                maximum=Max('amount'),
+                average=Avg('amount'),
+            )
+            .order_by('category__name')
+        )
+
+    def get_totals_by_week(self, user, start, end):
+        """
+        Computes the total and count of a user's expenses for every week, starting on Monday, with expenses
+        dated within the half-open range [start, end), with a single GROUP BY query.
+        """
+        return (
+            self.filter(user=user, date__gte=start, date__lt=end)
+            .annotate(week=TruncWeek('date'))
+            .values('week')
+            .annotate(total=Sum('amount'), count=Count('id'))
+            .order_by('week')
+        )
+
+    def get_category_summary_for_current_month(self, user):
+        """Computes the per-category summary of the current month for a specified user."""
+        return self.get_category_summary_for_period(user, Period.current())
 
 
 class Expense(models.Model):
@@ -64,7 +133,7 @@ class Expense(models.Model):
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="expenses")
     amount = models.DecimalField(max_digits=10, decimal_places=2, help_text="Amount spent in the currency unit")
-    date = models.DateField(auto_now_add=True)  # Automatically sets the date to the creation date
+    date = models.DateField(default=timezone.localdate)  # Defaults to the creation date, set explicitly for imports
     category = models.ForeignKey(
         Category, on_delete=models.SET_NULL, null=True, related_name="expenses"
     )
@@ -85,3 +154,137 @@ class Expense(models.Model):
         # Orders expenses by date, with the most recent first
         ordering = ['-date']
         verbose_name_plural = "Expenses"
+        indexes = [
+            # Serves per-user date range filters and the default ordering without a sort
+            models.Index(fields=['user', '-date'], name='expense_user_date_idx'),
+            # Serves per-user category reports restricted to a date range
+            models.Index(fields=['user', 'category', 'date'], name='expense_user_category_date_idx'),
+            # Serves the expenses of a user created after the checkpoint of Profile.update_balance
+            models.Index(fields=['user', 'id'], name='expense_user_id_idx'),
+        ]
+
+
+class MonthlyRollupManager(models.Manager):
+    def apply(self, user_id, year, month, category_id, total, count):
+        """
+        Adds the given total and count to a single rollup bucket, creating the bucket on first use.
+        The increment is a single UPDATE so concurrent writers never overwrite each other.
+        """
+        lookup = {"user_id": user_id, "year": year, "month": month, "category_id": category_id}
+        updated = self.filter(**lookup).update(total=F('total') + total, count=F('count') + count)
+        if updated:
+            return
+
+        try:
+            with transaction.atomic():
+                self.create(total=total, count=count, **lookup)
+        except IntegrityError:
+            # Another writer created the bucket in the meantime, add to it instead
+            self.filter(**lookup).update(total=F('total') + total, count=F('count') + count)
+
+    def apply_expense(self, expense, sign=1):
+        """Adds (sign=1) or removes (sign=-1) a single expense from its monthly bucket."""
+        self.apply(
+            user_id=expense.user_id,
+            year=expense.date.year,
+            month=expense.date.month,
+            category_id=expense.category_id,
+            total=sign * expense.amount,
+            count=sign,
+        )
+
+    def for_month(self, user, year, month):
+        """Retrieves the rollup buckets of a user for the given month, one row per category."""
+        return self.filter(user=user, year=year, month=month)
+
+    def for_period(self, user, period):
+        """Retrieves the rollup buckets of a user for a monthly period."""
+        return self.for_month(user, period.year, period.month)
+
+    def for_range(self, user, first, last):
+        """Retrieves the rollup buckets of a user from the first to the last monthly period, both included."""
+        return self.filter(
+            Q(year__gt=first.year) | Q(year=first.year, month__gte=first.month),
+            Q(year__lt=last.year) | Q(year=last.year, month__lte=last.month),
+            user=user,
+        )
+
+    def totals_by_month(self, user, first, last):
+        """
+        Computes the total and count of a user's expenses for every month from the first to the last
+        period that has any, with a single GROUP BY query over one bucket per month and category.
+        """
+        return (
+            self.for_range(user, first, last)
+            .values('year', 'month')
+            .annotate(total=Sum('total'), count=Sum('count'))
+            .order_by('year', 'month')
+        )
+
+    def totals_by_category(self, user, first, last):
+        """
+        Computes the total and count of a user's expenses per category from the first to the last period,
+        with a single GROUP BY query, the largest total first.
+        """
+        return (
+            self.for_range(user, first, last)
+            .values('category_id', 'category__name')
+            .annotate(total=Sum('total'), count=Sum('count'))
+            .order_by('-total', 'category__name')
+        )
+
+    def rebuild(self, user_ids):
+        """
+        Recomputes the rollups of the given users from their Expense rows.
+        Existing buckets are dropped and replaced in a single transaction.
+        """
+        aggregated = (
+            Expense.objects.filter(user_id__in=user_ids)
+            .annotate(year=ExtractYear('date'), month=ExtractMonth('date'))
+            .values('user_id', 'year', 'month', 'category_id')
+            .annotate(total=Sum('amount'), count=Count('id'))
+            .order_by()
+        )
+
+        with transaction.atomic():
+            self.filter(user_id__in=user_ids).delete()
+            return len(self.bulk_create(self.model(**row) for row in aggregated))
+
+
+class MonthlyRollup(models.Model):
+    """
+    Pre-aggregated expense totals per user, month and category.
+    Kept in sync with every Expense write so monthly reports read one row per category
+    instead of scanning the user's expenses.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="monthly_rollups")
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, null=True, blank=True, related_name="monthly_rollups"
+    )
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0,
+                                help_text="Sum of the expense amounts in this bucket")
+    count = models.IntegerField(default=0, help_text="Number of expenses in this bucket")
+
+    objects = MonthlyRollupManager()
+
+    def __str__(self):
+        """String representation of the rollup bucket, displaying user, period and category."""
+        return f'{self.user} spent {self.total:.2f} in {self.year}-{self.month:02d} on {self.category}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'year', 'month', 'category'],
+                condition=Q(category__isnull=False),
+                name='unique_monthly_rollup_per_category',
+            ),
+            # Expenses whose category was removed share a single uncategorized bucket
+            models.UniqueConstraint(
+                fields=['user', 'year', 'month'],
+                condition=Q(category__isnull=True),
+                name='unique_monthly_rollup_uncategorized',
+            ),
+        ]
+        verbose_name_plural = "Monthly rollups"
@@ -0,0 +1,59 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+
+from users.models import Profile
+from .models import Category, Expense, MonthlyRollup
+
+# Sent with the `user` and the `expenses` inserted with bulk_create, which sends no post_save
+expenses_bulk_created = Signal()
+
+
+@receiver(pre_save, sender=Expense)
+def remember_previous_expense(sender, instance, raw=False, **kwargs):
+    """Keep the stored version of an edited expense so its old rollup bucket can be corrected."""
+    instance._previous_state = None
+    if instance.pk and not raw:
+        instance._previous_state = (
+            Expense.objects.filter(pk=instance.pk)
+            .only('user_id', 'amount', 'date', 'category_id')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Expense)
+def update_rollup_on_save(sender, instance, created, raw=False, **kwargs):
+    """Move the expense amount into its monthly rollup bucket."""
+    if raw:
+        return
+
+    previous = getattr(instance, '_previous_state', None)
+    if previous is not None:
+        MonthlyRollup.objects.apply_expense(previous, sign=-1)
+        # An edited expense may already be part of the checkpoint of Profile.update_balance
+        Profile.objects.apply_expense_change(previous, sign=-1)
+        Profile.objects.apply_expense_change(instance)
+    MonthlyRollup.objects.apply_expense(instance)
+
+
+@receiver(post_delete, sender=Expense)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    """Remove a deleted expense from its monthly rollup bucket."""
+    MonthlyRollup.objects.apply_expense(instance, sign=-1)
+    Profile.objects.apply_expense_change(instance, sign=-1)
+
+
+@receiver(pre_delete, sender=Category)
+def fold_category_rollups(sender, instance, **kwargs):
+    """
+    Expenses of a deleted category become uncategorized, so their rollup totals
+    are moved to the uncategorized bucket before the category buckets are cascaded away.
+    """
+    for rollup in MonthlyRollup.objects.filter(category=instance):
+        MonthlyRollup.objects.apply(
+            user_id=rollup.user_id,
+            year=rollup.year,
+            month=rollup.month,
+            category_id=None,
+            total=rollup.total,
+            count=rollup.count,
+        )
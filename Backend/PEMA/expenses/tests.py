@@ -1,11 +1,21 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 from decimal import Decimal
+from io import StringIO
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 
-from .models import Category, Expense
+from users.models import Profile
+from .api.serializers import ExpenseSerializer
+from .models import Category, Expense, MonthlyRollup
+from .utils import Period
 
 User = get_user_model()
 
@@ -140,3 +150,237 @@ def test_api_create_expense_invalid_category(auth_client):
     response = auth_client.post(url, payload, format="json")
     assert response.status_code == 400
     assert "Invalid pk" in str(response.data)
+
+
+@pytest.mark.django_db
+def test_api_create_expense_updates_monthly_rollup(auth_client, test_user, test_category):
+    """Test that creating expenses through the API keeps the monthly rollup in sync."""
+    url = reverse('api:expenses:expense-create')
+    for amount in (150.00, 25.50):
+        auth_client.post(url, {"amount": amount, "category_id": test_category.id}, format="json")
+
+    today = date.today()
+    rollup = MonthlyRollup.objects.get(user=test_user, year=today.year, month=today.month, category=test_category)
+    assert rollup.total == Decimal("175.50")
+    assert rollup.count == 2
+
+
+@pytest.mark.django_db
+def test_monthly_rollup_follows_expense_changes(test_user, test_category, test_expense):
+    """Test that editing, deleting and uncategorizing expenses adjusts the rollup buckets."""
+    other_category = Category.objects.create(name="Transport")
+
+    test_expense.amount = Decimal("40.00")
+    test_expense.category = other_category
+    test_expense.save()
+    assert MonthlyRollup.objects.get(category=test_category).count == 0
+    assert MonthlyRollup.objects.get(category=other_category).total == Decimal("40.00")
+
+    other_category.delete()
+    uncategorized = MonthlyRollup.objects.get(user=test_user, category__isnull=True)
+    assert uncategorized.total == Decimal("40.00")
+    assert uncategorized.count == 1
+
+    Expense.objects.get(pk=test_expense.pk).delete()
+    uncategorized.refresh_from_db()
+    assert uncategorized.total == Decimal("0.00")
+    assert uncategorized.count == 0
+
+
+@pytest.mark.django_db
+def test_rebuild_monthly_rollups_command(test_user, test_category, test_expense):
+    """Test that the rebuild command recomputes the rollups from the expense rows."""
+    Expense.objects.create(user=test_user, amount=20, category=test_category)
+    MonthlyRollup.objects.all().delete()
+
+    call_command('rebuild_monthly_rollups', batch_size=1, stdout=StringIO())
+
+    rollup = MonthlyRollup.objects.get(user=test_user, category=test_category)
+    assert rollup.total == Decimal("120.00")
+    assert rollup.count == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_expense_creation_keeps_balance_consistent(test_user, test_category):
+    """Test that parallel expense creation neither loses balance updates nor overdraws the balance."""
+    url = reverse('api:expenses:expense-create')
+    workers, requests_per_worker, amount = 8, 10, Decimal("15.00")  # 1200 requested for a 1000 balance
+
+    def hammer():
+        client = APIClient()
+        client.force_authenticate(user=test_user)
+        try:
+            return [
+                client.post(url, {"amount": str(amount), "category_id": test_category.id}, format="json").status_code
+                for _ in range(requests_per_worker)
+            ]
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        status_codes = [code for codes in executor.map(lambda _: hammer(), range(workers)) for code in codes]
+
+    test_user.profile.refresh_from_db()
+    created = Expense.objects.filter(user=test_user).count()
+    assert created == status_codes.count(201)
+    assert test_user.profile.balance == Decimal("1000.00") - created * amount
+    assert test_user.profile.balance >= 0
+    if connection.vendor == 'postgresql':
+        # SQLite serializes writers with table locks, PostgreSQL must serve every request
+        assert set(status_codes) <= {201, 400}
+        assert created == int(Decimal("1000.00") // amount)
+
+
+@pytest.mark.django_db
+def test_api_bulk_create_expenses(auth_client, test_user, test_category, django_assert_max_num_queries):
+    """Test creating a batch of expenses in a single request."""
+    url = reverse('api:expenses:expense-bulk-create')
+    payload = [{"amount": "10.00", "category_id": test_category.id, "description": f"Item {i}"} for i in range(50)]
+
+    # The query count must not grow with the number of expenses in the batch
+    with django_assert_max_num_queries(10):
+        response = auth_client.post(url, payload, format="json")
+
+    assert response.status_code == 201
+    assert response.data["data"]["created"] == 50
+    assert [result["status"] for result in response.data["data"]["results"]] == ["created"] * 50
+    test_user.profile.refresh_from_db()
+    assert test_user.profile.balance == Decimal("500.00")
+    assert MonthlyRollup.objects.get(user=test_user, category=test_category).count == 50
+
+
+@pytest.mark.django_db
+def test_api_bulk_create_expenses_atomic_rejects_invalid_batch(auth_client, test_user, test_category):
+    """Test that a single invalid expense rejects the whole batch in atomic mode."""
+    url = reverse('api:expenses:expense-bulk-create')
+    payload = [
+        {"amount": "10.00", "category_id": test_category.id},
+        {"amount": "-5.00", "category_id": test_category.id},
+    ]
+
+    response = auth_client.post(url, payload, format="json")
+
+    assert response.status_code == 400
+    results = response.data["data"]["results"]
+    assert results[0]["status"] == "rejected"
+    assert results[1]["status"] == "invalid"
+    assert "amount" in results[1]["errors"]
+    assert not Expense.objects.filter(user=test_user).exists()
+
+
+@pytest.mark.django_db
+def test_api_bulk_create_expenses_best_effort_ndjson(auth_client, test_user, test_category):
+    """Test best-effort mode with an NDJSON stream that exceeds the balance."""
+    url = reverse('api:expenses:expense-bulk-create') + "?mode=best_effort"
+    lines = [
+        {"amount": "600.00", "category_id": test_category.id},
+        {"amount": "10.00", "category_id": 9999},
+        {"amount": "500.00", "category_id": test_category.id},
+        {"amount": "400.00", "category_id": test_category.id},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = auth_client.post(url, body, content_type="application/x-ndjson")
+
+    assert response.status_code == 207
+    statuses = [result["status"] for result in response.data["data"]["results"]]
+    assert statuses == ["created", "invalid", "rejected", "created"]
+    test_user.profile.refresh_from_db()
+    assert test_user.profile.balance == Decimal("0.00")
+    # The balance is read once and debited once, and only the referenced categories are loaded
+    sql = [query['sql'] for query in queries.captured_queries]
+    assert sum(query.startswith('SELECT') and 'FROM "users_profile"' in query for query in sql) == 1
+    assert sum(query.startswith('UPDATE "users_profile"') for query in sql) == 1
+    assert all(' WHERE ' in query for query in sql if query.startswith('SELECT') and 'FROM "expenses_category"' in query)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", [10, 200])
+def test_api_bulk_create_expenses_best_effort_overflow_queries(auth_client, test_user, test_category, size,
+                                                               django_assert_num_queries):
+    """
+    Test that a best-effort batch exceeding the balance takes as many queries whatever its size,
+    the balance being read and debited once (sizes stay within a single bulk_create batch on SQLite).
+    """
+    url = reverse('api:expenses:expense-bulk-create') + "?mode=best_effort"
+    payload = [{"amount": "1.00", "category_id": test_category.id} for _ in range(size)]
+    Profile.objects.filter(user=test_user).update(balance=Decimal(size // 2))
+
+    with django_assert_num_queries(11):
+        response = auth_client.post(url, payload, format="json")
+
+    assert response.status_code == 207
+    assert response.data["data"]["created"] == size // 2
+    test_user.profile.refresh_from_db()
+    assert test_user.profile.balance == Decimal("0.00")
+
+
+@pytest.mark.django_db
+def test_current_month_expenses_use_user_date_index(test_user, test_expense):
+    """Test that the current month filter is a sargable range served by the (user, date) index."""
+    queryset = Expense.objects.get_expenses_for_current_month(test_user)
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            # The test tables are tiny, make sure the planner does not settle for a sequential scan
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = queryset.explain()
+    elif connection.vendor == 'sqlite':
+        plan = queryset.explain()
+    else:
+        pytest.skip("EXPLAIN output is only checked on PostgreSQL and SQLite")
+
+    assert 'expense_user_date_idx' in plan
+    assert list(queryset) == [test_expense]
+
+
+def test_period_bounds_cross_year_boundary():
+    """Test that the December period ends on the first day of the next year."""
+    period = Period(2023, 12)
+
+    assert period.start == date(2023, 12, 1)
+    assert period.end == date(2024, 1, 1)
+    assert period.days == 31
+    assert period.elapsed_days == 31
+    assert period.as_filter() == {'date__gte': date(2023, 12, 1), 'date__lt': date(2024, 1, 1)}
+    assert Period(2024, 2).days == 29
+
+
+@pytest.mark.parametrize('params', [
+    {'year': '2024'},
+    {'month': '5'},
+    {'year': '2024', 'month': 'may'},
+    {'year': '2024', 'month': '13'},
+])
+def test_period_from_invalid_query_params(params):
+    """Test that incomplete or out of range year/month parameters are rejected."""
+    with pytest.raises(ValueError):
+        Period.from_query_params(params)
+
+
+@pytest.mark.django_db
+def test_get_expenses_for_past_period(test_user, test_category, test_expense):
+    """Test that expenses of a past month are returned for that month only."""
+    past = Expense.objects.create(user=test_user, amount=Decimal('25.00'), category=test_category)
+    Expense.objects.filter(pk=past.pk).update(date=date(2023, 12, 31))
+
+    assert list(Expense.objects.get_expenses_for_period(test_user, Period(2023, 12))) == [past]
+    assert not Expense.objects.get_expenses_for_period(test_user, Period(2024, 1)).exists()
+
+
+@pytest.mark.django_db
+def test_expense_serializer_for_api_queries_do_not_grow_with_rows(test_user, test_category, test_expense,
+                                                                  assert_constant_queries):
+    """Test that rendering expenses prepared by for_api() takes a single query however many there are."""
+    other_category = Category.objects.create(name='Transport')
+
+    def render():
+        return ExpenseSerializer(Expense.objects.filter(user=test_user).for_api(), many=True).data
+
+    def add_rows():
+        for category in (test_category, other_category, None):
+            Expense.objects.create(user=test_user, amount=Decimal('5.00'), category=category)
+
+    assert assert_constant_queries(render, add_rows) == 1
+    assert {item['summary'] for item in render()} >= {'Expense of 5.00 in Transport', 'Expense of 5.00 in None'}
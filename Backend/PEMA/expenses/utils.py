@@ -0,0 +1,103 @@
+from datetime import date
+
+from django.utils import timezone
+
+
+def date_range_for_month(year, month):
+    """
+    Returns the half-open range of dates [first day of the month, first day of the next month).
+    Filtering with `date__gte`/`date__lt` on these bounds keeps the lookup index-friendly,
+    unlike extracting the year and month of every row.
+    """
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+class Period:
+    """
+    A calendar month of expenses, resolved in a timezone (the active one by default)
+    so "the current month" and "today" follow the user's local calendar.
+    """
+
+    def __init__(self, year, month, tz=None):
+        if not 1 <= month <= 12:
+            raise ValueError("Month must be between 1 and 12.")
+        if not 1 <= year <= 9998:
+            raise ValueError("Year must be between 1 and 9998.")
+
+        self.year = year
+        self.month = month
+        self.tz = tz
+        self.start, self.end = date_range_for_month(year, month)
+
+    @classmethod
+    def current(cls, tz=None):
+        """The month containing today's date in the given timezone."""
+        today = timezone.localdate(timezone=tz)
+        return cls(today.year, today.month, tz)
+
+    @classmethod
+    def from_query_params(cls, query_params, tz=None):
+        """
+        Builds the period from optional `year` and `month` query parameters, defaulting to the current month.
+        Raises ValueError when the parameters are incomplete or invalid.
+        """
+        year, month = query_params.get('year'), query_params.get('month')
+        if year is None and month is None:
+            return cls.current(tz)
+        if year is None or month is None:
+            raise ValueError("Both 'year' and 'month' must be provided together.")
+        try:
+            year, month = int(year), int(month)
+        except (TypeError, ValueError):
+            raise ValueError("Year and month must be integers.")
+        return cls(year, month, tz)
+
+    @classmethod
+    def parse(cls, value, tz=None):
+        """Builds the period from a 'YYYY-MM' string, raising ValueError when it is invalid."""
+        year, separator, month = (value or '').partition('-')
+        if not separator or not year.isdigit() or not month.isdigit():
+            raise ValueError(f"Invalid month '{value}', expected YYYY-MM.")
+        return cls(int(year), int(month), tz)
+
+    def shift(self, months):
+        """The period the given number of months after (or before, when negative) this one."""
+        index = self.year * 12 + self.month - 1 + months
+        return Period(index // 12, index % 12 + 1, self.tz)
+
+    def months_until(self, other):
+        """Number of months from this period to the other one, negative when the other one is earlier."""
+        return (other.year - self.year) * 12 + other.month - self.month
+
+    @property
+    def days(self):
+        """Number of days in the month."""
+        return (self.end - self.start).days
+
+    @property
+    def elapsed_days(self):
+        """Number of days of the month up to and including today, all of them for past months."""
+        today = timezone.localdate(timezone=self.tz)
+        if today < self.start:
+            return 0
+        if today >= self.end:
+            return self.days
+        return (today - self.start).days + 1
+
+    def as_filter(self, field='date'):
+        """Keyword arguments filtering a date field on the half-open range of the month."""
+        return {f'{field}__gte': self.start, f'{field}__lt': self.end}
+
+    def __eq__(self, other):
+        return isinstance(other, Period) and (self.year, self.month) == (other.year, other.month)
+
+    def __hash__(self):
+        return hash((self.year, self.month))
+
+    def __str__(self):
+        return f'{self.year}-{self.month:02d}'
+
+    def __repr__(self):
+        return f'Period({self.year}, {self.month})'
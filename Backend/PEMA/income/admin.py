@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Income
+from .models import BalanceRolloverRun, Income
 
 
 # Registering the Income model in the admin interface
@@ -19,3 +19,21 @@ class IncomeAdmin(admin.ModelAdmin):
 
     # Fields to show when adding/editing an income entry
     fields = ('user', 'amount', 'description')
+
+
+# Registering the BalanceRolloverRun model in the admin as a read-only view
+@admin.register(BalanceRolloverRun)
+class BalanceRolloverRunAdmin(admin.ModelAdmin):
+    # Fields to display in the list view for quick overview
+    list_display = ('period', 'status', 'processed_profiles', 'total_profiles', 'credited_profiles',
+                    'started_at', 'finished_at')
+
+    # Filter options to narrow down results quickly
+    list_filter = ('status',)
+
+    # Runs are written by the rollover task only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,10 +1,9 @@
 # income/views.py
 
-from decimal import Decimal
 from logging import getLogger
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
 from rest_framework.exceptions import ValidationError
@@ -13,7 +12,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from PEMA.utils.response_wrapper import custom_response
-from users.models import Profile
+from users.models import LedgerEntry, Profile
 from .serializers import IncomeSerializer
 from ..models import Income
 
@@ -60,10 +59,13 @@ class UpdateIncomeView(UpdateAPIView):
         return self._handle_request(self.partial_update, request, *args, **kwargs)
 
     def get_object(self):
-        """Retrieve the Income object for the authenticated user, or raise an error if not found."""
+        """
+        Retrieve the Income object for the authenticated user, or raise an error if not found.
+        The user is joined in the same query, as IncomeSerializer renders it.
+        """
         user = self.request.user
         try:
-            return Income.objects.get(user=user)
+            return Income.objects.select_related('user').get(user=user)
         except Income.DoesNotExist as e:
             logger.warning(f"Income entry not found for user {user.id}: {e}")
             raise ValidationError(
@@ -74,20 +76,25 @@ class UpdateIncomeView(UpdateAPIView):
     def update(self, request, *args, **kwargs):
         """Override to check for changes in the income amount and update profile balance if needed."""
         try:
-            instance = self.get_object()
-            previous_amount = instance.amount
-            response = super().update(request, *args, **kwargs)
-            new_amount = Decimal(response.data.get("amount", "0.00"))
+            # The income, the balance and the ledger entry of the difference change together
+            with transaction.atomic():
+                # A single read of the income serves the update, the serializer and the ledger entry
+                instance = self.get_object()
+                previous_amount = instance.amount
+                serializer = self.get_serializer(instance, data=request.data, partial=kwargs.pop('partial', False))
+                serializer.is_valid(raise_exception=True)
+                self.perform_update(serializer)
+                new_amount = instance.amount
 
-            if new_amount != previous_amount:
-                # Update the profile balance with the difference
-                self._update_profile_balance(request.user, previous_amount, new_amount)
+                if new_amount != previous_amount:
+                    # Update the profile balance with the difference
+                    self._update_profile_balance(request.user, instance, previous_amount, new_amount)
 
             return custom_response(
                 status="success",
                 message="Income entry updated and profile balance adjusted.",
-                data=response.data,
-                status_code=response.status_code,
+                data=serializer.data,
+                status_code=200,
             )
         except Profile.DoesNotExist:
             logger.error(f"Profile not found for user {request.user.id}.")
@@ -156,14 +163,11 @@ class UpdateIncomeView(UpdateAPIView):
                 status_code=500,
             )
 
-    def _update_profile_balance(self, user, previous_amount, new_amount):
-        """Update the profile balance for the given user based on income change."""
-        try:
-            profile = Profile.objects.get(user=user)
-            difference = new_amount - previous_amount
-            profile.balance += difference
-            profile.save()
-            logger.debug(f"Updated balance for user {user.id}: {profile.balance} (Difference: {difference})")
-        except Profile.DoesNotExist as e:
-            logger.error(f"Profile not found for user {user.id}: {e}")
+    def _update_profile_balance(self, user, income, previous_amount, new_amount):
+        """Update the profile balance for the given user based on income change, and record it in the ledger."""
+        difference = new_amount - previous_amount
+        if not Profile.objects.credit(user, difference):
+            logger.error(f"Profile not found for user {user.id}.")
             raise ValidationError({"error": "User profile does not exist."})
+        LedgerEntry.objects.record_change(user.pk, difference, LedgerEntry.INCOME, income.pk)
+        logger.debug(f"Updated balance for user {user.id} (Difference: {difference})")
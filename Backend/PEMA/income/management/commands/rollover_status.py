@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from income.models import BalanceRolloverRun
+from income.tasks import get_rollover_period
+
+
+class Command(BaseCommand):
+    help = "Shows the progress, throughput and ETA of the monthly balance rollover"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period',
+            help="Any date of the month to inspect (YYYY-MM-DD), defaults to the most recent run",
+        )
+
+    def handle(self, *args, **options):
+        runs = BalanceRolloverRun.objects.all()
+        if options['period']:
+            runs = runs.filter(period=get_rollover_period(options['period']))
+
+        run = runs.first()
+        if run is None:
+            raise CommandError("No balance rollover run found")
+
+        self.stdout.write(f"Period:     {run.period:%Y-%m}")
+        self.stdout.write(f"Status:     {run.status}")
+        self.stdout.write(f"Progress:   {run.processed_profiles}/{run.total_profiles} profiles ({run.progress:.1f}%)")
+        self.stdout.write(f"Credited:   {run.credited_profiles} profiles")
+        self.stdout.write(f"Last user:  {run.last_user_id} (highest processed)")
+        self.stdout.write(f"Throughput: {run.throughput:.1f} profiles/s")
+
+        eta = run.eta
+        if eta is None:
+            self.stdout.write("ETA:        unknown")
+        else:
+            self.stdout.write(f"ETA:        {eta:.0f}s")
+
+        if run.status == BalanceRolloverRun.COMPLETED:
+            self.stdout.write(self.style.SUCCESS(f"Finished at {run.finished_at:%Y-%m-%d %H:%M:%S}"))
+        elif run.status == BalanceRolloverRun.FAILED:
+            self.stdout.write(self.style.ERROR("The run failed, the next task execution resumes it"))
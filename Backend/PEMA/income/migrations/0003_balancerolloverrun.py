@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-17 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('income', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceRolloverRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(help_text='First day of the month being credited', unique=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=10)),
+                ('total_profiles', models.PositiveIntegerField(default=0, help_text='Number of profiles when the run started')),
+                ('processed_profiles', models.PositiveIntegerField(default=0)),
+                ('credited_profiles', models.PositiveIntegerField(default=0)),
+                ('last_user_id', models.BigIntegerField(default=0, help_text='Highest user id processed so far')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-period'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-17 19:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('income', '0003_balancerolloverrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='balancerolloverrun',
+            name='shard_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of shards the user ids were split into'),
+        ),
+        migrations.AddField(
+            model_name='balancerolloverrun',
+            name='shard_stats',
+            field=models.JSONField(blank=True, default=list, help_text='Totals and timings reported by each shard'),
+        ),
+    ]
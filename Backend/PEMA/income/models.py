@@ -37,3 +37,61 @@ class Income(models.Model):
 
         # Clarifies plural form in the admin panel
         verbose_name_plural = "Incomes"
+
+
+class BalanceRolloverRun(models.Model):
+    """
+    Model tracking the monthly balance rollover of a given period.
+    The shards crediting the period advance its counters as they go, while the per-profile
+    `last_rollover` marker prevents crediting a user twice when a crashed run is resumed.
+    """
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    period = models.DateField(unique=True, help_text="First day of the month being credited")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RUNNING)
+    total_profiles = models.PositiveIntegerField(default=0, help_text="Number of profiles when the run started")
+    processed_profiles = models.PositiveIntegerField(default=0)
+    credited_profiles = models.PositiveIntegerField(default=0)
+    last_user_id = models.BigIntegerField(default=0, help_text="Highest user id processed so far")
+    shard_count = models.PositiveIntegerField(default=0, help_text="Number of shards the user ids were split into")
+    shard_stats = models.JSONField(default=list, blank=True, help_text="Totals and timings reported by each shard")
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        """String representation of the run, displaying period and status."""
+        return f'Balance rollover {self.period:%Y-%m} ({self.status})'
+
+    @property
+    def progress(self):
+        """Percentage of the profiles processed so far."""
+        if not self.total_profiles:
+            return 100.0
+        return min(100.0, 100.0 * self.processed_profiles / self.total_profiles)
+
+    @property
+    def throughput(self):
+        """Profiles processed per second since the run started."""
+        elapsed = ((self.finished_at or self.updated_at) - self.started_at).total_seconds()
+        return self.processed_profiles / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Estimated seconds until the run completes, or None when it cannot be estimated."""
+        if self.status == self.COMPLETED:
+            return 0.0
+        if not self.throughput:
+            return None
+        return max(0, self.total_profiles - self.processed_profiles) / self.throughput
+
+    class Meta:
+        # Orders runs by period, with the most recent first
+        ordering = ['-period']
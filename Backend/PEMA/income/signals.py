@@ -1,14 +1,5 @@
-from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.dispatch import Signal
 
-from .models import Income
-
-User = get_user_model()
-
-
-@receiver(post_save, sender=User)
-def create_user_income(sender, instance, created, **kwargs):
-    """Automatically create an Income entry for every new user."""
-    if created:
-        Income.objects.create(user=instance, amount=0.00, description="Default income")
+# Sent with the `period` once the monthly rollover credited the balances with queryset updates,
+# which send no post_save
+balances_rolled_over = Signal()
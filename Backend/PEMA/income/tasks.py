@@ -1,19 +1,222 @@
-from celery import shared_task
-from django.contrib.auth import get_user_model
+from datetime import date, timedelta
+from decimal import Decimal
+from logging import getLogger
+from math import ceil
+from time import monotonic
 
-User = get_user_model()
+from celery import chord, group, shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Max, Min, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
 
+from users.models import LedgerEntry, Profile
+from .models import BalanceRolloverRun, Income
+from .signals import balances_rolled_over
 
-@shared_task
-def update_user_balances():
+logger = getLogger(__name__)
+
+
+def get_rollover_period(period=None):
+    """Return the first day of the month to credit, defaulting to the current month."""
+    if period is None:
+        return timezone.localdate().replace(day=1)
+    if isinstance(period, str):
+        period = date.fromisoformat(period)
+    return period.replace(day=1)
+
+
+def credit_monthly_income(period, after_user_id=0, up_to_user_id=None):
+    """
+    Credit the monthly income to every profile with after_user_id < user_id <= up_to_user_id
+    that has not been credited for the period yet, in a single UPDATE statement, and record
+    the credits in their ledgers. Marking the period in the same statement makes a retried
+    chunk a no-op. Returns the number of credited profiles.
+    """
+    income = Income.objects.filter(user_id=OuterRef('user_id')).values('amount')[:1]
+    profiles = Profile.objects.filter(user_id__gt=after_user_id).filter(
+        Q(last_rollover__isnull=True) | Q(last_rollover__lt=period)
+    )
+    if up_to_user_id is not None:
+        profiles = profiles.filter(user_id__lte=up_to_user_id)
+
+    with transaction.atomic():
+        credited = profiles.update(
+            balance=F('balance') + Coalesce(
+                Subquery(income), Value(Decimal('0.00')), output_field=DecimalField(max_digits=10, decimal_places=2)
+            ),
+            last_rollover=period,
+        )
+        if credited:
+            record_monthly_income(period, after_user_id, up_to_user_id)
+    return credited
+
+
+def record_monthly_income(period, after_user_id=0, up_to_user_id=None):
+    """
+    Append the ledger credits of the monthly income of the profiles credited for the period with
+    after_user_id < user_id <= up_to_user_id, skipping the users whose credit is already recorded.
+    Runs in the transaction of the UPDATE crediting them, which still holds their profiles.
+    """
+    source_id = period.year * 100 + period.month
+    credited = Profile.objects.filter(user_id__gt=after_user_id, last_rollover=period, user__income__amount__gt=0)
+    if up_to_user_id is not None:
+        credited = credited.filter(user_id__lte=up_to_user_id)
+    recorded = LedgerEntry.objects.filter(source_type=LedgerEntry.MONTHLY_INCOME, source_id=source_id)
+
+    LedgerEntry.objects.bulk_create([
+        LedgerEntry(user_id=user_id, kind=LedgerEntry.CREDIT, amount=amount,
+                    source_type=LedgerEntry.MONTHLY_INCOME, source_id=source_id)
+        for user_id, amount in credited.exclude(user_id__in=recorded.values('user_id'))
+        .values_list('user_id', 'user__income__amount')
+    ])
+
+
+def split_user_id_space(first_user_id, last_user_id, shard_size, concurrency):
+    """
+    Split the user ids first_user_id..last_user_id into contiguous (after_user_id, up_to_user_id] shards,
+    each covering at least shard_size ids and at most concurrency shards in total.
+    """
+    span = last_user_id - first_user_id + 1
+    shard_count = max(1, min(concurrency, ceil(span / shard_size)))
+    shard_span = ceil(span / shard_count)
+
+    shards = []
+    after_user_id = first_user_id - 1
+    while after_user_id < last_user_id:
+        up_to_user_id = min(after_user_id + shard_span, last_user_id)
+        shards.append((after_user_id, up_to_user_id))
+        after_user_id = up_to_user_id
+    return shards
+
+
+@shared_task(bind=True)
+def update_user_balances(self, period=None):
     """
     Task to update the balance of each user's profile by adding their monthly income.
     This task is intended to be run at the start of each month.
+    It coordinates the rollover: the user id space is split into shards credited in parallel
+    by update_user_balances_shard subtasks, and finalize_balance_rollover records the totals
+    once every shard is done. Each profile is credited at most once per month, so a retried
+    run only credits the users a crashed shard did not reach. A run still making progress is
+    left alone, its row is locked while deciding so that two coordinators never both dispatch.
     """
-    users = User.objects.all()
-    for user in users:
-        # Add the monthly income to the user's current balance
-        user.profile.balance += user.income.amount
+    period = get_rollover_period(period)
+    stale_before = timezone.now() - timedelta(seconds=settings.BALANCE_ROLLOVER_STALE_AFTER)
 
-        # Save the updated balance back to the database
-        user.profile.save()
+    with transaction.atomic():
+        run, created = BalanceRolloverRun.objects.select_for_update().get_or_create(
+            period=period, defaults={'total_profiles': Profile.objects.count()}
+        )
+        if run.status == BalanceRolloverRun.COMPLETED:
+            logger.info(f"Balance rollover {period:%Y-%m} already completed, skipping")
+            return {'period': period.isoformat(), 'processed': run.processed_profiles,
+                    'credited': run.credited_profiles, 'skipped': True}
+        if not created and run.status == BalanceRolloverRun.RUNNING and run.updated_at >= stale_before:
+            logger.info(f"Balance rollover {period:%Y-%m} is still running, skipping")
+            return {'period': period.isoformat(), 'processed': run.processed_profiles,
+                    'credited': run.credited_profiles, 'skipped': True}
+        if not created:
+            # The progress of the crashed run is recounted from the markers of the profiles it credited
+            logger.info(f"Resuming balance rollover {period:%Y-%m}")
+            reached = Profile.objects.filter(last_rollover=period).aggregate(count=Count('pk'), last=Max('user_id'))
+            BalanceRolloverRun.objects.filter(pk=run.pk).update(
+                status=BalanceRolloverRun.RUNNING, total_profiles=Profile.objects.count(),
+                processed_profiles=reached['count'], credited_profiles=reached['count'],
+                last_user_id=reached['last'] or 0, updated_at=timezone.now(),
+            )
+
+        bounds = Profile.objects.aggregate(first=Min('user_id'), last=Max('user_id'))
+        shards = []
+        if bounds['first'] is not None:
+            shards = split_user_id_space(
+                bounds['first'], bounds['last'],
+                settings.BALANCE_ROLLOVER_SHARD_SIZE, settings.BALANCE_ROLLOVER_CONCURRENCY,
+            )
+        BalanceRolloverRun.objects.filter(pk=run.pk).update(shard_count=len(shards), updated_at=timezone.now())
+    logger.info(f"Balance rollover {period:%Y-%m}: dispatching {len(shards)} shards")
+
+    header = group(
+        update_user_balances_shard.s(run.pk, period.isoformat(), after_user_id, up_to_user_id)
+        for after_user_id, up_to_user_id in shards
+    )
+    callback = finalize_balance_rollover.s(run.pk)
+    callback.on_error(mark_balance_rollover_failed.si(run.pk))
+    if shards:
+        chord(header)(callback)
+    else:
+        callback.delay([])
+
+    return {'period': period.isoformat(), 'shards': len(shards)}
+
+
+@shared_task
+def update_user_balances_shard(run_id, period, after_user_id, up_to_user_id):
+    """
+    Credit the monthly income of the profiles with after_user_id < user_id <= up_to_user_id.
+    Profiles are processed in keyset-paginated chunks, one UPDATE per chunk, and the run's
+    counters are advanced in the same transaction as each chunk. Chunks are credited in user id
+    order, so a resumed shard starts after the last profile it already marked for the period.
+    """
+    period = get_rollover_period(period)
+    chunk_size = settings.BALANCE_ROLLOVER_CHUNK_SIZE
+    started = monotonic()
+
+    processed = 0
+    credited = 0
+    last_user_id = Profile.objects.filter(
+        user_id__gt=after_user_id, user_id__lte=up_to_user_id, last_rollover=period
+    ).aggregate(last=Max('user_id'))['last'] or after_user_id
+    while last_user_id < up_to_user_id:
+        user_ids = list(
+            Profile.objects.filter(user_id__gt=last_user_id, user_id__lte=up_to_user_id)
+            .order_by('user_id')
+            .values_list('user_id', flat=True)[:chunk_size]
+        )
+        if not user_ids:
+            break
+
+        with transaction.atomic():
+            chunk_credited = credit_monthly_income(period, last_user_id, user_ids[-1])
+            BalanceRolloverRun.objects.filter(pk=run_id).update(
+                processed_profiles=F('processed_profiles') + len(user_ids),
+                credited_profiles=F('credited_profiles') + chunk_credited,
+                last_user_id=Greatest('last_user_id', Value(user_ids[-1])),
+                updated_at=timezone.now(),
+            )
+
+        processed += len(user_ids)
+        credited += chunk_credited
+        last_user_id = user_ids[-1]
+
+    seconds = monotonic() - started
+    logger.info(f"Balance rollover {period:%Y-%m} shard ({after_user_id}, {up_to_user_id}]: "
+                f"{credited} of {processed} profiles credited in {seconds:.2f}s")
+    return {'after_user_id': after_user_id, 'up_to_user_id': up_to_user_id,
+            'processed': processed, 'credited': credited, 'seconds': round(seconds, 3)}
+
+
+@shared_task
+def finalize_balance_rollover(shard_results, run_id):
+    """Chord callback recording the totals and timings of the shards on the rollover run."""
+    run = BalanceRolloverRun.objects.get(pk=run_id)
+    run.status = BalanceRolloverRun.COMPLETED
+    run.finished_at = timezone.now()
+    run.shard_stats = shard_results
+    run.save(update_fields=['status', 'finished_at', 'shard_stats', 'updated_at'])
+    balances_rolled_over.send(sender=BalanceRolloverRun, period=run.period)
+
+    processed = sum(result['processed'] for result in shard_results)
+    credited = sum(result['credited'] for result in shard_results)
+    logger.info(f"Balance rollover {run.period:%Y-%m} finished: {credited} of {processed} profiles credited "
+                f"by {len(shard_results)} shards in {(run.finished_at - run.started_at).total_seconds():.2f}s")
+    return {'period': run.period.isoformat(), 'processed': processed, 'credited': credited,
+            'shards': len(shard_results)}
+
+
+@shared_task
+def mark_balance_rollover_failed(run_id):
+    """Error callback of the rollover chord, the next run of the coordinator resumes the period."""
+    logger.error(f"Balance rollover run {run_id} failed")
+    BalanceRolloverRun.objects.filter(pk=run_id).update(status=BalanceRolloverRun.FAILED, updated_at=timezone.now())
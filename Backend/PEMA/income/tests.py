@@ -1,16 +1,23 @@
 # income/tests.py
 
+from datetime import date, timedelta
+from io import StringIO
 from decimal import Decimal
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.urls import reverse
+from django.db.models import F
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from users.models import Profile
-from .models import Income
+from PEMA.celery_app import app as celery_app
+from users.models import LedgerEntry, Profile
+from .models import BalanceRolloverRun, Income
+from .tasks import split_user_id_space, update_user_balances
 
 User = get_user_model()
 
@@ -64,6 +71,13 @@ def unauthenticated_client(db):
     return APIClient()
 
 
+@pytest.fixture
+def eager_celery(monkeypatch):
+    """Fixture running Celery tasks, groups and chords synchronously in the test process."""
+    monkeypatch.setattr(celery_app.conf, 'task_always_eager', True)
+    monkeypatch.setattr(celery_app.conf, 'task_eager_propagates', True)
+
+
 @pytest.fixture
 def update_income_url():
     """Fixture for the update income URL."""
@@ -359,3 +373,109 @@ def test_update_income_read_only_fields_immutable(auth_client, update_income_url
     assert response.data.get('date') != "2023-01-01"
     assert response.data.get('last_updated') != "2023-01-01T00:00:00Z"
     assert response.data.get('summary') != "Attempting to change read-only fields"
+
+
+@pytest.mark.django_db
+def test_update_user_balances_credits_income_once_per_month(settings, eager_celery, income, profile):
+    """Test that the monthly rollover credits every profile once, even when retried."""
+    settings.BALANCE_ROLLOVER_CHUNK_SIZE = 2
+    others = [User.objects.create_user(email=f'user{i}@example.com', password='testpass123', username=f'user{i}')
+              for i in range(4)]
+    Income.objects.filter(user__in=others).update(amount=Decimal('100.00'))
+
+    update_user_balances('2024-05-01')
+    assert BalanceRolloverRun.objects.get(period=date(2024, 5, 1)).credited_profiles == 5
+
+    # A retried or duplicated run for the same month is a no-op
+    assert update_user_balances('2024-05-17')['skipped'] is True
+
+    profile.refresh_from_db()
+    assert profile.balance == Decimal('1000.00')
+    assert profile.last_rollover == date(2024, 5, 1)
+    assert all(p.balance == Decimal('100.00') for p in Profile.objects.filter(user__in=others))
+    # Each credit is recorded once in the ledger of its user
+    credits = LedgerEntry.objects.filter(source_type=LedgerEntry.MONTHLY_INCOME, source_id=202405)
+    assert sorted(credits.values_list('amount', flat=True)) == [Decimal('100.00')] * 4 + [Decimal('500.00')]
+
+    # The next month is credited again
+    update_user_balances('2024-06-01')
+    profile.refresh_from_db()
+    assert profile.balance == Decimal('1500.00')
+
+
+@pytest.mark.django_db
+def test_update_user_balances_resumes_failed_run(settings, eager_celery, income, profile, user):
+    """Test that a crashed rollover resumes without double-crediting the users it already reached."""
+    settings.BALANCE_ROLLOVER_CHUNK_SIZE = 1
+    other = User.objects.create_user(email='other@example.com', password='testpass123', username='other')
+    Income.objects.filter(user=other).update(amount=Decimal('100.00'))
+
+    # Simulate a run that crashed after crediting the first user
+    Profile.objects.filter(user=user).update(balance=F('balance') + Decimal('500.00'),
+                                             last_rollover=date(2024, 5, 1))
+    BalanceRolloverRun.objects.create(period=date(2024, 5, 1), status=BalanceRolloverRun.FAILED,
+                                      total_profiles=2, processed_profiles=1, credited_profiles=1,
+                                      last_user_id=user.pk)
+
+    update_user_balances('2024-05-01')
+
+    run = BalanceRolloverRun.objects.get(period=date(2024, 5, 1))
+    assert run.status == BalanceRolloverRun.COMPLETED
+    assert run.credited_profiles == 2
+    assert run.processed_profiles == 2
+    profile.refresh_from_db()
+    assert profile.balance == Decimal('1000.00')
+    assert Profile.objects.get(user=other).balance == Decimal('100.00')
+
+    out = StringIO()
+    call_command('rollover_status', period='2024-05-01', stdout=out)
+    assert 'completed' in out.getvalue()
+    assert '2/2 profiles (100.0%)' in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_update_user_balances_leaves_running_run_alone(settings, eager_celery, income, profile, user):
+    """Test that a run still making progress is not dispatched twice, while a stale one is resumed."""
+    run = BalanceRolloverRun.objects.create(period=date(2024, 5, 1), total_profiles=1)
+    balance = profile.balance
+
+    assert update_user_balances('2024-05-01')['skipped'] is True
+    profile.refresh_from_db()
+    assert profile.balance == balance
+
+    BalanceRolloverRun.objects.filter(pk=run.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+    update_user_balances('2024-05-01')
+
+    run.refresh_from_db()
+    assert run.status == BalanceRolloverRun.COMPLETED
+    assert run.processed_profiles == run.credited_profiles == 1
+    profile.refresh_from_db()
+    assert profile.balance == balance + income.amount
+
+
+def test_split_user_id_space():
+    """Test that the user id space is split into contiguous shards bounded by size and concurrency."""
+    assert split_user_id_space(1, 100, shard_size=30, concurrency=8) == [(0, 25), (25, 50), (50, 75), (75, 100)]
+    assert split_user_id_space(1, 100, shard_size=10, concurrency=3) == [(0, 34), (34, 68), (68, 100)]
+    assert split_user_id_space(5, 5, shard_size=10, concurrency=3) == [(4, 5)]
+
+
+@pytest.mark.django_db
+def test_update_user_balances_fans_out_shards(settings, eager_celery):
+    """Test that the coordinator credits every user through parallel shards and records their totals."""
+    settings.BALANCE_ROLLOVER_SHARD_SIZE = 10
+    settings.BALANCE_ROLLOVER_CONCURRENCY = 4
+    settings.BALANCE_ROLLOVER_CHUNK_SIZE = 3
+    users = [User.objects.create_user(email=f'user{i}@example.com', password='testpass123', username=f'user{i}')
+             for i in range(40)]
+    Income.objects.filter(user__in=users).update(amount=Decimal('10.00'))
+
+    result = update_user_balances('2024-05-01')
+
+    run = BalanceRolloverRun.objects.get(period=date(2024, 5, 1))
+    assert result['shards'] == run.shard_count == 4
+    assert run.status == BalanceRolloverRun.COMPLETED
+    assert run.processed_profiles == run.credited_profiles == 40
+    assert sum(stats['credited'] for stats in run.shard_stats) == 40
+    assert all('seconds' in stats for stats in run.shard_stats)
+    assert set(Profile.objects.values_list('balance', flat=True)) == {Decimal('10.00')}
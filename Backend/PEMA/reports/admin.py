@@ -1,3 +1,23 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ExportJob
+
+
+# Registering the ExportJob model in the admin as a read-only view
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    # Fields to display in the list view for quick overview
+    list_display = ('id', 'user', 'format', 'status', 'exported_rows', 'total_rows', 'created_at', 'finished_at')
+
+    # Filter options to narrow down results quickly
+    list_filter = ('status', 'format')
+
+    # Avoid a query per row for the user column
+    list_select_related = ('user',)
+
+    # Jobs are written by the export task only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,204 @@
+"""
+Vectorized spending analytics.
+
+A user's expense history is read with a single query into columnar NumPy arrays of ids, dates, amounts and
+category ids, without building any Expense instance. Every insight is then computed with array operations over
+the whole history: daily totals with bincount, moving averages from cumulative sums, per-category percentiles and
+robust anomaly scores from one sort by category and amount, and seasonality from the daily totals.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+
+from expenses.models import Category, Expense
+
+# Number of most recent days whose totals and moving averages are reported
+SERIES_DAYS = 30
+# Percentiles of the expense amounts reported per category
+PERCENTILES = (25, 50, 75, 90)
+# Modified z-score from which an expense is reported as an anomaly (Iglewicz and Hoaglin)
+ANOMALY_THRESHOLD = 3.5
+MAX_ANOMALIES = 10
+# Category id standing for uncategorized expenses in the arrays
+UNCATEGORIZED = -1
+# Ordinal of the first day of datetime64, 1970-01-01
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class ExpenseArrays:
+    """Columnar expenses: parallel arrays of ids, dates (datetime64[D]), amounts and category ids."""
+
+    def __init__(self, ids, dates, amounts, category_ids):
+        self.ids = ids
+        self.dates = dates
+        self.amounts = amounts
+        self.category_ids = category_ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Builds the arrays from (id, date, amount in cents, category_id) tuples. Dates go through their ordinal,
+        which is much faster than letting NumPy convert date objects.
+        """
+        rows = list(rows)
+        if not rows:
+            return cls(np.empty(0, np.int64), np.empty(0, 'datetime64[D]'), np.empty(0, np.float64),
+                       np.empty(0, np.int64))
+        ids, dates, cents, category_ids = zip(*rows)
+        ordinals = np.fromiter((day.toordinal() for day in dates), dtype=np.int64, count=len(rows))
+        return cls(
+            np.fromiter(ids, dtype=np.int64, count=len(rows)),
+            (ordinals - EPOCH_ORDINAL).astype('datetime64[D]'),
+            np.fromiter(cents, dtype=np.int64, count=len(rows)) / 100,
+            np.fromiter((UNCATEGORIZED if category_id is None else category_id for category_id in category_ids),
+                        dtype=np.int64, count=len(rows)),
+        )
+
+
+def load_expenses(user, start, end):
+    """
+    Reads the user's expenses dated from start to end, both included, into ExpenseArrays with a single query.
+    The amounts are read as integer cents, sparing the conversion of every amount to a Decimal.
+    """
+    rows = (
+        Expense.objects.filter(user=user, date__gte=start, date__lte=end)
+        .annotate(cents=Cast(Round(F('amount') * 100), BigIntegerField()))
+        .order_by()
+        .values_list('id', 'date', 'cents', 'category_id')
+    )
+    return ExpenseArrays.from_rows(rows.iterator(chunk_size=10000))
+
+
+def grouped_quantiles(values, groups, group_count, quantiles):
+    """
+    Returns the quantiles (between 0 and 1) of the values of every group, as a (group_count, len(quantiles))
+    array, interpolating linearly like numpy.percentile. Every group from 0 to group_count - 1 must have values.
+    The values are sorted by group and value once, and each quantile is read at its position within its group.
+    """
+    sorted_values = values[np.lexsort((values, groups))]
+    counts = np.bincount(groups, minlength=group_count)
+    starts = np.cumsum(counts) - counts
+    positions = starts[:, None] + np.asarray(quantiles)[None, :] * (counts[:, None] - 1)
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (positions - lower)
+
+
+def trailing_averages(series, window):
+    """Returns the average of every element of the series with the window - 1 elements before it, fewer at its start."""
+    cumulative = np.concatenate(([0.0], np.cumsum(series)))
+    ends = np.arange(1, len(series) + 1)
+    starts = np.maximum(ends - window, 0)
+    return (cumulative[ends] - cumulative[starts]) / (ends - starts)
+
+
+def seasonal_indexes(daily, keys, size):
+    """
+    Returns the average daily total of every key (weekday or month) relative to the average of all days,
+    None for keys without any day or when nothing was spent.
+    """
+    sums = np.bincount(keys, weights=daily, minlength=size)
+    days = np.bincount(keys, minlength=size)
+    overall = daily.mean() if len(daily) else 0.0
+    if not overall:
+        return [None] * size
+    indexes = np.divide(sums, days * overall, out=np.full(size, np.nan), where=days > 0)
+    return [None if np.isnan(index) else round(float(index), 4) for index in indexes]
+
+
+def compute_insights(expenses, start, end, category_names=None):
+    """
+    Computes the spending insights of the ExpenseArrays dated from start to end, both included:
+    - The totals, count and average daily expenditure of the range
+    - The totals of the last SERIES_DAYS days with their 7 and 30 day moving averages
+    - The total, count, share and amount percentiles of every category, the largest total first
+    - The weekday and month seasonal indexes of the daily totals
+    - The expenses whose modified z-score within their category reaches ANOMALY_THRESHOLD, the largest first
+    """
+    category_names = category_names or {}
+    day_count = (end - start).days + 1
+    amounts = expenses.amounts
+    total = float(amounts.sum())
+
+    # Daily totals and their moving averages
+    day_indexes = (expenses.dates - np.datetime64(start, 'D')).astype(np.int64)
+    daily = np.bincount(day_indexes, weights=amounts, minlength=day_count)
+    average_7, average_30 = trailing_averages(daily, 7), trailing_averages(daily, 30)
+    series = [
+        {
+            "date": start + timedelta(days=int(index)),
+            "total": float(daily[index]),
+            "average_7": float(average_7[index]),
+            "average_30": float(average_30[index]),
+        }
+        for index in range(max(0, day_count - SERIES_DAYS), day_count)
+    ]
+
+    # Seasonality: Monday is 0 since 1970-01-01 was a Thursday, January is 0 since it was in January
+    days = np.datetime64(start, 'D') + np.arange(day_count)
+    weekdays = (days.astype(np.int64) + 3) % 7
+    months = days.astype('datetime64[M]').astype(np.int64) % 12
+
+    categories, anomalies = [], []
+    if len(expenses):
+        category_ids, groups = np.unique(expenses.category_ids, return_inverse=True)
+        totals = np.bincount(groups, weights=amounts)
+        counts = np.bincount(groups)
+        percentiles = grouped_quantiles(amounts, groups, len(category_ids), [p / 100 for p in PERCENTILES])
+        for group in np.lexsort((category_ids, -totals)):
+            category_id = None if category_ids[group] == UNCATEGORIZED else int(category_ids[group])
+            categories.append({
+                "category_id": category_id,
+                "category_name": category_names.get(category_id),
+                "total": float(totals[group]),
+                "count": int(counts[group]),
+                "share": round(float(totals[group] / total), 4) if total else 0.0,
+                **{f"p{p}": float(value) for p, value in zip(PERCENTILES, percentiles[group])},
+            })
+
+        # Modified z-scores from the median and the median absolute deviation of each category
+        medians = grouped_quantiles(amounts, groups, len(category_ids), [0.5])[:, 0]
+        deviations = amounts - medians[groups]
+        mads = grouped_quantiles(np.abs(deviations), groups, len(category_ids), [0.5])[:, 0][groups]
+        scores = np.divide(0.6745 * deviations, mads, out=np.zeros_like(amounts), where=mads > 0)
+        flagged = np.flatnonzero(np.abs(scores) >= ANOMALY_THRESHOLD)
+        for index in flagged[np.lexsort((expenses.ids[flagged], -np.abs(scores[flagged])))][:MAX_ANOMALIES]:
+            category_id = None if expenses.category_ids[index] == UNCATEGORIZED else int(expenses.category_ids[index])
+            anomalies.append({
+                "id": int(expenses.ids[index]),
+                "date": expenses.dates[index].astype(object),
+                "amount": float(amounts[index]),
+                "category_id": category_id,
+                "category_name": category_names.get(category_id),
+                "score": round(float(scores[index]), 4),
+            })
+
+    return {
+        "start": start,
+        "end": end,
+        "total_expenses": total,
+        "expense_count": len(expenses),
+        "average_daily_expense": total / day_count,
+        "moving_averages": series,
+        "categories": categories,
+        "seasonality": {
+            "weekday": seasonal_indexes(daily, weekdays, 7),
+            "month": seasonal_indexes(daily, months, 12),
+        },
+        "anomalies": anomalies,
+    }
+
+
+def spending_insights(user, start, end):
+    """Computes the spending insights of the user's expenses dated from start to end, both included."""
+    expenses = load_expenses(user, start, end)
+    category_ids = np.unique(expenses.category_ids[expenses.category_ids != UNCATEGORIZED]).tolist()
+    category_names = {}
+    if category_ids:
+        category_names = dict(Category.objects.filter(pk__in=category_ids).values_list('pk', 'name'))
+    return compute_insights(expenses, start, end, category_names)
@@ -0,0 +1,141 @@
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from PEMA.utils.response_wrapper import custom_response
+
+
+class ExpenseKeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination of expenses on (date, id), newest first.
+
+    The cursor encodes the (date, id) of the boundary row, so each page is fetched with a
+    `WHERE (date, id) < cursor ORDER BY date DESC, id DESC LIMIT n` query that costs the same
+    on the first and the thousandth page, and rows inserted while a client walks the pages
+    do not shift them. The page links are wrapped in the standard `custom_response` envelope.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        if cursor is None:
+            reverse = False
+        else:
+            cursor_date, cursor_id, reverse = cursor
+            if reverse:
+                queryset = queryset.filter(Q(date__gt=cursor_date) | Q(date=cursor_date, id__gt=cursor_id))
+            else:
+                queryset = queryset.filter(Q(date__lt=cursor_date) | Q(date=cursor_date, id__lt=cursor_id))
+
+        ordering = ('date', 'id') if reverse else ('-date', '-id')
+        # Fetch one extra row to find out whether another page follows in the walked direction
+        results = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        # Coming from a cursor means rows exist on the side we came from
+        self.has_next = True if reverse else has_more
+        self.has_previous = has_more if reverse else cursor is not None
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        """Returns the requested page size, capped at max_page_size, or the default one."""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(page_size, self.max_page_size) if page_size > 0 else self.page_size
+
+    def decode_cursor(self, request):
+        """Decodes the (date, id, reverse) position of the cursor query parameter, if any."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            reverse, cursor_date, cursor_id = b64decode(encoded.encode('ascii'), validate=True).decode('ascii').split('|')
+            return date.fromisoformat(cursor_date), int(cursor_id), reverse == '1'
+        except (BinasciiError, UnicodeError, ValueError):
+            raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+
+    def encode_cursor(self, expense, reverse):
+        """Builds the URL of the page starting after (or before, when reverse) the given expense."""
+        position = f"{int(reverse)}|{expense.date.isoformat()}|{expense.pk}"
+        encoded = b64encode(position.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_data(self, data):
+        """Returns the serialized page along with the links to the adjacent pages."""
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return custom_response(status="success", data=self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'status': {'type': 'string', 'example': 'success'},
+                'data': {
+                    'type': 'object',
+                    'required': ['results'],
+                    'properties': {
+                        'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                        'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                        'results': schema,
+                    },
+                },
+                'message': {'type': 'string', 'nullable': True},
+                'errors': {'type': 'object', 'nullable': True},
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': "Opaque cursor taken from the `next` or `previous` link of a previous page.",
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': f"Number of expenses per page, at most {self.max_page_size}.",
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -1,23 +1,257 @@
+from django.urls import reverse
 from rest_framework import serializers
 
+from ..models import ExportJob
 
-class MonthlyStatisticsSerializer(serializers.Serializer):
+
+class DailyExpenseSerializer(serializers.Serializer):
     """
-    Serializer for monthly financial statistics, including total expenses, remaining balance, and average daily expenses.
+    Serializer for the expenses of a single day of the month.
+    """
+
+    date = serializers.DateField(help_text="Day of the month.")
+    total = serializers.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        help_text="Total spent on that day.",
+    )
+    count = serializers.IntegerField(help_text="Number of expenses on that day.")
+
+
+class ExpenseTotalsSerializer(serializers.Serializer):
+    """
+    Serializer for the totals of the expenses over a period: their sum, count and average daily expenditure.
     """
 
     total_expenses = serializers.DecimalField(
-        max_digits=10,
+        max_digits=14,
+        decimal_places=2,
+        help_text="Total expenses for the period.",
+    )
+    expense_count = serializers.IntegerField(
+        help_text="Number of expenses for the period.",
+    )
+    average_daily_expense = serializers.DecimalField(
+        max_digits=14,
         decimal_places=2,
-        help_text="Total expenses for the current month.",
+        help_text="Average daily expenditure over the elapsed days of the period.",
     )
+
+
+class MonthlyStatisticsSerializer(ExpenseTotalsSerializer):
+    """
+    Serializer for monthly financial statistics, including total expenses, remaining balance, average daily expenses,
+    their projection to the end of the month and, when requested, the daily series of the expenses.
+    """
+
     remaining_balance = serializers.DecimalField(
         max_digits=10,
         decimal_places=2,
-        help_text="Remaining balance after subtracting total expenses from income for the current month.",
+        help_text="Remaining balance after subtracting total expenses from income for the month.",
     )
-    average_daily_expense = serializers.DecimalField(
+    projected_total_expenses = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        help_text="Total expenses at the end of the month if the average daily expenditure holds.",
+    )
+    projected_remaining_balance = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        help_text="Remaining balance at the end of the month if the average daily expenditure holds.",
+    )
+    burn_rate = serializers.DecimalField(
         max_digits=10,
+        decimal_places=4,
+        allow_null=True,
+        help_text="Share of the income the projected expenses amount to, null without income.",
+    )
+    daily = DailyExpenseSerializer(
+        many=True,
+        required=False,
+        help_text="Expenses of every day of the month, only with `series=daily`.",
+    )
+
+
+class TrendPointSerializer(ExpenseTotalsSerializer):
+    """
+    Serializer for a point of a trend report: the totals of a month, a week or a category.
+    Months and weeks carry their period, categories their ID and name.
+    """
+
+    period = serializers.CharField(
+        required=False,
+        help_text="Month (YYYY-MM) or week (date of its Monday) of the point.",
+    )
+    start = serializers.DateField(
+        required=False,
+        help_text="First day of the point's period within the report range.",
+    )
+    end = serializers.DateField(
+        required=False,
+        help_text="Last day of the point's period within the report range.",
+    )
+    category_id = serializers.IntegerField(
+        allow_null=True,
+        required=False,
+        help_text="ID of the category, null for uncategorized expenses.",
+    )
+    category_name = serializers.CharField(
+        allow_null=True,
+        required=False,
+        help_text="Name of the category, null for uncategorized expenses.",
+    )
+
+
+class TrendReportSerializer(ExpenseTotalsSerializer):
+    """
+    Serializer for a trend report: the totals of the whole range and its points in order,
+    every month or week of the range, or every category with expenses in it.
+    """
+
+    start = serializers.DateField(help_text="First day of the first month of the range.")
+    end = serializers.DateField(help_text="Last day of the last month of the range.")
+    group = serializers.CharField(help_text="Grouping of the points: month, week or category.")
+    points = TrendPointSerializer(many=True, help_text="Totals of every month, week or category.")
+
+
+class DailyMovingAverageSerializer(serializers.Serializer):
+    """
+    Serializer for the total of a day with the moving averages of the daily totals ending on it.
+    """
+
+    date = serializers.DateField(help_text="Day of the range.")
+    total = serializers.DecimalField(max_digits=14, decimal_places=2, help_text="Total spent on that day.")
+    average_7 = serializers.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        help_text="Average daily total of the 7 days ending on that day.",
+    )
+    average_30 = serializers.DecimalField(
+        max_digits=14,
         decimal_places=2,
-        help_text="Average daily expenditure for the current month.",
+        help_text="Average daily total of the 30 days ending on that day.",
     )
+
+
+class CategoryInsightSerializer(serializers.Serializer):
+    """
+    Serializer for the spending of a category over the range, with the percentiles of its expense amounts.
+    """
+
+    category_id = serializers.IntegerField(allow_null=True, help_text="ID of the category, null for uncategorized.")
+    category_name = serializers.CharField(allow_null=True, help_text="Name of the category, null for uncategorized.")
+    total = serializers.DecimalField(max_digits=14, decimal_places=2, help_text="Total spent in the category.")
+    count = serializers.IntegerField(help_text="Number of expenses in the category.")
+    share = serializers.FloatField(help_text="Share of the total expenses spent in the category.")
+    p25 = serializers.DecimalField(max_digits=14, decimal_places=2, help_text="25th percentile of the amounts.")
+    p50 = serializers.DecimalField(max_digits=14, decimal_places=2, help_text="Median amount.")
+    p75 = serializers.DecimalField(max_digits=14, decimal_places=2, help_text="75th percentile of the amounts.")
+    p90 = serializers.DecimalField(max_digits=14, decimal_places=2, help_text="90th percentile of the amounts.")
+
+
+class SeasonalitySerializer(serializers.Serializer):
+    """
+    Serializer for the seasonal indexes of the spending: the average daily total of each weekday and month
+    relative to the average of all days, null when the range has no such day.
+    """
+
+    weekday = serializers.ListField(
+        child=serializers.FloatField(allow_null=True),
+        help_text="Indexes of Monday to Sunday.",
+    )
+    month = serializers.ListField(
+        child=serializers.FloatField(allow_null=True),
+        help_text="Indexes of January to December.",
+    )
+
+
+class AnomalySerializer(serializers.Serializer):
+    """
+    Serializer for an expense whose amount is unusual for its category.
+    """
+
+    id = serializers.IntegerField(help_text="ID of the expense.")
+    date = serializers.DateField(help_text="Date of the expense.")
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2, help_text="Amount of the expense.")
+    category_id = serializers.IntegerField(allow_null=True, help_text="ID of the category, null for uncategorized.")
+    category_name = serializers.CharField(allow_null=True, help_text="Name of the category, null for uncategorized.")
+    score = serializers.FloatField(
+        help_text="Modified z-score of the amount within its category, from its median and median absolute deviation."
+    )
+
+
+class SpendingInsightsSerializer(ExpenseTotalsSerializer):
+    """
+    Serializer for the spending insights over a range: its totals, the recent daily totals with their moving
+    averages, the spending of every category, the seasonality of the spending and the anomalous expenses.
+    """
+
+    start = serializers.DateField(help_text="First day of the range.")
+    end = serializers.DateField(help_text="Last day of the range, today at the latest.")
+    moving_averages = DailyMovingAverageSerializer(many=True, help_text="Last 30 days of the range.")
+    categories = CategoryInsightSerializer(many=True, help_text="Categories, the largest total first.")
+    seasonality = SeasonalitySerializer()
+    anomalies = AnomalySerializer(many=True, help_text="Most anomalous expenses, the largest score first.")
+
+
+class CategorySummarySerializer(serializers.Serializer):
+    """
+    Serializer for the per-category summary of the current month's expenses.
+    """
+
+    category_id = serializers.IntegerField(
+        allow_null=True,
+        help_text="ID of the category, null for uncategorized expenses.",
+    )
+    total = serializers.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        help_text="Total spent in the category for the current month.",
+    )
+    count = serializers.IntegerField(
+        help_text="Number of expenses in the category for the current month.",
+    )
+    minimum = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        help_text="Smallest expense in the category for the current month.",
+    )
+    maximum = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        help_text="Largest expense in the category for the current month.",
+    )
+    average = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        help_text="Average expense in the category for the current month.",
+    )
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for asynchronous expense export jobs: the requested format and date range,
+    the progress of the export and, once completed, the URL to download it from.
+    """
+    progress = serializers.FloatField(read_only=True, help_text="Percentage of the expenses exported so far.")
+    download_url = serializers.SerializerMethodField(help_text="URL of the export file, once completed.")
+
+    class Meta:
+        model = ExportJob
+        fields = ['id', 'format', 'start_date', 'end_date', 'status', 'progress', 'total_rows', 'exported_rows',
+                  'download_url', 'error', 'created_at', 'finished_at']
+        read_only_fields = ['id', 'status', 'progress', 'total_rows', 'exported_rows', 'download_url', 'error',
+                            'created_at', 'finished_at']
+
+    def get_download_url(self, job) -> str | None:
+        if job.status != ExportJob.COMPLETED:
+            return None
+        url = reverse('api:reports:export-job-download', kwargs={'pk': job.pk})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def validate(self, attrs):
+        start_date, end_date = attrs.get('start_date'), attrs.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError({"end_date": "The end date must not be before the start date."})
+        return attrs
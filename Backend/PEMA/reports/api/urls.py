@@ -1,6 +1,16 @@
 from django.urls import path
 
-from .views import ExpenseReportView, ExpenseCategoryReportView, MonthlyStatisticsView
+from .views import (
+    ExpenseReportView,
+    ExpenseCategoryReportView,
+    ExpenseExportView,
+    ExportJobCreateView,
+    ExportJobDetailView,
+    ExportJobDownloadView,
+    MonthlyStatisticsView,
+    SpendingInsightsView,
+    TrendReportView,
+)
 
 # Application namespace to avoid conflicts
 app_name = 'reports'
@@ -14,6 +24,20 @@ urlpatterns = [
     path('expenses/monthly/by-category/', ExpenseCategoryReportView.as_view(),
          name='expense-monthly-by-category-report'),
 
+    # Endpoint for streaming the expense history as CSV or NDJSON
+    path('expenses/export/', ExpenseExportView.as_view(), name='expense-export'),
+
+    # Endpoints for queuing an asynchronous export, polling it and downloading its file
+    path('exports/', ExportJobCreateView.as_view(), name='export-job-create'),
+    path('exports/<uuid:pk>/', ExportJobDetailView.as_view(), name='export-job-detail'),
+    path('exports/<uuid:pk>/download/', ExportJobDownloadView.as_view(), name='export-job-download'),
+
     # Endpoint for retrieving the monthly statistics of the authenticated user
     path('monthly-statistics/', MonthlyStatisticsView.as_view(), name='monthly-statistics'),
+
+    # Endpoint for retrieving the expense totals per month, week or category over a range of months
+    path('trends/', TrendReportView.as_view(), name='trends'),
+
+    # Endpoint for retrieving the moving averages, percentiles, seasonality and anomalies of the spending
+    path('insights/', SpendingInsightsView.as_view(), name='insights'),
 ]
@@ -1,62 +1,166 @@
-from datetime import date
+from datetime import date, timedelta
 from decimal import Decimal
 from logging import getLogger
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Sum
+from django.db import transaction
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
 from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from rest_framework.exceptions import ValidationError
-from rest_framework.generics import ListAPIView, get_object_or_404
+from rest_framework import status
+from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveAPIView
+from rest_framework.negotiation import DefaultContentNegotiation
 from rest_framework.views import APIView
 
-from PEMA.utils.response_wrapper import custom_response
+from PEMA.utils.response_wrapper import ConditionalGetMixin, custom_response
 from expenses.api.serializers import ExpenseSerializer
-from expenses.models import Expense
-from reports.api.serializers import MonthlyStatisticsSerializer
+from expenses.models import Expense, MonthlyRollup
+from expenses.utils import Period
+from reports.analytics import spending_insights
+from reports.api.pagination import ExpenseKeysetPagination
+from reports.api.serializers import (
+    CategorySummarySerializer,
+    ExportJobSerializer,
+    MonthlyStatisticsSerializer,
+    SpendingInsightsSerializer,
+    TrendReportSerializer,
+)
+from reports.cache import cached_report, get_data_version
+from reports.export import EXPORT_FORMATS, export_rows, stream_export
+from reports.models import ExportJob
+from reports.tasks import run_export_job
 from users.models import Profile
 
 # Configure logging for detailed error tracking
 logger = getLogger(__name__)
 
+PERIOD_PARAMETERS = [
+    OpenApiParameter(
+        name="year",
+        description="Year of the month to report on, requires `month`. Defaults to the current month.",
+        required=False,
+        type=int,
+    ),
+    OpenApiParameter(
+        name="month",
+        description="Month (1-12) to report on, requires `year`. Defaults to the current month.",
+        required=False,
+        type=int,
+    ),
+]
+
+
+class ReportConditionalGetMixin(ConditionalGetMixin):
+    """ETags of the reports follow the user's data version and today's date, which moves the current month."""
+
+    def get_etag_version(self, request):
+        return f"{get_data_version(request.user.pk)}:{timezone.localdate()}"
+
+
+def expense_totals(total, count, start, end):
+    """
+    Totals of the expenses dated within [start, end), their average daily expenditure
+    being taken over the days of the range up to and including today.
+    """
+    elapsed_days = (min(end, timezone.localdate() + timedelta(days=1)) - start).days
+    return {
+        "total_expenses": total,
+        "expense_count": count,
+        "average_daily_expense": total / elapsed_days if elapsed_days > 0 else Decimal('0.00'),
+    }
+
+
+def get_report_period(request):
+    """Resolve the reported month from the `year`/`month` query parameters, raising ValidationError if invalid."""
+    try:
+        return Period.from_query_params(request.query_params)
+    except ValueError as e:
+        raise ValidationError({"period": str(e)})
+
+
+def get_report_range(request, max_months=120):
+    """
+    Resolve the first and last months of a range from the `from`/`to` query parameters (YYYY-MM),
+    defaulting to the 12 months up to the current one, raising ValidationError if invalid.
+    """
+    params = request.query_params
+    try:
+        last = Period.parse(params["to"]) if "to" in params else Period.current()
+        first = Period.parse(params["from"]) if "from" in params else last.shift(-11)
+    except ValueError as e:
+        raise ValidationError({"period": str(e)})
+
+    months = first.months_until(last) + 1
+    if months < 1:
+        raise ValidationError({"period": "The 'from' month must not be after the 'to' month."})
+    if months > max_months:
+        raise ValidationError({"period": f"The range cannot span more than {max_months} months."})
+    return first, last
+
+
+RANGE_PARAMETERS = [
+    OpenApiParameter(
+        name="from",
+        description="First month of the range (YYYY-MM). Defaults to 11 months before `to`.",
+        required=False,
+        type=str,
+    ),
+    OpenApiParameter(
+        name="to",
+        description="Last month of the range (YYYY-MM). Defaults to the current month.",
+        required=False,
+        type=str,
+    ),
+]
+
 
 @extend_schema(
     summary="List Monthly Expenses",
-    description="Retrieve a list of expenses for the current month.",
+    description="Retrieve a list of expenses for the current month, or the month given by `year` and `month`. "
+                "Expenses are returned newest first in pages; follow the `next` and `previous` cursor links "
+                "to walk the month or to incrementally sync it.",
     tags=["Reports"],
+    parameters=PERIOD_PARAMETERS,
     responses={
         200: OpenApiResponse(
-            description="A list of expenses for the current month",
+            description="A page of expenses for the current month",
             response=ExpenseSerializer(many=True)
         ),
+        400: OpenApiResponse(description="Invalid year or month"),
+        304: OpenApiResponse(description="Not modified - the `If-None-Match` ETag is still current"),
         403: OpenApiResponse(description="Forbidden - Authentication required"),
         500: OpenApiResponse(description="Internal server error"),
     }
 )
-class ExpenseReportView(ListAPIView):
-    """API view to retrieve a list of expenses for the current month."""
+class ExpenseReportView(ReportConditionalGetMixin, ListAPIView):
+    """API view to retrieve a cursor-paginated list of expenses for the current month."""
     serializer_class = ExpenseSerializer
     queryset = Expense.objects.none()
+    pagination_class = ExpenseKeysetPagination
 
     def get_queryset(self):
-        """Retrieve expenses for the authenticated user within the current month."""
+        """Retrieve expenses for the authenticated user within the requested month."""
+        period = get_report_period(self.request)
         try:
-            return Expense.objects.get_expenses_for_current_month(user=self.request.user)
+            return Expense.objects.get_expenses_for_period(user=self.request.user, period=period).for_api()
         except ObjectDoesNotExist:
             raise ValidationError("No expenses found for the current month.")
         except Exception as e:
             logger.error(f"Unexpected error in get_queryset: {e}", exc_info=True)
             raise e
 
+    @cached_report
     def list(self, request, *args, **kwargs):
-        """Custom response for the list of expenses."""
+        """Custom response for a page of expenses."""
         try:
-            queryset = self.get_queryset()
-            serializer = self.get_serializer(queryset, many=True)
+            page = self.paginate_queryset(self.get_queryset())
+            serializer = self.get_serializer(page, many=True)
             return custom_response(
                 status="success",
                 message="Monthly expenses retrieved successfully",
-                data=serializer.data
+                data=self.paginator.get_paginated_data(serializer.data)
             )
         except ValidationError as e:
             return custom_response(
@@ -76,28 +180,64 @@ class ExpenseReportView(ListAPIView):
 
 @extend_schema(
     summary="List Categorized Monthly Expenses",
-    description="Retrieve categorized expenses for the current month.",
+    description="Retrieve categorized expenses for the current month, or the month given by `year` and `month`. "
+                "Use `mode=summary` to get per-category totals, counts, minimum, maximum and average amounts "
+                "instead of the individual expenses.",
     tags=["Reports"],
+    parameters=[
+        OpenApiParameter(
+            name="mode",
+            description="`details` (default) lists the expenses of each category, "
+                        "`summary` returns aggregated figures per category.",
+            required=False,
+            type=str,
+            enum=["details", "summary"],
+        ),
+        *PERIOD_PARAMETERS,
+    ],
     responses={
         200: OpenApiResponse(
-            description="A dictionary of expenses categorized by type for the current month",
+            description="A dictionary of expenses or summaries categorized by type for the current month",
             response=OpenApiTypes.OBJECT
         ),
+        400: OpenApiResponse(description="Invalid report mode, year or month"),
+        304: OpenApiResponse(description="Not modified - the `If-None-Match` ETag is still current"),
         403: OpenApiResponse(description="Forbidden - Authentication required"),
         500: OpenApiResponse(description="Internal server error"),
     }
 )
-class ExpenseCategoryReportView(ListAPIView):
+class ExpenseCategoryReportView(ReportConditionalGetMixin, ListAPIView):
     """API view to retrieve categorized expenses for the current month."""
     serializer_class = ExpenseSerializer
+    modes = ("details", "summary")
 
+    @cached_report
     def list(self, request, *args, **kwargs):
         """Return expenses grouped by category for the current month."""
+        mode = request.query_params.get("mode", "details")
+        if mode not in self.modes:
+            return custom_response(
+                status="error",
+                message="Validation error.",
+                errors={"mode": f"Unsupported mode '{mode}', expected one of: {', '.join(self.modes)}."},
+                status_code=400,
+            )
+
         try:
-            expenses_by_category = request.user.expenses.get_expenses_by_category_for_current_month(
-                user=self.request.user)
-            data = {str(category): ExpenseSerializer(expenses, many=True).data
-                    for category, expenses in expenses_by_category.items()}
+            period = get_report_period(request)
+        except ValidationError as e:
+            return custom_response(
+                status="error",
+                message="Validation error.",
+                errors=e.detail,
+                status_code=400,
+            )
+
+        try:
+            if mode == "summary":
+                data = self._get_summary_data(request.user, period)
+            else:
+                data = self._get_details_data(request.user, period)
             return custom_response(
                 status="success",
                 message="Categorized monthly expenses retrieved successfully",
@@ -118,41 +258,79 @@ class ExpenseCategoryReportView(ListAPIView):
                 status_code=500,
             )
 
+    def _get_details_data(self, user, period):
+        """Serialize the expenses of each category, fetched in a single joined query."""
+        expenses_by_category = Expense.objects.get_expenses_by_category_for_period(user=user, period=period)
+        return {str(category): ExpenseSerializer(expenses, many=True).data
+                for category, expenses in expenses_by_category.items()}
+
+    def _get_summary_data(self, user, period):
+        """Serialize the per-category aggregates computed by the database."""
+        summaries = Expense.objects.get_category_summary_for_period(user=user, period=period)
+        return {str(summary['category__name']): CategorySummarySerializer(summary).data
+                for summary in summaries}
 
-class MonthlyStatisticsView(APIView):
+
+class MonthlyStatisticsView(ReportConditionalGetMixin, APIView):
     """
     API view to provide monthly statistics for the authenticated user.
-    Returns total expenses, remaining balance, and average daily expenditure.
+    Returns total expenses, remaining balance, average daily expenditure and their projections,
+    with the daily series of the expenses on request.
     """
+    series = ("none", "daily")
 
     @extend_schema(
         summary="Monthly Financial Statistics",
-        description="Retrieve monthly statistics including total expenses, remaining balance, and average daily expenditure.",
+        description="Retrieve monthly statistics including total expenses, remaining balance, average daily expenditure "
+                    "and their projection to the end of the month, for the current month, or the month given by "
+                    "`year` and `month`. Use `series=daily` to also get the expenses of every day of the month.",
         tags=["Reports"],
+        parameters=[
+            OpenApiParameter(
+                name="series",
+                description="`none` (default) or `daily` to include the daily series of the expenses.",
+                required=False,
+                type=str,
+                enum=["none", "daily"],
+            ),
+            *PERIOD_PARAMETERS,
+        ],
         responses={
             200: OpenApiResponse(
                 description="Monthly financial statistics",
                 response=MonthlyStatisticsSerializer
             ),
+            400: OpenApiResponse(description="Invalid series, year or month"),
+            304: OpenApiResponse(description="Not modified - the `If-None-Match` ETag is still current"),
             403: OpenApiResponse(description="Forbidden - Authentication required"),
             500: OpenApiResponse(description="Internal server error"),
         }
     )
+    @cached_report
     def get(self, request, *args, **kwargs):
         """Retrieve financial statistics in a flat response structure."""
+        series = request.query_params.get("series", "none")
+        if series not in self.series:
+            return custom_response(
+                status="error",
+                message="Validation error.",
+                errors={"series": f"Unsupported series '{series}', expected one of: {', '.join(self.series)}."},
+                status_code=400,
+            )
+
         try:
-            profile = get_object_or_404(Profile, user=request.user)
-            total_expenses = Expense.objects.filter(
-                user=request.user, date__month=date.today().month
-            ).aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-            remaining_balance = profile.balance - total_expenses
-            average_daily_expense = total_expenses / max(1, date.today().day)
-
-            stats = {
-                "total_expenses": total_expenses,
-                "remaining_balance": remaining_balance,
-                "average_daily_expense": average_daily_expense,
-            }
+            period = get_report_period(request)
+        except ValidationError as e:
+            return custom_response(
+                status="error",
+                message="Validation error.",
+                errors=e.detail,
+                status_code=400,
+            )
+
+        try:
+            # The totals come from the monthly rollups, only the daily series reads the month's expenses
+            stats = Profile.objects.monthly_statistics(request.user, period, daily=series == "daily")
             serializer = MonthlyStatisticsSerializer(stats)
             return custom_response(
                 status="success",
@@ -166,3 +344,376 @@ class MonthlyStatisticsView(APIView):
                 message="An unexpected error occurred. Please try again later.",
                 status_code=500,
             )
+
+
+@extend_schema(
+    summary="Expense Trends",
+    description="Retrieve the totals of the expenses of every month or week from the `from` month to the `to` month, "
+                "both included, or the totals of every category over that range. Months and categories are read "
+                "from the monthly rollups, weeks are grouped from the expenses, and periods without expenses are "
+                "included with zero totals. The range defaults to the last 12 months and spans at most 10 years.",
+    tags=["Reports"],
+    parameters=[
+        *RANGE_PARAMETERS,
+        OpenApiParameter(
+            name="group",
+            description="`month` (default), `week` or `category`.",
+            required=False,
+            type=str,
+            enum=["month", "week", "category"],
+        ),
+    ],
+    responses={
+        200: OpenApiResponse(description="Expense totals over the range", response=TrendReportSerializer),
+        400: OpenApiResponse(description="Invalid group or range"),
+        304: OpenApiResponse(description="Not modified - the `If-None-Match` ETag is still current"),
+        403: OpenApiResponse(description="Forbidden - Authentication required"),
+        500: OpenApiResponse(description="Internal server error"),
+    }
+)
+class TrendReportView(ReportConditionalGetMixin, APIView):
+    """
+    API view to provide the expense totals of the authenticated user over a range of months,
+    per month, per week or per category, each computed with a single grouped query.
+    """
+    groups = ("month", "week", "category")
+
+    @cached_report
+    def get(self, request, *args, **kwargs):
+        """Retrieve the totals of the range and of each of its points."""
+        group = request.query_params.get("group", "month")
+        if group not in self.groups:
+            return custom_response(
+                status="error",
+                message="Validation error.",
+                errors={"group": f"Unsupported group '{group}', expected one of: {', '.join(self.groups)}."},
+                status_code=400,
+            )
+
+        try:
+            first, last = get_report_range(request)
+        except ValidationError as e:
+            return custom_response(
+                status="error",
+                message="Validation error.",
+                errors=e.detail,
+                status_code=400,
+            )
+
+        try:
+            points = getattr(self, f"_get_{group}_points")(request.user, first, last)
+            total = sum((point["total_expenses"] for point in points), Decimal('0.00'))
+            count = sum(point["expense_count"] for point in points)
+            report = {
+                "start": first.start,
+                "end": last.end - timedelta(days=1),
+                "group": group,
+                **expense_totals(total, count, first.start, last.end),
+                "points": points,
+            }
+            return custom_response(
+                status="success",
+                message="Expense trends retrieved successfully",
+                data=TrendReportSerializer(report).data
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error in get: {e}", exc_info=True)
+            return custom_response(
+                status="error",
+                message="An unexpected error occurred. Please try again later.",
+                status_code=500,
+            )
+
+    def _get_month_points(self, user, first, last):
+        """Totals of every month of the range, from the monthly rollups."""
+        rows = {
+            (row["year"], row["month"]): row
+            for row in MonthlyRollup.objects.totals_by_month(user, first, last)
+        }
+        points = []
+        for offset in range(first.months_until(last) + 1):
+            period = first.shift(offset)
+            row = rows.get((period.year, period.month), {"total": Decimal('0.00'), "count": 0})
+            points.append({
+                "period": str(period),
+                "start": period.start,
+                "end": period.end - timedelta(days=1),
+                **expense_totals(row["total"], row["count"], period.start, period.end),
+            })
+        return points
+
+    def _get_week_points(self, user, first, last):
+        """Totals of every week overlapping the range, the first and last ones clipped to it."""
+        start, end = first.start, last.end
+        rows = {row["week"]: row for row in Expense.objects.get_totals_by_week(user, start, end)}
+        points = []
+        monday = start - timedelta(days=start.weekday())
+        while monday < end:
+            week_start, week_end = max(monday, start), min(monday + timedelta(days=7), end)
+            row = rows.get(monday, {"total": Decimal('0.00'), "count": 0})
+            points.append({
+                "period": monday.isoformat(),
+                "start": week_start,
+                "end": week_end - timedelta(days=1),
+                **expense_totals(row["total"], row["count"], week_start, week_end),
+            })
+            monday += timedelta(days=7)
+        return points
+
+    def _get_category_points(self, user, first, last):
+        """Totals of every category with expenses in the range, from the monthly rollups."""
+        return [
+            {
+                "category_id": row["category_id"],
+                "category_name": row["category__name"],
+                **expense_totals(row["total"], row["count"], first.start, last.end),
+            }
+            for row in MonthlyRollup.objects.totals_by_category(user, first, last)
+        ]
+
+
+@extend_schema(
+    summary="Spending Insights",
+    description="Analyse the expenses from the `from` month to the `to` month, up to today: the daily totals of the "
+                "last 30 days with their 7 and 30 day moving averages, the amount percentiles of every category, "
+                "the weekday and month seasonality of the spending and the expenses whose amount is anomalous "
+                "for their category. The range defaults to the last 12 months and spans at most 10 years.",
+    tags=["Reports"],
+    parameters=RANGE_PARAMETERS,
+    responses={
+        200: OpenApiResponse(description="Spending insights over the range", response=SpendingInsightsSerializer),
+        400: OpenApiResponse(description="Invalid or future range"),
+        304: OpenApiResponse(description="Not modified - the `If-None-Match` ETag is still current"),
+        403: OpenApiResponse(description="Forbidden - Authentication required"),
+        500: OpenApiResponse(description="Internal server error"),
+    }
+)
+class SpendingInsightsView(ReportConditionalGetMixin, APIView):
+    """
+    API view to provide the spending insights of the authenticated user over a range of months,
+    computed in vectorized form over the expense history, see reports.analytics.
+    """
+
+    @cached_report
+    def get(self, request, *args, **kwargs):
+        """Retrieve the spending insights of the range."""
+        try:
+            first, last = get_report_range(request)
+            start, end = first.start, min(last.end - timedelta(days=1), timezone.localdate())
+            if end < start:
+                raise ValidationError({"period": "The range must not start in the future."})
+        except ValidationError as e:
+            return custom_response(
+                status="error",
+                message="Validation error.",
+                errors=e.detail,
+                status_code=400,
+            )
+
+        try:
+            insights = spending_insights(request.user, start, end)
+            return custom_response(
+                status="success",
+                message="Spending insights retrieved successfully",
+                data=SpendingInsightsSerializer(insights).data
+            )
+        except Exception as e:
+            logger.error(f"Unexpected error in get: {e}", exc_info=True)
+            return custom_response(
+                status="error",
+                message="An unexpected error occurred. Please try again later.",
+                status_code=500,
+            )
+
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+    """
+    The `format` query parameter of the export selects the file format rather than a DRF renderer,
+    the error responses are always rendered as JSON.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return super().select_renderer(request, renderers, format_suffix=format_suffix or 'json')
+
+
+@extend_schema(
+    summary="Export Expense History",
+    description="Stream the expenses of the authenticated user, oldest first, as CSV or newline-delimited JSON. "
+                "The rows are sent as they are read from the database, so large histories start downloading "
+                "immediately and are never held in memory.",
+    tags=["Reports"],
+    parameters=[
+        OpenApiParameter(
+            name="format",
+            description="Export format, `csv` (default) or `ndjson`.",
+            required=False,
+            type=str,
+            enum=list(EXPORT_FORMATS),
+        ),
+        OpenApiParameter(name="from", description="First date to export (YYYY-MM-DD).", required=False, type=date),
+        OpenApiParameter(name="to", description="Last date to export (YYYY-MM-DD).", required=False, type=date),
+    ],
+    responses={
+        (200, "text/csv"): OpenApiResponse(description="CSV export of the expenses", response=OpenApiTypes.STR),
+        (200, "application/x-ndjson"): OpenApiResponse(
+            description="One JSON expense per line", response=OpenApiTypes.STR
+        ),
+        400: OpenApiResponse(description="Invalid format or dates"),
+        403: OpenApiResponse(description="Forbidden - Authentication required"),
+    }
+)
+class ExpenseExportView(APIView):
+    """API view streaming the expense history of the authenticated user."""
+    content_negotiation_class = ExportContentNegotiation
+    chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        """Stream the expenses in the requested format and date range."""
+        try:
+            export_format, start, end = self._get_export_options(request.query_params)
+        except ValidationError as e:
+            return custom_response(
+                status="error",
+                message="Validation error.",
+                errors=e.detail,
+                status_code=400,
+            )
+
+        rows = export_rows(request.user, start, end, chunk_size=self.chunk_size)
+        response = StreamingHttpResponse(stream_export(rows, export_format),
+                                         content_type=EXPORT_FORMATS[export_format])
+        filename = "-".join(["expenses", *(str(bound) for bound in (start, end) if bound)])
+        response["Content-Disposition"] = f'attachment; filename="{filename}.{export_format}"'
+        return response
+
+    def _get_export_options(self, query_params):
+        """Validate the format and the optional inclusive date range of the export."""
+        export_format = query_params.get("format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(
+                {"format": f"Unsupported format '{export_format}', expected one of: {', '.join(EXPORT_FORMATS)}."}
+            )
+
+        bounds = {}
+        for name in ("from", "to"):
+            value = query_params.get(name)
+            try:
+                bounds[name] = date.fromisoformat(value) if value else None
+            except ValueError:
+                raise ValidationError({name: "Dates must use the YYYY-MM-DD format."})
+
+        if bounds["from"] and bounds["to"] and bounds["from"] > bounds["to"]:
+            raise ValidationError({"to": "The end date must not be before the start date."})
+        return export_format, bounds["from"], bounds["to"]
+
+
+class ExportJobCreateView(CreateAPIView):
+    """
+    API view to request an asynchronous export of the expense history.
+    The export is written by a Celery worker, the job is polled until its download URL is available.
+    """
+    serializer_class = ExportJobSerializer
+    queryset = ExportJob.objects.none()
+
+    @extend_schema(
+        summary="Create an Expense Export Job",
+        description="Queue the export of the expenses of the authenticated user, optionally limited to a date range, "
+                    "to a gzip-compressed CSV or NDJSON file. Poll the returned job for its progress.",
+        tags=["Reports"],
+        request=ExportJobSerializer,
+        responses={
+            202: OpenApiResponse(description="Export job queued", response=ExportJobSerializer),
+            400: OpenApiResponse(description="Validation error"),
+            403: OpenApiResponse(description="Forbidden - Authentication required"),
+            500: OpenApiResponse(description="Internal server error"),
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        """Handle POST requests to queue a new export job."""
+        try:
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            with transaction.atomic():
+                job = serializer.save(user=request.user)
+                # Only hand the job to a worker once it is visible outside this transaction
+                transaction.on_commit(lambda: run_export_job.delay(str(job.pk)))
+            return custom_response(
+                status="success",
+                message="Export job queued.",
+                data=self.get_serializer(job).data,
+                status_code=status.HTTP_202_ACCEPTED,
+            )
+        except ValidationError as e:
+            logger.warning(f"Validation error: {e}")
+            return custom_response(
+                status="error",
+                message="Validation error occurred. Please check your input.",
+                errors=e.detail,
+                status_code=400,
+            )
+        except Exception as e:
+            logger.error(f"Unhandled exception: {e}", exc_info=True)
+            return custom_response(
+                status="error",
+                message="An unexpected error occurred. Please try again later.",
+                status_code=500,
+            )
+
+
+@extend_schema(
+    summary="Retrieve an Expense Export Job",
+    description="Retrieve the status, progress and row counts of an export job, "
+                "and its download URL once completed.",
+    tags=["Reports"],
+    responses={
+        200: OpenApiResponse(description="Export job details", response=ExportJobSerializer),
+        403: OpenApiResponse(description="Forbidden - Authentication required"),
+        404: OpenApiResponse(description="Export job not found"),
+    }
+)
+class ExportJobDetailView(RetrieveAPIView):
+    """API view to poll an export job of the authenticated user."""
+    serializer_class = ExportJobSerializer
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(user=self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Custom response for the export job."""
+        job = self.get_object()
+        return custom_response(
+            status="success",
+            message="Export job retrieved successfully",
+            data=self.get_serializer(job).data
+        )
+
+
+@extend_schema(
+    summary="Download an Expense Export",
+    description="Download the gzip-compressed file of a completed export job.",
+    tags=["Reports"],
+    responses={
+        (200, "application/gzip"): OpenApiResponse(description="The export file", response=OpenApiTypes.BINARY),
+        403: OpenApiResponse(description="Forbidden - Authentication required"),
+        404: OpenApiResponse(description="Export job not found"),
+        409: OpenApiResponse(description="The export is not completed yet"),
+    }
+)
+class ExportJobDownloadView(RetrieveAPIView):
+    """API view serving the file of a completed export job to its owner."""
+    serializer_class = ExportJobSerializer
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(user=self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Stream the export file from the local storage."""
+        job = self.get_object()
+        if job.status != ExportJob.COMPLETED:
+            return custom_response(
+                status="error",
+                message=f"The export is {job.status}, it can be downloaded once completed.",
+                status_code=409,
+            )
+        return FileResponse(job.file.open('rb'), as_attachment=True, filename=job.filename,
+                            content_type='application/gzip')
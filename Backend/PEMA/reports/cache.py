@@ -0,0 +1,147 @@
+from functools import wraps
+from hashlib import sha256
+from logging import getLogger
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+logger = getLogger(__name__)
+
+CACHE_HEADER = 'X-Cache'
+BYPASS_HEADER = 'HTTP_X_CACHE_BYPASS'
+GLOBAL_VERSION_KEY = 'reports:version'
+METRIC_KEYS = {'hit': 'reports:metrics:hits', 'miss': 'reports:metrics:misses'}
+
+
+def get_cache():
+    return caches[settings.REPORT_CACHE_ALIAS]
+
+
+def _user_version_key(user_id):
+    return f'reports:version:user:{user_id}'
+
+
+def _get_version(key):
+    """Returns the version stored under key, initializing it when missing or evicted."""
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        # A timestamp cannot collide with a version issued before an eviction
+        cache.add(key, time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_data_version(user_id):
+    """
+    Returns the version of the data behind the reports of a user, combining the user's own
+    version with the global one. Any change to either makes the cached reports unreachable.
+    """
+    return f'{_get_version(GLOBAL_VERSION_KEY)}.{_get_version(_user_version_key(user_id))}'
+
+
+def _bump(key):
+    def bump():
+        try:
+            get_cache().set(key, time_ns(), None)
+        except Exception as e:
+            logger.warning(f"Unable to invalidate the report cache ({key}): {e}")
+
+    # Bumping before the commit would let a concurrent request cache the old rows again
+    transaction.on_commit(bump)
+
+
+def bump_data_version(user_id):
+    """Invalidates the cached reports of a user once the current transaction commits."""
+    _bump(_user_version_key(user_id))
+
+
+def bump_global_data_version():
+    """
+    Invalidates the cached reports of every user once the current transaction commits,
+    for changes made by queryset updates that do not send signals or affect all users.
+    """
+    _bump(GLOBAL_VERSION_KEY)
+
+
+def record_metric(outcome):
+    """Counts a cache hit or miss."""
+    cache = get_cache()
+    key = METRIC_KEYS[outcome]
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)  # Evicted between add and incr
+
+
+def get_metrics():
+    """Returns the hit and miss counts of the report cache along with the hit ratio."""
+    counts = get_cache().get_many(METRIC_KEYS.values())
+    hits = counts.get(METRIC_KEYS['hit'], 0)
+    misses = counts.get(METRIC_KEYS['miss'], 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else 0.0}
+
+
+def reset_metrics():
+    get_cache().delete_many(METRIC_KEYS.values())
+
+
+def build_cache_key(request, view_name):
+    """
+    Builds the key of a report response from the user, the data version, the requested URL
+    (which holds the period and other parameters) and today's date, since the current month
+    and the daily averages move with it.
+    """
+    params = sorted(request.query_params.lists())
+    fingerprint = sha256(
+        f'{request.get_host()}|{request.path}|{params}|{timezone.localdate()}'.encode()
+    ).hexdigest()
+    user_id = request.user.pk
+    return f'reports:{view_name}:{user_id}:{get_data_version(user_id)}:{fingerprint}'
+
+
+def cached_report(method):
+    """
+    Caches the successful responses of a report view method per user, period, parameters
+    and data version, so repeated polls are served without touching the database.
+
+    Responses carry an `X-Cache` header set to HIT, MISS or BYPASS. Sending an `X-Cache-Bypass`
+    header recomputes the report and refreshes its entry. When the cache is unreachable the
+    report is computed as if caching was disabled.
+    """
+
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        bypass = bool(request.META.get(BYPASS_HEADER))
+        try:
+            cache = get_cache()
+            key = build_cache_key(request, type(self).__name__)
+            cached = None if bypass else cache.get(key)
+        except Exception as e:
+            logger.warning(f"Report cache unavailable, serving uncached: {e}")
+            return method(self, request, *args, **kwargs)
+
+        if cached is not None:
+            record_metric('hit')
+            response = Response(cached)
+            response[CACHE_HEADER] = 'HIT'
+            return response
+
+        response = method(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            try:
+                cache.set(key, response.data, settings.REPORT_CACHE_TIMEOUT)
+                if not bypass:
+                    record_metric('miss')
+            except Exception as e:
+                logger.warning(f"Unable to store the report in the cache: {e}")
+        response[CACHE_HEADER] = 'BYPASS' if bypass else 'MISS'
+        return response
+
+    return wrapper
@@ -0,0 +1,76 @@
+import csv
+import json
+
+from django.db.models import Q
+
+from expenses.models import Expense
+
+EXPORT_COLUMNS = ('id', 'date', 'amount', 'category', 'description')
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_queryset(user, start=None, end=None, after=None):
+    """
+    Returns the (id, date, amount, category, description) tuples of a user's expenses
+    between the start and end dates (both inclusive), oldest first.
+    `after` is an optional (date, id) position, only the expenses following it are returned.
+    """
+    expenses = Expense.objects.filter(user=user)
+    if start is not None:
+        expenses = expenses.filter(date__gte=start)
+    if end is not None:
+        expenses = expenses.filter(date__lte=end)
+    if after is not None:
+        after_date, after_id = after
+        expenses = expenses.filter(Q(date__gt=after_date) | Q(date=after_date, id__gt=after_id))
+
+    return (
+        expenses.order_by('date', 'id')
+        .values_list('id', 'date', 'amount', 'category__name', 'description')
+    )
+
+
+def export_rows(user, start=None, end=None, chunk_size=2000):
+    """
+    Yields the export tuples of a user's expenses, see export_queryset.
+    Rows are read in chunks of a server-side cursor, no Expense instance is built.
+    """
+    return export_queryset(user, start, end).iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """File-like object handing back what csv.writer writes, so each row can be yielded."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, header=True):
+    """Yields the CSV lines of the rows, header first unless disabled."""
+    writer = csv.writer(_Echo())
+    if header:
+        yield writer.writerow(EXPORT_COLUMNS)
+    for expense_id, date, amount, category, description in rows:
+        yield writer.writerow((expense_id, date.isoformat(), amount, category or '', description or ''))
+
+
+def stream_ndjson(rows):
+    """Yields one JSON object per row and line."""
+    for expense_id, date, amount, category, description in rows:
+        yield json.dumps({
+            'id': expense_id,
+            'date': date.isoformat(),
+            'amount': str(amount),
+            'category': category,
+            'description': description,
+        }) + '\n'
+
+
+def stream_export(rows, export_format, header=True):
+    """Yields the rows encoded in the given export format, header included for formats having one."""
+    if export_format == 'csv':
+        return stream_csv(rows, header)
+    return stream_ndjson(rows)
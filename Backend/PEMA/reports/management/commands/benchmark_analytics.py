@@ -0,0 +1,168 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from expenses.models import Category, Expense
+from reports.analytics import (
+    ANOMALY_THRESHOLD,
+    MAX_ANOMALIES,
+    PERCENTILES,
+    SERIES_DAYS,
+    compute_insights,
+    load_expenses,
+)
+
+
+def percentile(sorted_values, fraction):
+    """Linearly interpolated quantile of sorted values, like numpy.percentile."""
+    position = fraction * (len(sorted_values) - 1)
+    lower, upper = math.floor(position), math.ceil(position)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def naive_insights(expenses, start, end):
+    """
+    The insights of reports.analytics.compute_insights, computed row by row over Expense instances
+    dated from start to end with their category.
+    """
+    day_count = (end - start).days + 1
+    daily = [0.0] * day_count
+    by_category = defaultdict(list)
+    names = {}
+    for expense in expenses:
+        amount = float(expense.amount)
+        daily[(expense.date - start).days] += amount
+        by_category[expense.category_id].append(expense)
+        names[expense.category_id] = expense.category.name if expense.category else None
+    total = sum(daily)
+
+    series = []
+    for index in range(max(0, day_count - SERIES_DAYS), day_count):
+        averages = {}
+        for window in (7, 30):
+            days = daily[max(0, index + 1 - window):index + 1]
+            averages[f"average_{window}"] = sum(days) / len(days)
+        series.append({"date": start + timedelta(days=index), "total": daily[index], **averages})
+
+    categories, anomalies = [], []
+    for category_id, expenses in by_category.items():
+        amounts = sorted(float(expense.amount) for expense in expenses)
+        category_total = sum(amounts)
+        categories.append({
+            "category_id": category_id,
+            "category_name": names[category_id],
+            "total": category_total,
+            "count": len(amounts),
+            "share": round(category_total / total, 4) if total else 0.0,
+            **{f"p{p}": percentile(amounts, p / 100) for p in PERCENTILES},
+        })
+        median = percentile(amounts, 0.5)
+        mad = percentile(sorted(abs(amount - median) for amount in amounts), 0.5)
+        for expense in expenses:
+            score = 0.6745 * (float(expense.amount) - median) / mad if mad > 0 else 0.0
+            if abs(score) >= ANOMALY_THRESHOLD:
+                anomalies.append({
+                    "id": expense.id, "date": expense.date, "amount": float(expense.amount),
+                    "category_id": category_id, "category_name": names[category_id], "score": round(score, 4),
+                })
+    categories.sort(key=lambda category: (-category["total"], category["category_id"] or -1))
+    anomalies.sort(key=lambda anomaly: (-abs(anomaly["score"]), anomaly["id"]))
+
+    seasonality = {}
+    for name, key, size in (("weekday", lambda day: day.weekday(), 7), ("month", lambda day: day.month - 1, 12)):
+        sums, counts = [0.0] * size, [0] * size
+        for index, amount in enumerate(daily):
+            day_key = key(start + timedelta(days=index))
+            sums[day_key] += amount
+            counts[day_key] += 1
+        overall = total / day_count
+        seasonality[name] = [
+            round(sums[k] / counts[k] / overall, 4) if counts[k] and overall else None for k in range(size)
+        ]
+
+    return {
+        "start": start,
+        "end": end,
+        "total_expenses": total,
+        "expense_count": sum(len(expenses) for expenses in by_category.values()),
+        "average_daily_expense": total / day_count,
+        "moving_averages": series,
+        "categories": categories,
+        "seasonality": seasonality,
+        "anomalies": anomalies[:MAX_ANOMALIES],
+    }
+
+
+def same(first, second):
+    """Whether two insights are equal, up to the rounding errors of summing floats in another order."""
+    if isinstance(first, float) or isinstance(second, float):
+        return isinstance(first, (int, float)) and isinstance(second, (int, float)) and \
+            math.isclose(first, second, rel_tol=1e-6, abs_tol=1e-4)
+    if isinstance(first, dict) and isinstance(second, dict):
+        return first.keys() == second.keys() and all(same(first[key], second[key]) for key in first)
+    if isinstance(first, list) and isinstance(second, list):
+        return len(first) == len(second) and all(same(a, b) for a, b in zip(first, second))
+    return first == second
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the time of the vectorized spending insights with the same insights computed row by row over "
+        "Expense instances, loading and computing apart, on the whole expense history of a user. "
+        "Use generate_synthetic_data --users 1 --expenses 100000 to create a 100k-expense history."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_id', type=int, help="User whose expense history is analysed")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs of each implementation, the fastest is kept")
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(pk=options['user_id'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['user_id']} does not exist")
+
+        history = Expense.objects.filter(user=user).aggregate(start=Min('date'), end=Max('date'))
+        if history['start'] is None:
+            raise CommandError(f"User {user.pk} has no expense")
+        start, end = history['start'], history['end']
+        rows = Expense.objects.filter(user=user).count()
+        self.stdout.write(f"Analysing {rows} expenses of user {user.pk} from {start} to {end}")
+
+        def vectorized():
+            expenses = load_expenses(user, start, end)
+            names = dict(Category.objects.values_list('pk', 'name'))
+            return expenses, lambda: compute_insights(expenses, start, end, names)
+
+        def naive():
+            expenses = list(Expense.objects.filter(user=user, date__gte=start, date__lte=end).select_related('category'))
+            return expenses, lambda: naive_insights(expenses, start, end)
+
+        self.stdout.write(f"{'':<12}{'load':>10}{'compute':>10}{'total':>10}")
+        timings, results = {}, {}
+        for name, load in (("vectorized", vectorized), ("naive loop", naive)):
+            runs = []
+            for _ in range(max(1, options['repeat'])):
+                started = perf_counter()
+                _, compute = load()
+                loaded = perf_counter()
+                results[name] = compute()
+                runs.append((loaded - started, perf_counter() - loaded))
+            # Keep the fastest load and compute of the runs
+            timings[name] = (min(run[0] for run in runs), min(run[1] for run in runs))
+            load_seconds, compute_seconds = timings[name]
+            self.stdout.write(
+                f"{name:<12}{load_seconds:9.3f}s{compute_seconds:9.3f}s{load_seconds + compute_seconds:9.3f}s"
+            )
+
+        (vector_load, vector_compute), (naive_load, naive_compute) = timings["vectorized"], timings["naive loop"]
+        self.stdout.write(
+            f"Speedup {naive_compute / vector_compute:.1f}x on the computation, "
+            f"{(naive_load + naive_compute) / (vector_load + vector_compute):.1f}x in total, "
+            f"results {'match' if same(results['vectorized'], results['naive loop']) else 'DIFFER'}"
+        )
@@ -0,0 +1,62 @@
+import json
+import tracemalloc
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.api.serializers import ExpenseSerializer
+from expenses.models import Expense
+from reports.export import export_rows, stream_export
+
+
+class Command(BaseCommand):
+    help = "Compares the time and peak memory of the streaming expense export with ExpenseSerializer(many=True)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_id', type=int, help="User whose expense history is exported")
+        parser.add_argument(
+            '--format', choices=['csv', 'ndjson'], default='ndjson',
+            help="Export format of the streaming run",
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help="Rows fetched per round trip by the streaming export",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(pk=options['user_id'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['user_id']} does not exist")
+
+        def streaming():
+            size = 0
+            for chunk in stream_export(export_rows(user, chunk_size=options['chunk_size']), options['format']):
+                size += len(chunk)
+            return size
+
+        def serializer():
+            expenses = Expense.objects.filter(user=user).for_api().order_by('date', 'id')
+            return len(json.dumps(ExpenseSerializer(expenses, many=True).data, default=str))
+
+        rows = Expense.objects.filter(user=user).count()
+        self.stdout.write(f"Exporting {rows} expenses of user {user.pk}")
+        for name, run in (("streaming export", streaming), ("ExpenseSerializer", serializer)):
+            seconds, peak, size = self._measure(run)
+            self.stdout.write(
+                f"{name:<18} {seconds:8.3f}s  peak {peak / 1024 / 1024:8.2f} MiB  output {size / 1024 / 1024:8.2f} MiB"
+            )
+
+    @staticmethod
+    def _measure(run):
+        """Returns the duration, peak traced memory and result of run."""
+        tracemalloc.start()
+        started = perf_counter()
+        try:
+            result = run()
+            seconds = perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return seconds, peak, result
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from reports.cache import get_metrics, reset_metrics
+
+
+class Command(BaseCommand):
+    help = "Shows the hit and miss counts of the report response cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help="Reset the counters after displaying them",
+        )
+
+    def handle(self, *args, **options):
+        metrics = get_metrics()
+        self.stdout.write(f"Hits:      {metrics['hits']}")
+        self.stdout.write(f"Misses:    {metrics['misses']}")
+        self.stdout.write(f"Hit ratio: {metrics['hit_ratio']:.1%}")
+
+        if options['reset']:
+            reset_metrics()
+            self.stdout.write(self.style.SUCCESS("Counters reset"))
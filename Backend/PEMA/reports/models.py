@@ -1,3 +1,78 @@
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
 from django.db import models
 
-# Create your models here.
+User = get_user_model()
+
+
+def export_job_path(instance, filename):
+    """Exports are stored per user under a random name, e.g. exports/42/<uuid>.csv.gz"""
+    return f'exports/{instance.user_id}/{filename}'
+
+
+class ExportJob(models.Model):
+    """
+    Model tracking an asynchronous export of a user's expenses to a compressed file.
+    The export task writes the rows in chunks and records after each one how far it got,
+    so a crashed or interrupted job resumes from its last checkpoint instead of starting over.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+
+    # Error shown for failed jobs, the exception itself is only logged
+    FAILURE_MESSAGE = "The export failed, please request a new one."
+
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+    FORMAT_CHOICES = [
+        (CSV, 'CSV'),
+        (NDJSON, 'NDJSON'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="export_jobs")
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default=CSV)
+    start_date = models.DateField(blank=True, null=True, help_text="First date exported, inclusive")
+    end_date = models.DateField(blank=True, null=True, help_text="Last date exported, inclusive")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    total_rows = models.PositiveIntegerField(default=0, help_text="Number of expenses when the export started")
+    exported_rows = models.PositiveIntegerField(default=0)
+    # Checkpoint: the (date, id) position of the last exported expense and the file size after it
+    last_date = models.DateField(blank=True, null=True)
+    last_expense_id = models.BigIntegerField(default=0)
+    bytes_written = models.BigIntegerField(default=0)
+    file = models.FileField(upload_to=export_job_path, max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        """String representation of the job, displaying user, format and status."""
+        return f'{self.format.upper()} export of {self.user} ({self.status})'
+
+    @property
+    def progress(self):
+        """Percentage of the expenses exported so far."""
+        if self.status == self.COMPLETED or not self.total_rows:
+            return 100.0 if self.status == self.COMPLETED else 0.0
+        return min(100.0, 100.0 * self.exported_rows / self.total_rows)
+
+    @property
+    def filename(self):
+        """Name offered to the user when downloading the export."""
+        bounds = [str(bound) for bound in (self.start_date, self.end_date) if bound]
+        return f"{'-'.join(['expenses', *bounds])}.{self.format}.gz"
+
+    class Meta:
+        # Orders jobs by creation, with the most recent first
+        ordering = ['-created_at']
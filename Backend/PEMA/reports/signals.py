@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from expenses.models import Category, Expense
+from expenses.signals import expenses_bulk_created
+from income.models import Income
+from income.signals import balances_rolled_over
+from users.models import Profile
+from .cache import bump_data_version, bump_global_data_version
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+@receiver(post_save, sender=Income)
+@receiver(post_delete, sender=Income)
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_user_reports(sender, instance, **kwargs):
+    """Expenses, income and balance feed the reports of their user, drop the cached ones."""
+    bump_data_version(instance.user_id)
+
+
+@receiver(expenses_bulk_created, sender=Expense)
+def invalidate_bulk_created_expenses(sender, user, **kwargs):
+    """Expenses created in bulk send no post_save, their user's reports are dropped at once."""
+    bump_data_version(user.pk)
+
+
+@receiver(balances_rolled_over)
+def invalidate_rolled_over_balances(sender, **kwargs):
+    """The monthly rollover credits every balance with queryset updates, which send no post_save."""
+    bump_global_data_version()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_all_reports(sender, instance, **kwargs):
+    """Category names appear in the reports of every user."""
+    bump_global_data_version()
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_account(sender, instance, created, update_fields=None, **kwargs):
+    """The account details are served by the conditional profile endpoint, logins alone do not change them."""
+    if created or update_fields is None or set(update_fields) != {'last_login'}:
+        bump_data_version(instance.pk)
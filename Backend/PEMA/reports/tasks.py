@@ -0,0 +1,95 @@
+import gzip
+import os
+from logging import getLogger
+from time import monotonic
+
+from celery import shared_task
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .export import export_queryset, stream_export
+from .models import ExportJob, export_job_path
+
+logger = getLogger(__name__)
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True,
+             autoretry_for=(DatabaseError, OSError), retry_backoff=True, max_retries=3)
+def run_export_job(self, job_id):
+    """
+    Task writing the expenses of an export job to its gzip file, chunk by chunk.
+
+    Every chunk is appended to the file as its own gzip member and the job records the
+    (date, id) of its last row and the file size right after, so a resumed job truncates
+    whatever a crashed attempt wrote past the checkpoint and carries on from there.
+    Once its time budget is spent, the task re-enqueues itself instead of holding the worker.
+    """
+    job = ExportJob.objects.select_related('user').get(pk=job_id)
+    if job.status == ExportJob.COMPLETED:
+        logger.info(f"Export job {job.pk} already completed, skipping")
+        return {'job': str(job.pk), 'exported': job.exported_rows, 'skipped': True}
+
+    if job.status == ExportJob.PENDING:
+        job.total_rows = export_queryset(job.user, job.start_date, job.end_date).count()
+        job.file.name = export_job_path(job, f'{job.pk}.{job.format}.gz')
+    job.status = ExportJob.RUNNING
+    job.error = ''
+    job.save(update_fields=['status', 'total_rows', 'file', 'error', 'updated_at'])
+
+    try:
+        finished = _export_chunks(job, settings.EXPORT_JOB_CHUNK_SIZE, settings.EXPORT_JOB_TIME_BUDGET)
+    except Exception as e:
+        logger.error(f"Export job {job.pk} failed after {job.exported_rows} rows: {e}", exc_info=True)
+        ExportJob.objects.filter(pk=job.pk).update(
+            status=ExportJob.FAILED, error=ExportJob.FAILURE_MESSAGE, updated_at=timezone.now()
+        )
+        raise
+
+    if not finished:
+        logger.info(f"Export job {job.pk}: {job.exported_rows}/{job.total_rows} rows, continuing in a new task")
+        run_export_job.delay(job_id)
+        return {'job': str(job.pk), 'exported': job.exported_rows, 'finished': False}
+
+    job.status = ExportJob.COMPLETED
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'finished_at', 'updated_at'])
+    logger.info(f"Export job {job.pk} finished: {job.exported_rows} rows, {job.bytes_written} bytes")
+    return {'job': str(job.pk), 'exported': job.exported_rows, 'finished': True}
+
+
+def _export_chunks(job, chunk_size, time_budget):
+    """
+    Appends the chunks following the job's checkpoint to its file until the rows or the
+    time budget run out, checkpointing after each one. Returns whether the export is complete.
+    """
+    path = job.file.path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    deadline = monotonic() + time_budget
+
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as export_file:
+        # Drop anything written after the last checkpoint by an interrupted attempt
+        export_file.seek(job.bytes_written)
+        export_file.truncate()
+
+        while True:
+            after = (job.last_date, job.last_expense_id) if job.last_date else None
+            rows = list(export_queryset(job.user, job.start_date, job.end_date, after)[:chunk_size])
+
+            first_chunk = job.bytes_written == 0
+            if rows or first_chunk:
+                content = ''.join(stream_export(rows, job.format, header=first_chunk))
+                export_file.write(gzip.compress(content.encode()))
+                export_file.flush()
+                os.fsync(export_file.fileno())
+
+            if rows:
+                job.exported_rows += len(rows)
+                job.last_expense_id, job.last_date = rows[-1][0], rows[-1][1]
+            job.bytes_written = export_file.tell()
+            job.save(update_fields=['exported_rows', 'last_date', 'last_expense_id', 'bytes_written', 'updated_at'])
+
+            if len(rows) < chunk_size:
+                return True
+            if monotonic() >= deadline:
+                return False
@@ -1,15 +1,23 @@
 # reports/tests.py
 
+import gzip
+import json
 from datetime import date
 from decimal import Decimal
+from io import StringIO
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from expenses.models import Expense, Category
+from PEMA.celery_app import app as celery_app
+from expenses.models import Expense, Category, MonthlyRollup
+from reports.cache import get_metrics
+from reports.models import ExportJob
+from reports.tasks import run_export_job
 
 User = get_user_model()
 
@@ -103,13 +111,15 @@ def test_expense_monthly_report(auth_client, expense_monthly_url, expenses):
     # Ensure status is HTTP 200 OK
     assert response.status_code == 200
 
-    # Assert the response contains data as a flat list
+    # Assert the response contains the first page of expenses
     assert 'data' in response.data
-    assert len(response.data['data']) == 2
+    assert len(response.data['data']['results']) == 2
+    assert response.data['data']['next'] is None
+    assert response.data['data']['previous'] is None
 
     # Validate individual entries in the response data
     expected_amounts = {Decimal('100.00'), Decimal('50.00')}
-    response_amounts = {Decimal(item['amount']) for item in response.data['data']}
+    response_amounts = {Decimal(item['amount']) for item in response.data['data']['results']}
     assert response_amounts == expected_amounts
 
 
@@ -160,6 +170,126 @@ def test_monthly_statistics_view(auth_client, monthly_statistics_url, expenses):
     assert float(data['average_daily_expense']) >= 0.0
 
 
+@pytest.mark.django_db
+def test_monthly_statistics_daily_series(auth_client, monthly_statistics_url, test_user, food_category,
+                                         django_assert_num_queries):
+    """
+    Test that the statistics of a past month are projected from all its days and that `series=daily`
+    adds the expenses of every day, from a single query after the authentication lookup.
+    """
+    for day, amount in ((3, '10.00'), (3, '5.00'), (9, '7.00')):
+        Expense.objects.create(user=test_user, amount=Decimal(amount), category=food_category, date=date(2024, 2, day))
+    Expense.objects.create(user=test_user, amount=Decimal('99.00'), category=food_category, date=date(2024, 3, 1))
+
+    with django_assert_num_queries(2):
+        response = auth_client.get(monthly_statistics_url, {'year': 2024, 'month': 2, 'series': 'daily'})
+    assert response.status_code == 200
+    data = response.data['data']
+    assert (data['total_expenses'], data['expense_count']) == ('22.00', 3)
+    assert (data['projected_total_expenses'], data['projected_remaining_balance']) == ('22.00', '4978.00')
+    assert data['burn_rate'] == '0.0044'
+    assert len(data['daily']) == 29
+    assert data['daily'][2] == {'date': '2024-02-03', 'total': '15.00', 'count': 2}
+    assert data['daily'][3] == {'date': '2024-02-04', 'total': '0.00', 'count': 0}
+
+    # Without the series, the totals are read from the rollups rather than the expenses
+    with django_assert_num_queries(2) as queries:
+        response = auth_client.get(monthly_statistics_url, {'year': 2024, 'month': 2})
+    assert not any('expenses_expense' in query['sql'] for query in queries.captured_queries)
+    data = response.data['data']
+    assert 'daily' not in data
+    assert (data['total_expenses'], data['expense_count'], data['burn_rate']) == ('22.00', 3, '0.0044')
+    response = auth_client.get(monthly_statistics_url, {'series': 'weekly'})
+    assert response.status_code == 400
+    assert 'series' in response.data['errors']
+
+
+@pytest.mark.django_db
+def test_trend_report_groups(auth_client, test_user, food_category, transport_category):
+    """
+    Test the trends of a range per month, with empty months filled in, per week, clipped to the range,
+    and per category, along with the totals of the whole range.
+    """
+    url = reverse('api:reports:trends')
+    for day, amount, category in ((date(2023, 11, 30), '10.00', food_category),
+                                  (date(2024, 1, 1), '20.00', transport_category),
+                                  (date(2024, 1, 7), '5.00', food_category),
+                                  (date(2024, 2, 1), '99.00', food_category)):
+        Expense.objects.create(user=test_user, amount=Decimal(amount), category=category, date=day)
+    params = {'from': '2023-11', 'to': '2024-01'}
+
+    data = auth_client.get(url, params).data['data']
+    assert (data['start'], data['end'], data['group']) == ('2023-11-01', '2024-01-31', 'month')
+    assert (data['total_expenses'], data['expense_count']) == ('35.00', 3)
+    assert [(point['period'], point['total_expenses'], point['expense_count']) for point in data['points']] == [
+        ('2023-11', '10.00', 1), ('2023-12', '0.00', 0), ('2024-01', '25.00', 2),
+    ]
+
+    points = auth_client.get(url, {**params, 'group': 'week'}).data['data']['points']
+    assert (points[0]['period'], points[0]['start'], points[0]['total_expenses']) == ('2023-10-30', '2023-11-01', '0.00')
+    assert next(point for point in points if point['period'] == '2023-11-27')['total_expenses'] == '10.00'
+    # 2024-01-01 is a Monday, the expenses of the 1st and the 7th share its week
+    week = next(point for point in points if point['period'] == '2024-01-01')
+    assert (week['end'], week['total_expenses'], week['expense_count']) == ('2024-01-07', '25.00', 2)
+    assert points[-1]['end'] == '2024-01-31'
+    assert sum(point['expense_count'] for point in points) == 3
+
+    points = auth_client.get(url, {**params, 'group': 'category'}).data['data']['points']
+    assert [(point['category_name'], point['total_expenses']) for point in points] == [
+        ('Transport', '20.00'), ('Food', '15.00'),
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', [
+    {'group': 'day'}, {'from': '2024-13'}, {'from': '2024-03', 'to': '2024-01'}, {'from': '2010-01', 'to': '2024-01'},
+])
+def test_trend_report_invalid_parameters(auth_client, params):
+    """Test that an unknown group or an invalid, inverted or too long range is refused."""
+    response = auth_client.get(reverse('api:reports:trends'), params)
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_spending_insights(auth_client, test_user, food_category, transport_category, django_assert_num_queries):
+    """
+    Test that the insights flag the expense far off its category's usual amounts, report the category
+    percentiles and the moving averages up to today, from one query for the expenses and one for the categories.
+    """
+    today = date.today()
+    food = [Expense(user=test_user, amount=Decimal(amount), category=food_category, date=today)
+            for amount in ('10.00', '12.00', '11.00', '9.00', '13.00', '250.00')]
+    Expense.objects.bulk_create(food)
+    Expense.objects.create(user=test_user, amount=Decimal('40.00'), category=transport_category, date=today)
+    Expense.objects.create(user=test_user, amount=Decimal('5.00'), date=today)
+
+    with django_assert_num_queries(3):
+        response = auth_client.get(reverse('api:reports:insights'))
+    assert response.status_code == 200
+    data = response.data['data']
+    assert (data['end'], data['expense_count'], data['total_expenses']) == (today.isoformat(), 8, '350.00')
+
+    categories = {category['category_name']: category for category in data['categories']}
+    assert list(categories) == ['Food', 'Transport', None]
+    assert (categories['Food']['p50'], categories['Food']['p90'], categories['Food']['share']) == \
+        ('11.50', '131.50', 0.8714)
+    assert [anomaly['amount'] for anomaly in data['anomalies']] == ['250.00']
+    assert data['anomalies'][0]['score'] > 3.5
+
+    latest = data['moving_averages'][-1]
+    assert (latest['date'], latest['total']) == (today.isoformat(), '350.00')
+    assert len(data['moving_averages']) == 30
+    assert len(data['seasonality']['weekday']) == 7 and len(data['seasonality']['month']) == 12
+
+
+@pytest.mark.django_db
+def test_spending_insights_invalid_range(auth_client):
+    """Test that a range starting in the future is refused."""
+    next_year = date.today().year + 1
+    response = auth_client.get(reverse('api:reports:insights'), {'from': f'{next_year}-01', 'to': f'{next_year}-02'})
+    assert response.status_code == 400
+
+
 @pytest.mark.django_db
 def test_expense_report_unauthenticated(client, expense_monthly_url, expense_category_url, monthly_statistics_url):
     """
@@ -174,3 +304,453 @@ def test_expense_report_unauthenticated(client, expense_monthly_url, expense_cat
     assert response_monthly.status_code == 401
     assert response_category.status_code == 401
     assert response_statistics.status_code == 401
+
+
+@pytest.mark.django_db
+def test_expense_category_report_summary_mode(auth_client, expense_category_url, expenses, test_user,
+                                              food_category):
+    """
+    Test retrieving the per-category summary of the current month's expenses.
+    """
+    Expense.objects.create(user=test_user, amount=Decimal('20.00'), category=food_category)
+
+    response = auth_client.get(expense_category_url, {'mode': 'summary'})
+
+    assert response.status_code == 200
+    food = response.data['data']['Food']
+    assert Decimal(food['total']) == Decimal('120.00')
+    assert food['count'] == 2
+    assert Decimal(food['minimum']) == Decimal('20.00')
+    assert Decimal(food['maximum']) == Decimal('100.00')
+    assert Decimal(food['average']) == Decimal('60.00')
+    assert response.data['data']['Transport']['count'] == 1
+
+
+@pytest.mark.django_db
+def test_expense_category_report_invalid_mode(auth_client, expense_category_url, expenses):
+    """
+    Test that an unknown report mode is rejected.
+    """
+    response = auth_client.get(expense_category_url, {'mode': 'everything'})
+
+    assert response.status_code == 400
+    assert 'mode' in response.data['errors']
+
+
+@pytest.mark.django_db
+def test_expense_category_report_query_count(auth_client, expense_category_url, expenses, test_user,
+                                             food_category, django_assert_max_num_queries):
+    """
+    Test that the categorized report does not issue a query per expense.
+    """
+    for _ in range(10):
+        Expense.objects.create(user=test_user, amount=Decimal('1.00'), category=food_category)
+
+    # Authentication lookup plus a single joined query for the expenses
+    with django_assert_max_num_queries(2):
+        response = auth_client.get(expense_category_url)
+
+    assert response.status_code == 200
+    assert len(response.data['data']['Food']) == 11
+
+
+@pytest.mark.django_db
+def test_reports_for_past_month(auth_client, expense_monthly_url, expense_category_url, monthly_statistics_url,
+                                expenses, test_user):
+    """
+    Test that the `year` and `month` parameters select a past month across the year boundary.
+    """
+    Expense.objects.filter(pk=expenses[0].pk).update(date=date(2023, 12, 15))
+    MonthlyRollup.objects.rebuild([test_user.pk])
+    params = {'year': 2023, 'month': 12}
+
+    response = auth_client.get(expense_monthly_url, params)
+    assert response.status_code == 200
+    assert [Decimal(item['amount']) for item in response.data['data']['results']] == [Decimal('100.00')]
+
+    response = auth_client.get(expense_category_url, params)
+    assert response.status_code == 200
+    assert list(response.data['data']) == ['Food']
+
+    response = auth_client.get(monthly_statistics_url, params)
+    assert response.status_code == 200
+    assert Decimal(response.data['data']['total_expenses']) == Decimal('100.00')
+    assert Decimal(response.data['data']['average_daily_expense']) == Decimal('3.23')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', [{'year': 2024}, {'year': 2024, 'month': 13}, {'year': 'x', 'month': 1}])
+def test_reports_invalid_period(auth_client, expense_monthly_url, expense_category_url, monthly_statistics_url,
+                                params):
+    """
+    Test that incomplete or invalid `year` and `month` parameters are rejected with HTTP 400.
+    """
+    for url in (expense_monthly_url, expense_category_url, monthly_statistics_url):
+        response = auth_client.get(url, params)
+        assert response.status_code == 400
+        assert 'period' in response.data['errors']
+
+
+@pytest.mark.django_db
+def test_expense_monthly_report_cursor_pagination(auth_client, expense_monthly_url, test_user, food_category):
+    """
+    Test walking the monthly report forwards and backwards with the cursor links,
+    including expenses sharing the same date.
+    """
+    created = [
+        Expense.objects.create(user=test_user, amount=Decimal(amount), category=food_category)
+        for amount in ('1.00', '2.00', '3.00', '4.00', '5.00')
+    ]
+    expected_ids = [expense.id for expense in reversed(created)]
+
+    seen_ids = []
+    pages = []
+    url = f"{expense_monthly_url}?page_size=2"
+    while url:
+        response = auth_client.get(url)
+        assert response.status_code == 200
+        pages.append(response.data['data'])
+        seen_ids += [item['id'] for item in response.data['data']['results']]
+        url = response.data['data']['next']
+
+    assert seen_ids == expected_ids
+    assert [len(page['results']) for page in pages] == [2, 2, 1]
+    assert pages[0]['previous'] is None
+
+    # Going back from the last page returns the middle page
+    response = auth_client.get(pages[-1]['previous'])
+    assert [item['id'] for item in response.data['data']['results']] == expected_ids[2:4]
+    assert response.data['data']['next'] == pages[1]['next']
+
+
+@pytest.mark.django_db
+def test_expense_monthly_report_invalid_cursor(auth_client, expense_monthly_url, expenses):
+    """
+    Test that a malformed cursor is rejected with HTTP 400.
+    """
+    response = auth_client.get(expense_monthly_url, {'cursor': 'not-a-cursor'})
+
+    assert response.status_code == 400
+    assert 'cursor' in response.data['errors']
+
+
+@pytest.mark.django_db
+def test_report_cache_hit_and_invalidation(auth_client, monthly_statistics_url, expenses, test_user,
+                                           food_category, django_assert_num_queries,
+                                           django_capture_on_commit_callbacks):
+    """
+    Test that repeated report requests are served from the cache without querying the reports
+    and that a new expense invalidates the cached statistics.
+    """
+    response = auth_client.get(monthly_statistics_url)
+    assert response['X-Cache'] == 'MISS'
+
+    # Only the authentication lookup of the user remains
+    with django_assert_num_queries(1):
+        response = auth_client.get(monthly_statistics_url)
+    assert response['X-Cache'] == 'HIT'
+    assert Decimal(response.data['data']['total_expenses']) == Decimal('150.00')
+
+    # The data version is bumped once the transaction commits
+    with django_capture_on_commit_callbacks(execute=True):
+        Expense.objects.create(user=test_user, amount=Decimal('25.00'), category=food_category)
+
+    response = auth_client.get(monthly_statistics_url)
+    assert response['X-Cache'] == 'MISS'
+    assert Decimal(response.data['data']['total_expenses']) == Decimal('175.00')
+    assert get_metrics() == {'hits': 1, 'misses': 2, 'hit_ratio': 1 / 3}
+
+
+@pytest.mark.django_db
+def test_report_cache_invalidated_by_bulk_writes(auth_client, monthly_statistics_url, expenses, test_user,
+                                                 food_category, django_capture_on_commit_callbacks):
+    """
+    Test that the writes sending no post_save, bulk created expenses and the monthly rollover,
+    still invalidate the cached reports through the signals the reports receive.
+    """
+    from expenses.signals import expenses_bulk_created
+    from income.models import BalanceRolloverRun
+    from income.signals import balances_rolled_over
+
+    assert auth_client.get(monthly_statistics_url)['X-Cache'] == 'MISS'
+    with django_capture_on_commit_callbacks(execute=True):
+        expenses_bulk_created.send(sender=Expense, user=test_user, expenses=[])
+    assert auth_client.get(monthly_statistics_url)['X-Cache'] == 'MISS'
+    with django_capture_on_commit_callbacks(execute=True):
+        balances_rolled_over.send(sender=BalanceRolloverRun, period=date(2024, 5, 1))
+    assert auth_client.get(monthly_statistics_url)['X-Cache'] == 'MISS'
+    assert auth_client.get(monthly_statistics_url)['X-Cache'] == 'HIT'
+
+
+@pytest.mark.django_db
+def test_report_cache_keys_and_bypass(auth_client, expense_monthly_url, expense_category_url, expenses):
+    """
+    Test that the cache key follows the view and its parameters, and that the bypass header
+    recomputes the report.
+    """
+    assert auth_client.get(expense_category_url)['X-Cache'] == 'MISS'
+    assert auth_client.get(expense_category_url, {'mode': 'summary'})['X-Cache'] == 'MISS'
+    assert auth_client.get(expense_monthly_url)['X-Cache'] == 'MISS'
+    assert auth_client.get(expense_category_url, {'mode': 'summary'})['X-Cache'] == 'HIT'
+
+    response = auth_client.get(expense_category_url, HTTP_X_CACHE_BYPASS='1')
+    assert response['X-Cache'] == 'BYPASS'
+    assert 'Food' in response.data['data']
+
+    # Errors are never cached
+    assert auth_client.get(expense_category_url, {'mode': 'bogus'})['X-Cache'] == 'MISS'
+    assert auth_client.get(expense_category_url, {'mode': 'bogus'})['X-Cache'] == 'MISS'
+
+
+@pytest.mark.django_db
+def test_report_conditional_get(auth_client, expense_category_url, expenses, test_user, food_category,
+                                django_assert_num_queries, django_capture_on_commit_callbacks):
+    """
+    Test that a report answers a current If-None-Match with 304 before querying anything,
+    and with a fresh ETag once the data changed.
+    """
+    response = auth_client.get(expense_category_url)
+    etag = response['ETag']
+    assert response.status_code == 200
+
+    # Only the authentication lookup of the user remains
+    with django_assert_num_queries(1):
+        response = auth_client.get(expense_category_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+
+    # Another view of the same data is a different representation
+    response = auth_client.get(expense_category_url, {'mode': 'summary'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Expense.objects.create(user=test_user, amount=Decimal('25.00'), category=food_category)
+
+    response = auth_client.get(expense_category_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+    assert len(response.data['data']['Food']) == 2
+
+
+@pytest.fixture
+def expense_export_url():
+    """Fixture for the expense export URL."""
+    return reverse('api:reports:expense-export')
+
+
+@pytest.mark.django_db
+def test_expense_export_csv(auth_client, expense_export_url, expenses):
+    """
+    Test streaming the expense history as CSV, oldest first.
+    """
+    Expense.objects.filter(pk=expenses[0].pk).update(date=date(2020, 1, 31), description='Groceries, weekly')
+
+    response = auth_client.get(expense_export_url)
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert response['Content-Type'] == 'text/csv; charset=utf-8'
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    assert lines[0] == 'id,date,amount,category,description'
+    assert lines[1] == f'{expenses[0].pk},2020-01-31,100.00,Food,"Groceries, weekly"'
+    assert lines[2].startswith(f'{expenses[1].pk},{date.today().isoformat()},50.00,Transport,')
+
+
+@pytest.mark.django_db
+def test_expense_export_ndjson_date_range(auth_client, expense_export_url, expenses):
+    """
+    Test streaming the expenses of a date range as newline-delimited JSON.
+    """
+    Expense.objects.filter(pk=expenses[0].pk).update(date=date(2020, 1, 31))
+
+    response = auth_client.get(expense_export_url, {'format': 'ndjson', 'from': '2020-01-01', 'to': '2020-12-31'})
+
+    assert response.status_code == 200
+    assert response['Content-Disposition'] == 'attachment; filename="expenses-2020-01-01-2020-12-31.ndjson"'
+    rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+    assert rows == [{'id': expenses[0].pk, 'date': '2020-01-31', 'amount': '100.00', 'category': 'Food',
+                     'description': None}]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('params', [
+    {'format': 'xml'},
+    {'from': '31/01/2020'},
+    {'from': '2020-02-01', 'to': '2020-01-01'},
+])
+def test_expense_export_invalid_options(auth_client, expense_export_url, params):
+    """
+    Test that unsupported formats and invalid dates are rejected with HTTP 400.
+    """
+    response = auth_client.get(expense_export_url, params)
+
+    assert response.status_code == 400
+    assert response['Content-Type'] == 'application/json'
+
+
+@pytest.mark.django_db
+def test_benchmark_expense_export_command(test_user, expenses):
+    """
+    Test that the export benchmark measures both the streaming and the serializer runs.
+    """
+    out = StringIO()
+    call_command('benchmark_expense_export', test_user.pk, stdout=out)
+
+    assert 'Exporting 2 expenses' in out.getvalue()
+    assert 'streaming export' in out.getvalue()
+    assert 'ExpenseSerializer' in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_benchmark_analytics_command(test_user, food_category):
+    """
+    Test that the analytics benchmark times both implementations and that the naive loop agrees with the
+    vectorized insights on a varied history.
+    """
+    Expense.objects.bulk_create(
+        Expense(user=test_user, amount=Decimal(f'{(index * 37) % 101 + 1}.{index % 100:02d}'),
+                category=food_category if index % 3 else None, date=date(2024, 1, 1 + index % 28))
+        for index in range(200)
+    )
+    out = StringIO()
+    call_command('benchmark_analytics', test_user.pk, repeat=1, stdout=out)
+
+    assert 'Analysing 200 expenses' in out.getvalue()
+    assert 'naive loop' in out.getvalue()
+    assert 'results match' in out.getvalue()
+
+
+@pytest.fixture
+def eager_celery(monkeypatch):
+    """Fixture running Celery tasks synchronously in the test process."""
+    monkeypatch.setattr(celery_app.conf, 'task_always_eager', True)
+    monkeypatch.setattr(celery_app.conf, 'task_eager_propagates', True)
+
+
+@pytest.fixture
+def export_media_root(settings, tmp_path):
+    """Fixture writing the export files to a temporary MEDIA_ROOT."""
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_export_job_lifecycle(auth_client, expenses, eager_celery, export_media_root,
+                              django_capture_on_commit_callbacks):
+    """
+    Test queuing an export job, polling it and downloading its compressed file.
+    """
+    with django_capture_on_commit_callbacks(execute=True):
+        response = auth_client.post(reverse('api:reports:export-job-create'), {'format': 'csv'})
+    assert response.status_code == 202
+    job_id = response.data['data']['id']
+
+    response = auth_client.get(reverse('api:reports:export-job-detail', kwargs={'pk': job_id}))
+    assert response.status_code == 200
+    job = response.data['data']
+    assert job['status'] == ExportJob.COMPLETED
+    assert job['progress'] == 100.0
+    assert (job['total_rows'], job['exported_rows']) == (2, 2)
+    assert job['download_url'].endswith(f'/exports/{job_id}/download/')
+
+    response = auth_client.get(job['download_url'])
+    assert response.status_code == 200
+    lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+    assert lines[0] == 'id,date,amount,category,description'
+    assert [line.split(',')[0] for line in lines[1:]] == [str(expense.pk) for expense in expenses]
+
+
+@pytest.mark.django_db
+def test_export_job_resumes_from_checkpoint(settings, monkeypatch, test_user, food_category, export_media_root):
+    """
+    Test that an interrupted export resumes after its last checkpoint, discarding the bytes
+    written past it, without duplicating or losing rows.
+    """
+    settings.EXPORT_JOB_CHUNK_SIZE = 2
+    settings.EXPORT_JOB_TIME_BUDGET = 0
+    created = [Expense.objects.create(user=test_user, amount=Decimal(i), category=food_category) for i in range(1, 6)]
+    job = ExportJob.objects.create(user=test_user, format=ExportJob.NDJSON)
+
+    # Keep the continuations from running, each call then writes a single chunk
+    monkeypatch.setattr(run_export_job, 'delay', lambda *args: None)
+    run_export_job(job.pk)
+    job.refresh_from_db()
+    assert (job.status, job.exported_rows, job.last_expense_id) == (ExportJob.RUNNING, 2, created[1].pk)
+
+    # A crashed attempt left a partial chunk after the checkpoint
+    with open(job.file.path, 'ab') as export_file:
+        export_file.write(b'garbage')
+
+    run_export_job(job.pk)
+    run_export_job(job.pk)
+    job.refresh_from_db()
+    assert (job.status, job.exported_rows, job.progress) == (ExportJob.COMPLETED, 5, 100.0)
+
+    with gzip.open(job.file.path) as export_file:
+        rows = [json.loads(line) for line in export_file]
+    assert [row['id'] for row in rows] == [expense.pk for expense in created]
+
+
+@pytest.mark.django_db
+def test_export_job_failure_hides_exception(auth_client, monkeypatch, test_user, export_media_root):
+    """
+    Test that a failed export reports a generic error rather than the message of the exception.
+    """
+    job = ExportJob.objects.create(user=test_user)
+
+    def fail(*args):
+        raise OSError("/srv/media/exports/secret: No space left on device")
+    monkeypatch.setattr('reports.tasks._export_chunks', fail)
+    with pytest.raises(OSError):
+        run_export_job(job.pk)
+
+    response = auth_client.get(reverse('api:reports:export-job-detail', kwargs={'pk': job.pk}))
+    assert response.data['data']['status'] == ExportJob.FAILED
+    assert response.data['data']['error'] == ExportJob.FAILURE_MESSAGE
+
+
+@pytest.mark.django_db
+def test_export_job_access(auth_client, test_user, export_media_root):
+    """
+    Test that pending exports cannot be downloaded and that jobs of other users are hidden.
+    """
+    other_user = User.objects.create_user(email='other@example.com', password='testpassword', username='other')
+    job = ExportJob.objects.create(user=test_user)
+    other_job = ExportJob.objects.create(user=other_user)
+
+    response = auth_client.get(reverse('api:reports:export-job-download', kwargs={'pk': job.pk}))
+    assert response.status_code == 409
+
+    response = auth_client.get(reverse('api:reports:export-job-detail', kwargs={'pk': job.pk}))
+    assert response.data['data']['status'] == ExportJob.PENDING
+    assert response.data['data']['download_url'] is None
+
+    response = auth_client.get(reverse('api:reports:export-job-detail', kwargs={'pk': other_job.pk}))
+    assert response.status_code == 404
+
+    response = auth_client.post(reverse('api:reports:export-job-create'),
+                                {'format': 'csv', 'start_date': '2024-02-01', 'end_date': '2024-01-01'})
+    assert response.status_code == 400
+    assert 'end_date' in response.data['errors']
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('url_name, params', [
+    ('api:reports:expense-monthly-report', {}),
+    ('api:reports:expense-monthly-by-category-report', {}),
+    ('api:reports:expense-monthly-by-category-report', {'mode': 'summary'}),
+])
+def test_report_queries_do_not_grow_with_rows(auth_client, expenses, test_user, food_category, transport_category,
+                                              assert_constant_queries, url_name, params):
+    """
+    Test that the expense reports render any number of expenses with the same number of queries.
+    """
+    def render():
+        response = auth_client.get(reverse(url_name), params, HTTP_X_CACHE_BYPASS='1')
+        assert response.status_code == 200
+
+    def add_rows():
+        for category in (food_category, transport_category, None):
+            Expense.objects.create(user=test_user, amount=Decimal('5.00'), category=category)
+
+    assert_constant_queries(render, add_rows)
@@ -4,7 +4,7 @@ from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from .models import Profile
+from .models import LedgerEntry, LoginActivity, Profile
 
 UserAccount = get_user_model()
 
@@ -63,6 +63,14 @@ class UserAccountAdmin(BaseUserAdmin):
             return True
         return False
 
+    def save_model(self, request, obj, form, change):
+        """
+        Create the profile and income of users added here, in the transaction of the admin view.
+        """
+        super().save_model(request, obj, form, change)
+        if not change:
+            UserAccount.objects.provision(obj)
+
 
 # Register the ProfileAdmin as well
 @admin.register(Profile)
@@ -93,3 +101,40 @@ class ProfileAdmin(admin.ModelAdmin):
         if obj is not None:
             return False  # Disable editing of existing profiles
         return True
+
+
+@admin.register(LoginActivity)
+class LoginActivityAdmin(admin.ModelAdmin):
+    """
+    Read-only admin view of the login history, which is append-only.
+    """
+    list_display = ('user', 'ip_address', 'created_at')
+    list_select_related = ('user',)
+    search_fields = ('user__username', 'user__email', 'ip_address')
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    """
+    Read-only admin view of the ledger, entries are only ever appended by the application.
+    """
+    list_display = ('user', 'kind', 'amount', 'balance', 'source_type', 'source_id', 'created_at')
+    list_filter = ('kind', 'source_type')
+    list_select_related = ('user',)
+    search_fields = ('user__username', 'user__email')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -1,6 +1,11 @@
 from django.contrib.auth import get_user_model
-from django.db import transaction
+from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.signals import user_logged_in
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from djoser.conf import settings as djoser_settings
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer as BaseTokenObtainPairSerializer
 
 from ..models import Profile
 
@@ -12,9 +17,10 @@ class UserProfileSerializer(serializers.ModelSerializer):
     # Serialize fields from the User model directly
     first_name = serializers.CharField(source="user.first_name", required=False)
     last_name = serializers.CharField(source="user.last_name", required=False)
-    email = serializers.EmailField(source="user.email", read_only=True)
-    username = serializers.CharField(source="user.username", read_only=True)
+    email = serializers.EmailField(source="user.email")
+    username = serializers.CharField(source="user.username")
     password = serializers.CharField(write_only=True, required=True, source="user.password")
+    re_password = serializers.CharField(write_only=True, required=False, help_text="Retype the password.")
     phone_number = serializers.CharField(source="user.phone_number", required=False)
 
     # Fields from the Profile model
@@ -29,7 +35,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = Profile
         fields = [
-            "username", "email", "password", "first_name", "last_name",
+            "username", "email", "password", "re_password", "first_name", "last_name",
             "phone_number", "profile_pic", "balance",
         ]
 
@@ -54,24 +60,41 @@ class UserProfileSerializer(serializers.ModelSerializer):
             )
         return value
 
+    def validate(self, attrs):
+        """On registration, check that the password is retyped and passes the password validators."""
+        if self.instance is None:
+            user_data = attrs.get("user", {})
+            password = user_data.get("password")
+            if attrs.pop("re_password", None) != password:
+                raise serializers.ValidationError({"re_password": "The two password fields didn't match."})
+            try:
+                validate_password(password, User(**user_data))
+            except DjangoValidationError as e:
+                raise serializers.ValidationError({"password": list(e.messages)})
+        return attrs
+
     def create(self, validated_data):
-        """Create a new user and their profile."""
+        """
+        Create a new user, whose profile create_user provisions along with their income.
+        Users are created inactive when djoser sends an activation email, without saving them twice.
+        """
         user_data = validated_data.pop("user")
         profile_pic = validated_data.pop("profile_pic", None)
-
-        with transaction.atomic():
-            # Create the User instance
-            user = User.objects.create_user(**user_data)
-            user.set_password(user_data["password"])
-            user.save()
-
-            # Create the Profile instance
-            profile = Profile.objects.create(user=user, **validated_data)
-
-            # Attach profile_pic if provided
-            if profile_pic:
-                profile.profile_pic = profile_pic
-                profile.save()
+        if djoser_settings.SEND_ACTIVATION_EMAIL:
+            user_data["is_active"] = False
+
+        try:
+            with transaction.atomic():
+                # create_user hashes the password and creates the Profile and Income in the same transaction
+                user = User.objects.create_user(**user_data)
+                profile = user.profile
+
+                # Attach profile_pic if provided
+                if profile_pic:
+                    profile.profile_pic = profile_pic
+                    profile.save(update_fields=["profile_pic"])
+        except IntegrityError:
+            raise serializers.ValidationError({"email": "A user with this email or username already exists."})
 
         return profile
 
@@ -79,6 +102,10 @@ class UserProfileSerializer(serializers.ModelSerializer):
         """Update the user's profile and associated user fields."""
         user_data = validated_data.pop("user", {})
         profile_pic = validated_data.pop("profile_pic", None)
+        validated_data.pop("re_password", None)
+        # The email and the username are only set on registration
+        user_data.pop("email", None)
+        user_data.pop("username", None)
 
         # Update User fields
         user = self.context["request"].user
@@ -100,5 +127,14 @@ class UserProfileSerializer(serializers.ModelSerializer):
         return instance
 
 
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    """Token serializer sending user_logged_in once the credentials are valid."""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        user_logged_in.send(sender=self.user.__class__, request=self.context.get("request"), user=self.user)
+        return data
+
+
 class RefreshTokenSerializer(serializers.Serializer):
     refresh = serializers.CharField(required=True, help_text="Refresh token to be blacklisted")
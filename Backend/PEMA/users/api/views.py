@@ -1,5 +1,8 @@
 from logging import getLogger
 
+from djoser import signals
+from djoser.compat import get_user_email
+from djoser.conf import settings as djoser_settings
 from djoser.views import UserViewSet as BaseUserViewSet
 from drf_spectacular.utils import OpenApiResponse, extend_schema
 from rest_framework import status
@@ -13,17 +16,24 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView as BaseTokenVerifyView, TokenBlacklistView,
 )
 
-from PEMA.utils.response_wrapper import custom_response
+from PEMA.utils.response_wrapper import ConditionalGetMixin, custom_response
+from reports.cache import get_data_version
 from .serializers import UserProfileSerializer, RefreshTokenSerializer
 
 logger = getLogger(__name__)
 
 
-class UserViewSet(BaseUserViewSet):
+class UserViewSet(ConditionalGetMixin, BaseUserViewSet):
     """
     View for managing user actions including profile operations and authentication flows.
     """
 
+    def get_etag_version(self, request):
+        """Only the current user's profile is conditional, it follows the user's data version."""
+        if self.action != "me":
+            return None
+        return get_data_version(request.user.pk)
+
     @extend_schema(
         operation_id="user_me_retrieve",
         description="Retrieve the authenticated user's profile.",
@@ -31,6 +41,7 @@ class UserViewSet(BaseUserViewSet):
         methods=['GET'],
         responses={
             200: UserProfileSerializer,
+            304: OpenApiResponse(description="Not modified, the `If-None-Match` ETag is still current."),
             400: OpenApiResponse(description="Invalid request."),
         }
     )
@@ -173,6 +184,18 @@ class UserViewSet(BaseUserViewSet):
                 status_code=500,
             )
 
+    def perform_create(self, serializer, *args, **kwargs):
+        """UserProfileSerializer saves the new user's profile, announce and email the user as djoser does."""
+        user = serializer.save(*args, **kwargs).user
+        signals.user_registered.send(sender=self.__class__, user=user, request=self.request)
+
+        context = {"user": user}
+        to = [get_user_email(user)]
+        if djoser_settings.SEND_ACTIVATION_EMAIL:
+            djoser_settings.EMAIL.activation(self.request, context).send(to)
+        elif djoser_settings.SEND_CONFIRMATION_EMAIL:
+            djoser_settings.EMAIL.confirmation(self.request, context).send(to)
+
     @extend_schema(
         operation_id="user_activate",
         description="Activate a user account using the activation key.",
@@ -1,5 +1,6 @@
 from django.apps import AppConfig
 from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
 from simple_history import register
 
 
@@ -11,5 +12,8 @@ class UsersConfig(AppConfig):
         import users.signals
         User = get_user_model()
 
+        # Logins are recorded by users.signals.record_login, drop Django's save of last_login
+        user_logged_in.disconnect(dispatch_uid='update_last_login')
+
         # Add historical records field to track changes
         register(User)
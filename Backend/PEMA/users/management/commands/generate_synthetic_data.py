@@ -0,0 +1,146 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from random import Random
+from time import monotonic
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries, transaction
+from django.utils import timezone
+
+# Spending profile of each category: name, description, share of the expenses and the
+# (mu, sigma) of the log-normal distribution of their amounts. Rent is paid once a month instead.
+CATEGORY_PROFILES = [
+    ("Rent", "Monthly or regular payments for housing or office spaces.", 0, (6.6, 0.3)),
+    ("Food", "Expenses for meals, groceries, snacks, and dining out.", 45, (2.8, 0.7)),
+    ("Transportation", "Costs related to getting from one place to another, such as bus fares, taxi rides, "
+                       "or fuel expenses.", 20, (2.5, 0.6)),
+    ("Medical", "Medical-related expenses, including doctor's visits, medication, therapy, and hospital fees.",
+     5, (4.0, 0.9)),
+    ("Utilities", "Electricity, water, internet and phone bills.", 8, (4.2, 0.4)),
+    ("Entertainment", "Movies, concerts, subscriptions and hobbies.", 12, (3.2, 0.8)),
+    ("Shopping", "Clothes, electronics and household items.", 10, (3.8, 1.0)),
+]
+
+
+def money(value):
+    """Rounds a generated float amount to a Decimal with two decimal places."""
+    return Decimal(f"{value:.2f}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users with profiles, incomes and years of expenses for load testing. "
+        "Rows are inserted with bulk_create, so no signal runs per row, and the same seed always "
+        "produces the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help="Number of users to create")
+        parser.add_argument('--expenses', type=int, default=10000, help="Total number of expenses to create")
+        parser.add_argument('--years', type=int, default=3, help="Number of years the expenses span")
+        parser.add_argument(
+            '--end-date', type=date.fromisoformat,
+            help="Last date of the generated expenses (YYYY-MM-DD), defaults to today",
+        )
+        parser.add_argument('--seed', type=int, default=42, help="Seed of the random generator")
+        parser.add_argument('--batch-size', type=int, default=10000, help="Rows inserted per bulk_create batch")
+        parser.add_argument(
+            '--prefix', default='synthetic',
+            help="Prefix of the generated emails and usernames, e.g. synthetic17@example.com",
+        )
+        parser.add_argument(
+            '--password', default='synthetic-password',
+            help="Password of every generated user, hashed once",
+        )
+
+    def handle(self, *args, **options):
+        from expenses.models import Category, Expense, MonthlyRollup
+        User = get_user_model()
+        rng = Random(options['seed'])
+        batch_size = options['batch_size']
+        prefix = options['prefix']
+        today = options['end_date'] or timezone.localdate()
+        first_day = today - timedelta(days=365 * options['years'])
+        started = monotonic()
+
+        if options['users'] < 1:
+            raise CommandError("--users must be at least 1")
+        if options['expenses'] < 0 or options['years'] < 1 or batch_size < 1:
+            raise CommandError("--expenses must not be negative, --years and --batch-size must be at least 1")
+
+        if User.objects.filter(email__startswith=prefix, email__endswith='@example.com').exists():
+            raise CommandError(f"Users with the prefix '{prefix}' already exist, choose another --prefix")
+
+        # Step 1: Categories
+        categories = []
+        for name, description, weight, amounts in CATEGORY_PROFILES:
+            category, _ = Category.objects.get_or_create(name=name, defaults={"description": description})
+            categories.append((category.pk, weight, amounts))
+        rent_category_id = categories[0][0]
+        spending = [(category_id, amounts) for category_id, weight, amounts in categories if weight]
+        spending_weights = [weight for _, weight, _ in categories if weight]
+
+        # Step 2: Users with their profiles and incomes, created in bulk without any per-row signal
+        password = make_password(options['password'])
+        user_ids = []
+        for first in range(0, options['users'], batch_size):
+            indexes = range(first, min(first + batch_size, options['users']))
+            incomes = [money(rng.lognormvariate(7.8, 0.4)) for _ in indexes]
+            users = User.objects.bulk_create_users(
+                [User(email=f"{prefix}{index}@example.com", username=f"{prefix}{index}", password=password)
+                 for index in indexes],
+                incomes=incomes, balances=[income * 3 for income in incomes], batch_size=batch_size,
+            )
+            user_ids += [user.pk for user in users]
+            reset_queries()
+        self.stdout.write(f"Created {len(user_ids)} users with profiles and incomes")
+
+        # Step 3: Expenses, split unevenly between users like real activity is
+        activity = [rng.paretovariate(1.5) for _ in user_ids]
+        total_activity = sum(activity)
+        counts = [int(options['expenses'] * weight / total_activity) for weight in activity]
+        for index in range(options['expenses'] - sum(counts)):
+            counts[index % len(counts)] += 1
+
+        span_days = (today - first_day).days
+        buffer = []
+        created = 0
+
+        def flush():
+            nonlocal created
+            with transaction.atomic():
+                Expense.objects.bulk_create(buffer, batch_size=batch_size)
+            created += len(buffer)
+            buffer.clear()
+            reset_queries()  # With DEBUG on, the logged INSERT statements would pile up in memory
+            elapsed = monotonic() - started
+            self.stdout.write(f"Created {created}/{options['expenses']} expenses ({created / elapsed:.0f} rows/s)")
+
+        for user_id, count in zip(user_ids, counts):
+            # Rent comes first each month, the rest is spread over the whole period
+            months = min(count // 10, options['years'] * 12)
+            rent = money(rng.lognormvariate(*CATEGORY_PROFILES[0][3]))
+            month_start = date(today.year, today.month, 1)
+            for _ in range(months):
+                buffer.append(Expense(user_id=user_id, amount=rent, category_id=rent_category_id,
+                                      date=month_start, description="Monthly rent"))
+                month_start = (month_start - timedelta(days=1)).replace(day=1)
+
+            for category_id, (mu, sigma) in rng.choices(spending, weights=spending_weights, k=count - months):
+                buffer.append(Expense(user_id=user_id, amount=money(max(0.5, rng.lognormvariate(mu, sigma))),
+                                      category_id=category_id,
+                                      date=first_day + timedelta(days=rng.randint(0, span_days))))
+
+            if len(buffer) >= batch_size:
+                flush()
+        if buffer:
+            flush()
+
+        # Step 4: Monthly rollups, which bulk_create did not maintain
+        for first in range(0, len(user_ids), 500):
+            MonthlyRollup.objects.rebuild(user_ids[first:first + 500])
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(user_ids)} users and {created} expenses in {monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,62 @@
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+# Columns read from the CSV file, only email and username are required
+COLUMNS = ('email', 'username', 'first_name', 'last_name', 'phone_number', 'password', 'income')
+
+
+class Command(BaseCommand):
+    help = (
+        "Import users from a CSV file with the columns email, username and optionally first_name, last_name, "
+        "phone_number, password and income. Users, profiles and incomes are inserted in batches, "
+        "users without a password have to reset it before logging in."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file with a header row")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Users inserted per batch")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            with open(options['path'], newline='') as csv_file:
+                rows = list(csv.DictReader(csv_file))
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+        if rows and not {'email', 'username'} <= set(rows[0]):
+            raise CommandError("The CSV file needs at least the email and username columns")
+
+        emails = [User.objects.normalize_email(row['email']) for row in rows]
+        existing = User.objects.filter(email__in=emails).values_list('email', flat=True)
+        if existing:
+            raise CommandError(f"Users already exist for: {', '.join(sorted(existing)[:10])}")
+
+        users, incomes = [], []
+        for line, row in enumerate(rows, start=2):
+            fields = {column: row.get(column) or '' for column in COLUMNS}
+            try:
+                incomes.append(Decimal(fields['income'] or 0))
+            except InvalidOperation:
+                raise CommandError(f"Line {line}: invalid income '{fields['income']}'")
+            users.append(User(
+                email=fields['email'], username=fields['username'], first_name=fields['first_name'],
+                last_name=fields['last_name'], phone_number=fields['phone_number'] or None,
+                # make_password(None) gives an unusable password
+                password=make_password(fields['password'] or None),
+            ))
+
+        created = 0
+        for first in range(0, len(users), options['batch_size']):
+            batch = slice(first, first + options['batch_size'])
+            try:
+                created += len(User.objects.bulk_create_users(
+                    users[batch], incomes=incomes[batch], batch_size=options['batch_size'],
+                ))
+            except IntegrityError as e:
+                raise CommandError(f"Import stopped after {created} users, rows {first + 2} and on: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {created} users with their profiles and incomes"))
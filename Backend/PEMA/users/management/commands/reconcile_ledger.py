@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max, Min
+
+from income.tasks import split_user_id_space
+from users.models import Profile
+
+
+def reconcile_range(after_user_id, up_to_user_id, chunk_size, fix=False):
+    """
+    Compares the balance of the profiles with after_user_id < user_id <= up_to_user_id with their
+    ledger, one query per chunk of users. With fix, a mismatched profile is set to its ledger balance,
+    unless it moved since it was read. Returns the number of profiles checked and the mismatches.
+    """
+    checked = 0
+    mismatches = []
+    last_user_id = after_user_id
+    while last_user_id < up_to_user_id:
+        rows = list(
+            Profile.objects.filter(user_id__gt=last_user_id, user_id__lte=up_to_user_id)
+            .order_by('user_id').with_ledger_balance()
+            .values_list('user_id', 'balance', 'ledger_balance')[:chunk_size]
+        )
+        if not rows:
+            break
+        for user_id, balance, ledger_balance in rows:
+            if balance != ledger_balance:
+                mismatches.append((user_id, balance, ledger_balance))
+                if fix:
+                    Profile.objects.filter(user_id=user_id, balance=balance).update(balance=ledger_balance)
+        checked += len(rows)
+        last_user_id = rows[-1][0]
+    return checked, mismatches
+
+
+def reconcile_range_in_thread(arguments):
+    """Runs reconcile_range in a worker thread, closing the connection the thread opened."""
+    try:
+        return reconcile_range(*arguments)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Verify that the balance of every profile matches its ledger, checking ranges of users in parallel. "
+        "Fails when balances differ, unless --fix sets them to their ledger balance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Ranges of users checked in parallel")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Profiles compared per query")
+        parser.add_argument('--fix', action='store_true', help="Set mismatched balances to their ledger balance")
+
+    def handle(self, *args, **options):
+        started = monotonic()
+        bounds = Profile.objects.aggregate(first=Min('user_id'), last=Max('user_id'))
+        if bounds['first'] is None:
+            self.stdout.write("No profile to reconcile")
+            return
+
+        shards = split_user_id_space(bounds['first'], bounds['last'], options['chunk_size'], options['workers'])
+        arguments = [(after, up_to, options['chunk_size'], options['fix']) for after, up_to in shards]
+        if len(shards) == 1:
+            results = [reconcile_range(*arguments[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                results = list(executor.map(reconcile_range_in_thread, arguments))
+
+        checked = sum(result[0] for result in results)
+        mismatches = [mismatch for result in results for mismatch in result[1]]
+        for user_id, balance, ledger_balance in mismatches[:20]:
+            self.stdout.write(self.style.WARNING(
+                f"User {user_id}: profile balance {balance}, ledger balance {ledger_balance}"
+            ))
+        summary = (f"Checked {checked} profiles in {len(shards)} ranges in {monotonic() - started:.2f}s, "
+                   f"{len(mismatches)} mismatched")
+
+        if mismatches and not options['fix']:
+            raise CommandError(summary)
+        if mismatches:
+            summary += ", set to their ledger balance"
+        self.stdout.write(self.style.SUCCESS(summary))
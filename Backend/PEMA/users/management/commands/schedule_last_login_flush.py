@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django_celery_beat.models import IntervalSchedule, PeriodicTask
+
+
+class Command(BaseCommand):
+    help = "Sets up the periodic task copying the login activity onto the users, for LAST_LOGIN_FLUSH_ASYNC"
+
+    def handle(self, *args, **kwargs):
+        # Define the schedule: every LAST_LOGIN_FLUSH_INTERVAL seconds
+        schedule, _ = IntervalSchedule.objects.get_or_create(
+            every=settings.LAST_LOGIN_FLUSH_INTERVAL,
+            period=IntervalSchedule.SECONDS,
+        )
+
+        # Create or update the periodic task
+        task, created = PeriodicTask.objects.update_or_create(
+            name="Flush of the last logins",
+            defaults={"interval": schedule, "task": "users.tasks.flush_last_logins"},
+        )
+        if created:
+            self.stdout.write(self.style.SUCCESS("Last login flush task created successfully"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Last login flush task updated successfully"))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django_celery_beat.models import CrontabSchedule, PeriodicTask
+
+
+class Command(BaseCommand):
+    help = "Sets up a nightly periodic task appending checkpoints to the users' ledgers"
+
+    def handle(self, *args, **kwargs):
+        # Define the schedule: every night at 3 am, away from the monthly rollover at midnight
+        schedule, _ = CrontabSchedule.objects.get_or_create(
+            minute="0",
+            hour="3",
+            day_of_month="*",
+            month_of_year="*",
+        )
+
+        # Create or update the periodic task
+        task, created = PeriodicTask.objects.update_or_create(
+            name="Nightly ledger checkpoints",
+            defaults={"crontab": schedule, "task": "users.tasks.checkpoint_ledgers"},
+        )
+        if created:
+            self.stdout.write(self.style.SUCCESS("Ledger checkpoint task created successfully"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Ledger checkpoint task updated successfully"))
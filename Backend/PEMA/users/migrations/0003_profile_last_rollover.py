@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-17 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_historicaluseraccount_phone_number_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalprofile',
+            name='last_rollover',
+            field=models.DateField(blank=True, help_text='First day of the last month whose income was credited to the balance.', null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='last_rollover',
+            field=models.DateField(blank=True, help_text='First day of the last month whose income was credited to the balance.', null=True),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.15 on 2026-10-17 19:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_ledgers(apps, schema_editor):
+    """Opens the ledger of every existing profile with its current balance."""
+    Profile = apps.get_model('users', 'Profile')
+    LedgerEntry = apps.get_model('users', 'LedgerEntry')
+    entries = []
+    for user_id, balance in Profile.objects.exclude(balance=0).values_list('user_id', 'balance').iterator():
+        entries.append(LedgerEntry(user_id=user_id, kind='credit' if balance > 0 else 'debit', amount=abs(balance),
+                                   source_type='opening'))
+        if len(entries) == 5000:
+            LedgerEntry.objects.bulk_create(entries)
+            entries = []
+    LedgerEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_login_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('credit', 'Credit'), ('debit', 'Debit'), ('checkpoint', 'Checkpoint')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, help_text='Positive amount, 0 for checkpoints', max_digits=12)),
+                ('source_type', models.CharField(choices=[('expense', 'Expense'), ('income', 'Income change'), ('monthly_income', 'Monthly income'), ('opening', 'Opening balance'), ('adjustment', 'Adjustment'), ('checkpoint', 'Checkpoint')], max_length=20)),
+                ('source_id', models.BigIntegerField(blank=True, help_text='Expense or income behind the entry, or the YYYYMM period of a monthly income', null=True)),
+                ('balance', models.DecimalField(blank=True, decimal_places=2, help_text="Running balance of the user's ledger, stored on checkpoints", max_digits=12, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Ledger entries',
+                'ordering': ['-pk'],
+                'indexes': [models.Index(fields=['user', 'id'], name='ledgerentry_user_idx'), models.Index(fields=['user', 'kind', 'id'], name='ledgerentry_user_kind_idx'), models.Index(fields=['source_type', 'source_id'], name='ledgerentry_source_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledgers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-17 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_ledger_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalprofile',
+            name='expenses_checkpoint_id',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, help_text='Id of the last expense included in the expenses total.', null=True),
+        ),
+        migrations.AddField(
+            model_name='historicalprofile',
+            name='expenses_total',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, help_text="Sum of the user's expenses up to the checkpointed expense.", max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='expenses_checkpoint_id',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, help_text='Id of the last expense included in the expenses total.', null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='expenses_total',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, help_text="Sum of the user's expenses up to the checkpointed expense.", max_digits=12, null=True),
+        ),
+    ]
@@ -1,43 +1,150 @@
+from datetime import timedelta
+from decimal import Decimal
+
 from django.conf import settings
 from django.contrib.auth.base_user import BaseUserManager, AbstractBaseUser
 from django.contrib.auth.models import PermissionsMixin
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (
+    Case, Count, DecimalField, F, FilteredRelation, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from simple_history.models import HistoricalRecords
+from simple_history.utils import bulk_create_with_history
 
+from expenses.utils import Period
 from users.utils import get_unique_profile_pic_path
 
 
-class ProfileManager(models.Manager):
-    def current_month_statistics(self, user):
+class ProfileQuerySet(models.QuerySet):
+    def with_ledger_balance(self):
+        """
+        Annotates the profiles with the balance of their ledger as `ledger_balance`, and the number
+        of entries appended since their latest checkpoint as `ledger_tail`. The balance is the
+        checkpoint's plus the sum of that tail, so the whole history is never summed.
+        """
+        money = DecimalField(max_digits=12, decimal_places=2)
+        checkpoints = LedgerEntry.objects.filter(
+            user=OuterRef('user_id'), kind=LedgerEntry.CHECKPOINT
+        ).order_by('-pk')
+        tail = LedgerEntry.objects.filter(user=OuterRef('user_id'), pk__gt=OuterRef('ledger_checkpoint_id'))
+
+        return self.annotate(
+            ledger_checkpoint_id=Coalesce(Subquery(checkpoints.values('pk')[:1]), Value(0)),
+        ).annotate(
+            ledger_balance=Coalesce(Subquery(checkpoints.values('balance')[:1]), Value(Decimal('0.00')),
+                                    output_field=money) + Coalesce(
+                Subquery(tail.values('user').annotate(total=Sum(LedgerEntry.signed_amount())).values('total')),
+                Value(Decimal('0.00')), output_field=money,
+            ),
+            ledger_tail=Coalesce(
+                Subquery(tail.values('user').annotate(count=Count('pk')).values('count')), Value(0)
+            ),
+        )
+
+
+class ProfileManager(models.Manager.from_queryset(ProfileQuerySet)):
+    def current_month_statistics(self, user, daily=False):
         """
         Provides the monthly statistics for the given user:
-        - Total monthly expenses
+        - Total monthly expenses and their count
         - Remaining balance
         - Average daily expenditure
+        - Projected month-end expenses and remaining balance, and the burn rate of the income
+        - Daily series of the expenses, if `daily` is set
         """
-        today = timezone.now().date()
-        start_of_month = today.replace(day=1)
-
-        # Get user's expenses for the current month
-        expenses = user.expenses.filter(date__gte=start_of_month)
-        total_expenses = sum(expense.amount for expense in expenses)
+        return self.monthly_statistics(user, Period.current(), daily)
 
-        # Calculate remaining balance
-        income = getattr(user, 'income', None)
-        remaining_balance = (income.amount if income else 0) - total_expenses
+    def monthly_statistics(self, user, period, daily=False):
+        """
+        Provides the same statistics as current_month_statistics for any monthly period, from a single
+        query joining the user's income to the month's rollup buckets, or to the month's expenses grouped
+        by day when the daily series is requested. Past months are projected from all their days,
+        the current one from its elapsed days.
+        """
+        if daily:
+            month_expenses = FilteredRelation('expenses', condition=Q(**period.as_filter('expenses__date')))
+            rows = list(
+                UserAccount.objects.filter(pk=user.pk)
+                .annotate(month_expenses=month_expenses)
+                .values('income__amount', day=F('month_expenses__date'))
+                .annotate(total=Sum('month_expenses__amount'), count=Count('month_expenses__id'))
+                .order_by('day')
+            )
+            # Without any expense in the month, the left join leaves a single row without a day
+            days = {row['day']: row for row in rows if row['day'] is not None}
+            income = (rows[0]['income__amount'] if rows else None) or Decimal('0.00')
+            total_expenses = sum((row['total'] for row in days.values()), Decimal('0.00'))
+            expense_count = sum(row['count'] for row in days.values())
+        else:
+            month_rollups = FilteredRelation(
+                'monthly_rollups', condition=Q(monthly_rollups__year=period.year, monthly_rollups__month=period.month)
+            )
+            rows = list(
+                UserAccount.objects.filter(pk=user.pk)
+                .annotate(month_rollups=month_rollups)
+                .values('income__amount')
+                .annotate(total=Sum('month_rollups__total'), count=Sum('month_rollups__count'))
+                .order_by()
+            )
+            row = rows[0] if rows else {}
+            income = row.get('income__amount') or Decimal('0.00')
+            total_expenses = row.get('total') or Decimal('0.00')
+            expense_count = row.get('count') or 0
 
-        # Calculate average daily expenditure for the current month
-        days_in_month = today.day
-        average_daily_expense = total_expenses / days_in_month if days_in_month > 0 else 0
+        # Calculate the average daily expenditure over the elapsed days of the month, and project it
+        elapsed_days = period.elapsed_days
+        average_daily_expense = total_expenses / elapsed_days if elapsed_days > 0 else Decimal('0.00')
+        projected_expenses = average_daily_expense * period.days if elapsed_days < period.days else total_expenses
 
-        return {
+        stats = {
             "total_expenses": total_expenses,
-            "remaining_balance": remaining_balance,
+            "expense_count": expense_count,
+            "remaining_balance": income - total_expenses,
             "average_daily_expense": average_daily_expense,
+            "projected_total_expenses": projected_expenses,
+            "projected_remaining_balance": income - projected_expenses,
+            # Share of the income the month is on course to spend, above 1 when overspending
+            "burn_rate": projected_expenses / income if income > 0 else None,
         }
+        if daily:
+            stats["daily"] = [
+                {
+                    "date": day,
+                    "total": days[day]['total'] if day in days else Decimal('0.00'),
+                    "count": days[day]['count'] if day in days else 0,
+                }
+                for day in (period.start + timedelta(days=offset) for offset in range(period.days))
+            ]
+        return stats
+
+    def debit(self, user, amount):
+        """
+        Deducts the amount from the user's balance only if the balance covers it.
+        The check and the deduction are a single conditional UPDATE, so concurrent
+        debits can neither lose updates nor overdraw the balance.
+        Returns True if the balance was debited.
+        """
+        return self.filter(user=user, balance__gte=amount).update(balance=models.F('balance') - amount) > 0
+
+    def credit(self, user, amount):
+        """
+        Adds the amount (which may be negative) to the user's balance with a single UPDATE.
+        Returns True if the user's profile exists and was credited.
+        """
+        return self.filter(user=user).update(balance=models.F('balance') + amount) > 0
+
+    def apply_expense_change(self, expense, sign=1):
+        """
+        Adds (sign=1) or removes (sign=-1) an edited or deleted expense from the expenses total
+        checkpointed by Profile.update_balance, if the checkpoint already includes the expense.
+        """
+        self.filter(user_id=expense.user_id, expenses_checkpoint_id__gte=expense.pk).update(
+            expenses_total=models.F('expenses_total') + sign * expense.amount
+        )
 
 
 class Profile(models.Model):
@@ -50,6 +157,7 @@ class Profile(models.Model):
         on_delete=models.CASCADE,
         related_name="profile"
     )
+    # Projection of the user's ledger, moved in the same transactions as the entries are appended
     balance = models.DecimalField(
         max_digits=10,
         decimal_places=2,
@@ -57,6 +165,26 @@ class Profile(models.Model):
         help_text="User's current balance."
     )
     date_created = models.DateTimeField(auto_now_add=True)
+    last_rollover = models.DateField(
+        null=True,
+        blank=True,
+        help_text="First day of the last month whose income was credited to the balance.",
+    )
+    # Checkpoint of update_balance: the sum of the user's expenses up to and including the checkpoint id
+    expenses_total = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Sum of the user's expenses up to the checkpointed expense.",
+    )
+    expenses_checkpoint_id = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Id of the last expense included in the expenses total.",
+    )
     profile_pic = models.ImageField(
         upload_to=get_unique_profile_pic_path,
         blank=True,
@@ -73,15 +201,41 @@ class Profile(models.Model):
         """String representation of the profile object, displaying the associated user's username."""
         return f'Profile of {self.user}'
 
-    def update_balance(self):
+    def update_balance(self, full=False):
         """
         Update the user's balance.
         The balance is calculated as: income - sum of expenses.
+        The sum resumes from the checkpoint stored by the previous call, so only the expenses created
+        since are aggregated, in SQL. With full, or without a checkpoint yet, every expense is summed
+        again, which repairs a checkpoint gone stale, e.g. after expenses were changed with
+        QuerySet.update. The change of balance is appended to the ledger as an adjustment.
+        Returns the new balance.
         """
-        income = getattr(self.user, 'income', None)
-        total_expenses = sum(expense.amount for expense in self.user.expenses.all())
-        self.balance = (income.amount if income else 0) - total_expenses
-        self.save()
+        from expenses.models import Expense
+        from income.models import Income
+
+        with transaction.atomic():
+            # Writers debiting the balance hold this row until their expense is committed, so no
+            # expense with a lower id than the new checkpoint can still appear afterwards
+            stored = Profile.objects.select_for_update().filter(pk=self.pk).values(
+                'balance', 'expenses_total', 'expenses_checkpoint_id'
+            ).get()
+            expenses = Expense.objects.filter(user_id=self.user_id)
+            total, checkpoint_id = Decimal('0.00'), None
+            if not full and stored['expenses_checkpoint_id'] is not None:
+                expenses = expenses.filter(pk__gt=stored['expenses_checkpoint_id'])
+                total, checkpoint_id = stored['expenses_total'], stored['expenses_checkpoint_id']
+            newer = expenses.aggregate(total=Sum('amount'), last_id=models.Max('pk'))
+
+            income = Income.objects.filter(user_id=self.user_id).values_list('amount', flat=True).first()
+            self.expenses_total = total + (newer['total'] or 0)
+            self.expenses_checkpoint_id = newer['last_id'] or checkpoint_id or 0
+            self.balance = (income or 0) - self.expenses_total
+            self.save(update_fields=['balance', 'expenses_total', 'expenses_checkpoint_id'])
+            LedgerEntry.objects.record_change(
+                self.user_id, self.balance - stored['balance'], LedgerEntry.ADJUSTMENT
+            )
+        return self.balance
 
     @property
     def summary(self):
@@ -92,14 +246,92 @@ class Profile(models.Model):
 # Custom User Manager
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
+        """
+        Creates a user along with their Profile and default Income in a single transaction,
+        with one INSERT per row and no further save.
+        """
         if not email:
             raise ValueError(_('The Email field must be set'))
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
         user.set_password(password)
-        user.save(using=self._db)
+        with transaction.atomic(using=self._db):
+            user.save(using=self._db)
+            self.provision(user)
         return user
 
+    def provision(self, user):
+        """Creates the Profile and the default Income of a user who was just saved."""
+        from income.models import Income
+
+        Profile.objects.db_manager(self._db).create(user=user)
+        Income.objects.db_manager(self._db).create(user=user, amount=0, description="Default income")
+
+    def bulk_create_users(self, users, incomes=None, balances=None, batch_size=1000):
+        """
+        Creates many users with their profiles and incomes, for imports.
+        `users` are unsaved instances whose password is already set, `incomes` and `balances`
+        optionally hold each user's income amount and starting balance. Each table, and its
+        historical records, gets one INSERT per batch instead of one per user.
+        Returns the created users.
+        """
+        from income.models import Income
+
+        users = list(users)
+        for user in users:
+            user.email = self.normalize_email(user.email)
+        incomes = incomes if incomes is not None else [0] * len(users)
+        balances = balances if balances is not None else [0] * len(users)
+
+        with transaction.atomic(using=self._db):
+            users = bulk_create_with_history(users, self.model, batch_size=batch_size)
+            if users and users[0].pk is None:
+                # Not every backend returns the primary keys of bulk inserted rows
+                ids = dict(self.filter(email__in=[user.email for user in users]).values_list('email', 'pk'))
+                for user in users:
+                    user.pk = ids[user.email]
+            bulk_create_with_history(
+                [Profile(user=user, balance=balance) for user, balance in zip(users, balances)],
+                Profile, batch_size=batch_size,
+            )
+            bulk_create_with_history(
+                [Income(user=user, amount=amount, description="Default income") for user, amount in zip(users, incomes)],
+                Income, batch_size=batch_size,
+            )
+            LedgerEntry.objects.bulk_create(
+                [LedgerEntry.opening(user.pk, balance) for user, balance in zip(users, balances) if balance],
+                batch_size=batch_size,
+            )
+        return users
+
+    def record_login(self, user, ip_address=None, user_agent=''):
+        """
+        Appends a login of the user to their login activity. The last login columns of the user
+        are then set with an UPDATE of those two columns, or left to flush_last_logins when
+        LAST_LOGIN_FLUSH_ASYNC is on, so a login never rewrites the whole user row.
+        """
+        activity = LoginActivity.objects.create(user=user, ip_address=ip_address, user_agent=user_agent[:255])
+        user.last_login, user.last_login_ip = activity.created_at, ip_address
+        if not settings.LAST_LOGIN_FLUSH_ASYNC:
+            self.filter(pk=user.pk).update(last_login=activity.created_at, last_login_ip=ip_address)
+        return activity
+
+    def flush_last_logins(self, since):
+        """
+        Copies the latest login activity since the given time onto the last login columns of
+        the users, in a single UPDATE however many times they logged in.
+        Returns the number of users updated.
+        """
+        latest = LoginActivity.objects.filter(user=OuterRef('pk')).order_by('-created_at', '-pk')
+        return self.filter(
+            pk__in=LoginActivity.objects.filter(created_at__gte=since).values('user_id')
+        ).exclude(
+            last_login__gte=Subquery(latest.values('created_at')[:1])
+        ).update(
+            last_login=Subquery(latest.values('created_at')[:1]),
+            last_login_ip=Subquery(latest.values('ip_address')[:1]),
+        )
+
     def create_superuser(self, email, password=None, **extra_fields):
         extra_fields.setdefault('is_staff', True)
         extra_fields.setdefault('is_superuser', True)
@@ -140,7 +372,8 @@ class UserAccount(AbstractBaseUser, PermissionsMixin):
     profile_image = models.ImageField(_('profile image'), upload_to='profile_images/', null=True, blank=True)
     bio = models.TextField(_('bio'), max_length=500, blank=True)
     last_login_ip = models.GenericIPAddressField(_('last login IP'), null=True, blank=True)
-    last_login = models.DateTimeField(_('last login'), auto_now=True)
+    # Projection of the latest login activity, see UserManager.record_login
+    last_login = models.DateTimeField(_('last login'), blank=True, null=True)
     date_joined = models.DateTimeField(_('date joined'), default=timezone.now)
 
     is_active = models.BooleanField(_('active'), default=True)
@@ -177,3 +410,146 @@ class UserAccount(AbstractBaseUser, PermissionsMixin):
         verbose_name = _('user')
         verbose_name_plural = _('users')
         ordering = ['-pk']
+
+
+class LoginActivity(models.Model):
+    """
+    Model recording every login of a user, append-only, so the IP history is kept
+    instead of being overwritten on the user.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="login_activity")
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        """String representation of the login, displaying user, IP address and time."""
+        return f'{self.user} logged in from {self.ip_address or "an unknown address"} at {self.created_at}'
+
+    class Meta:
+        # Orders logins by time, with the most recent first
+        ordering = ['-created_at']
+        verbose_name_plural = "Login activity"
+        indexes = [
+            # Latest logins of a user, and logins to flush since a given time
+            models.Index(fields=['user', '-created_at'], name='loginactivity_user_created_idx'),
+            models.Index(fields=['created_at'], name='loginactivity_created_idx'),
+        ]
+
+
+class LedgerEntryManager(models.Manager):
+    def record(self, user_id, kind, amount, source_type, source_id=None):
+        """
+        Appends an entry to the user's ledger. Callers move the balance of the user's profile first,
+        in the same transaction, so the profile row orders the entries of a user.
+        """
+        return self.create(user_id=user_id, kind=kind, amount=amount, source_type=source_type, source_id=source_id)
+
+    def record_change(self, user_id, amount, source_type, source_id=None):
+        """Appends a credit for a positive amount or a debit for a negative one, nothing for zero."""
+        if amount:
+            kind = LedgerEntry.CREDIT if amount > 0 else LedgerEntry.DEBIT
+            return self.record(user_id, kind, abs(amount), source_type, source_id)
+        return None
+
+    def balance(self, user):
+        """Returns the balance of the user's ledger, from its latest checkpoint and the entries since."""
+        return Profile.objects.with_ledger_balance().filter(user=user).values_list(
+            'ledger_balance', flat=True
+        ).first()
+
+    def checkpoint(self, user_ids):
+        """
+        Appends a checkpoint holding the current ledger balance of each user. Their profiles are
+        locked meanwhile, so no entry can be appended between the sum and the checkpoint.
+        Returns the number of checkpoints appended.
+        """
+        with transaction.atomic():
+            locked = list(Profile.objects.select_for_update().filter(user_id__in=user_ids)
+                          .order_by('user_id').values_list('user_id', flat=True))
+            balances = Profile.objects.filter(user_id__in=locked).with_ledger_balance().values_list(
+                'user_id', 'ledger_balance'
+            )
+            checkpoints = self.bulk_create([
+                LedgerEntry(user_id=user_id, kind=LedgerEntry.CHECKPOINT, amount=0, balance=balance,
+                            source_type=LedgerEntry.CHECKPOINT)
+                for user_id, balance in balances
+            ])
+        return len(checkpoints)
+
+
+class LedgerEntry(models.Model):
+    """
+    Model of an append-only entry of a user's ledger, the record of every change of their balance.
+    Credits and debits carry the amount and the expense or income behind them. Checkpoints are
+    appended periodically with the running balance of all the entries before them, so the current
+    balance is the latest checkpoint plus a bounded tail (see ProfileManager.with_ledger_balance).
+    Profile.balance is the projection of the ledger used to refuse overdrafts.
+    """
+    CREDIT = 'credit'
+    DEBIT = 'debit'
+    CHECKPOINT = 'checkpoint'
+    KIND_CHOICES = [
+        (CREDIT, 'Credit'),
+        (DEBIT, 'Debit'),
+        (CHECKPOINT, 'Checkpoint'),
+    ]
+
+    EXPENSE = 'expense'
+    INCOME = 'income'
+    MONTHLY_INCOME = 'monthly_income'
+    OPENING = 'opening'
+    ADJUSTMENT = 'adjustment'
+    SOURCE_CHOICES = [
+        (EXPENSE, 'Expense'),
+        (INCOME, 'Income change'),
+        (MONTHLY_INCOME, 'Monthly income'),
+        (OPENING, 'Opening balance'),
+        (ADJUSTMENT, 'Adjustment'),
+        (CHECKPOINT, 'Checkpoint'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="ledger_entries")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    amount = models.DecimalField(max_digits=12, decimal_places=2, help_text="Positive amount, 0 for checkpoints")
+    source_type = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    source_id = models.BigIntegerField(
+        blank=True, null=True,
+        help_text="Expense or income behind the entry, or the YYYYMM period of a monthly income",
+    )
+    balance = models.DecimalField(
+        max_digits=12, decimal_places=2, blank=True, null=True,
+        help_text="Running balance of the user's ledger, stored on checkpoints",
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = LedgerEntryManager()
+
+    def __str__(self):
+        """String representation of the entry, displaying user, kind and amount or balance."""
+        if self.kind == self.CHECKPOINT:
+            return f'Checkpoint of {self.user}: {self.balance}'
+        return f'{self.kind.capitalize()} of {self.amount} for {self.user} ({self.source_type})'
+
+    @staticmethod
+    def signed_amount():
+        """Expression of the amount of an entry as it changes the balance, negative for debits."""
+        return Case(When(kind=LedgerEntry.DEBIT, then=-F('amount')), default=F('amount'))
+
+    @classmethod
+    def opening(cls, user_id, balance):
+        """Unsaved entry bringing a new ledger to a starting balance."""
+        return cls(user_id=user_id, kind=cls.CREDIT if balance > 0 else cls.DEBIT, amount=abs(balance),
+                   source_type=cls.OPENING)
+
+    class Meta:
+        # Orders entries as they were appended, the most recent first
+        ordering = ['-pk']
+        verbose_name_plural = "Ledger entries"
+        indexes = [
+            # Tail of a user's ledger, and their latest checkpoint
+            models.Index(fields=['user', 'id'], name='ledgerentry_user_idx'),
+            models.Index(fields=['user', 'kind', 'id'], name='ledgerentry_user_kind_idx'),
+            # Monthly income credited for a period
+            models.Index(fields=['source_type', 'source_id'], name='ledgerentry_source_idx'),
+        ]
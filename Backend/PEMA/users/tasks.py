@@ -0,0 +1,52 @@
+from datetime import timedelta
+from logging import getLogger
+
+from celery import shared_task
+from django.db.models import Max
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .models import LedgerEntry, Profile
+
+logger = getLogger(__name__)
+
+
+@shared_task
+def flush_last_logins(window=None):
+    """
+    Task copying the logins of the last `window` seconds onto the last login columns of the users.
+    The window defaults to ten flush intervals, so runs skipped while the workers were down are caught up.
+    """
+    window = window if window is not None else 10 * settings.LAST_LOGIN_FLUSH_INTERVAL
+    updated = get_user_model().objects.flush_last_logins(timezone.now() - timedelta(seconds=window))
+    logger.info(f"Last logins flushed for {updated} users")
+    return updated
+
+
+@shared_task
+def checkpoint_ledgers(interval=None):
+    """
+    Task appending a checkpoint to the ledger of every user who appended at least `interval`
+    entries since their latest one, so computing a balance never sums more than a bounded tail.
+    Users are checked in keyset-paginated chunks, one query per chunk.
+    """
+    interval = interval if interval is not None else settings.LEDGER_CHECKPOINT_INTERVAL
+    chunk_size = settings.LEDGER_CHECKPOINT_CHUNK_SIZE
+    last_user_id = Profile.objects.aggregate(last=Max('user_id'))['last'] or 0
+
+    checkpoints = 0
+    after_user_id = 0
+    while after_user_id < last_user_id:
+        up_to_user_id = after_user_id + chunk_size
+        user_ids = list(
+            Profile.objects.filter(user_id__gt=after_user_id, user_id__lte=up_to_user_id)
+            .with_ledger_balance().filter(ledger_tail__gte=interval)
+            .values_list('user_id', flat=True)
+        )
+        if user_ids:
+            checkpoints += LedgerEntry.objects.checkpoint(user_ids)
+        after_user_id = up_to_user_id
+
+    logger.info(f"Ledger checkpoints appended for {checkpoints} users")
+    return checkpoints
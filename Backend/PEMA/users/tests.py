@@ -1,9 +1,20 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
 import pytest
 from django.contrib.auth import get_user_model
-from rest_framework.test import APIClient
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from users.models import Profile
+from PEMA.utils.response_wrapper import ConditionalGetMixin, custom_response
+from income.models import Income
+from users.models import LedgerEntry, LoginActivity, Profile
+from users.tasks import checkpoint_ledgers, flush_last_logins
 
 User = get_user_model()
 
@@ -92,6 +103,38 @@ def test_user_profile_update(auth_client):
     assert response.data['data']['phone_number'] == "0987654321"
 
 
+@pytest.mark.django_db
+def test_user_profile_conditional_get(auth_client, django_capture_on_commit_callbacks):
+    """Test that the `me` endpoint answers a current If-None-Match with 304 until the profile changes."""
+    url = reverse('api:auth:current_user')
+
+    etag = auth_client.get(url)['ETag']
+    response = auth_client.get(url, HTTP_IF_NONE_MATCH=f'W/{etag}')
+    assert response.status_code == 304
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = auth_client.patch(url, {"first_name": "Updated"})
+    assert 'ETag' not in response
+
+    response = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.data['data']['first_name'] == "Updated"
+
+
+@pytest.mark.django_db
+def test_conditional_get_mixin_without_version(test_user):
+    """Test that a view which does not override get_etag_version answers without ETag nor 304."""
+    class PlainView(ConditionalGetMixin, APIView):
+        def get(self, request):
+            return custom_response(status="success", data={})
+
+    request = APIRequestFactory().get('/plain/', HTTP_IF_NONE_MATCH='*')
+    force_authenticate(request, user=test_user)
+    response = PlainView.as_view()(request)
+    assert response.status_code == 200
+    assert 'ETag' not in response
+
+
 @pytest.mark.django_db
 def test_user_profile_delete(auth_client):
     """Test deleting the authenticated user's profile."""
@@ -140,3 +183,252 @@ def test_profile_manager_current_month_statistics(test_user):
     assert "total_expenses" in stats
     assert "remaining_balance" in stats
     assert "average_daily_expense" in stats
+
+
+@pytest.mark.django_db
+def test_generate_synthetic_data_is_deterministic():
+    """Test that the synthetic data generator creates complete users and the same expenses for the same seed."""
+    from expenses.models import Expense, MonthlyRollup
+
+    options = {'users': 5, 'expenses': 300, 'years': 2, 'seed': 7, 'end_date': date(2024, 6, 30),
+               'batch_size': 100, 'stdout': StringIO()}
+    call_command('generate_synthetic_data', prefix='first', **options)
+    call_command('generate_synthetic_data', prefix='second', **options)
+
+    first = Expense.objects.filter(user__email__startswith='first').order_by('id')
+    second = Expense.objects.filter(user__email__startswith='second').order_by('id')
+    assert first.count() == second.count() == 300
+    assert list(first.values_list('amount', 'date', 'category__name')) == \
+        list(second.values_list('amount', 'date', 'category__name'))
+    assert first.filter(date__lt=date(2022, 6, 30)).count() == 0
+    assert first.filter(date__gt=date(2024, 6, 30)).count() == 0
+
+    users = User.objects.filter(email__startswith='first')
+    assert Profile.objects.filter(user__in=users).count() == 5
+    assert Income.objects.filter(user__in=users, amount__gt=0).count() == 5
+    assert sum(rollup.count for rollup in MonthlyRollup.objects.filter(user__in=users)) == 300
+
+    with pytest.raises(CommandError):
+        call_command('generate_synthetic_data', prefix='first', **options)
+
+
+def count_writes(queries, statement):
+    """Counts the captured statements of the kind (INSERT, UPDATE) per table, history tables excluded."""
+    counts = {}
+    for query in queries:
+        sql = query['sql']
+        if sql.startswith(statement) and 'historical' not in sql:
+            table = sql.split('"')[1]
+            counts[table] = counts.get(table, 0) + 1
+    return counts
+
+
+@pytest.mark.django_db
+def test_create_user_provisions_profile_and_income():
+    """Test that create_user inserts the user, profile and income once each, without any update."""
+    with CaptureQueriesContext(connection) as queries:
+        user = User.objects.create_user(email="single@example.com", password="TestPass123!", username="single")
+
+    assert count_writes(queries, 'INSERT') == {'users_useraccount': 1, 'users_profile': 1, 'income_income': 1}
+    assert count_writes(queries, 'UPDATE') == {}
+    assert Profile.objects.get(user=user).balance == 0
+    assert Income.objects.get(user=user).amount == 0
+
+
+@pytest.mark.django_db
+def test_user_registration_creates_inactive_user_in_one_insert(api_client):
+    """Test that registering inserts an inactive user with their profile and income, without a follow-up save."""
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.post(reverse('api:auth:register'), {
+            "email": "inactive@example.com",
+            "username": "inactive",
+            "password": "NewPass123!",
+            "re_password": "NewPass123!",
+            "first_name": "New",
+            "last_name": "User",
+            "phone_number": "9876543211"
+        })
+
+    assert response.status_code == 201
+    assert count_writes(queries, 'UPDATE') == {}
+    user = User.objects.get(email="inactive@example.com")
+    assert not user.is_active
+    assert Profile.objects.filter(user=user).exists()
+    assert Income.objects.filter(user=user).exists()
+
+
+@pytest.mark.django_db
+def test_user_registration_goes_through_user_profile_serializer(api_client, mailoutbox):
+    """Test that registering creates the user through UserProfileSerializer and emails its activation link."""
+    payload = {
+        "email": "profile@example.com",
+        "username": "profile",
+        "password": "NewPass123!",
+        "re_password": "Mismatch123!",
+        "phone_number": "9876543212",
+    }
+    response = api_client.post(reverse('api:auth:register'), payload)
+    assert response.status_code == 400
+    assert 're_password' in response.data['errors']
+
+    response = api_client.post(reverse('api:auth:register'), {**payload, "re_password": "NewPass123!"})
+
+    assert response.status_code == 201
+    assert response.data['data']['username'] == "profile"
+    assert response.data['data']['balance'] == "0.00"
+    assert 'password' not in response.data['data']
+    assert not User.objects.get(email="profile@example.com").is_active
+    assert [message.to for message in mailoutbox] == [["profile@example.com"]]
+
+
+@pytest.mark.django_db
+def test_generate_synthetic_data_rejects_invalid_sizes():
+    """Test that the synthetic data generator refuses to create no users rather than dividing by zero."""
+    with pytest.raises(CommandError, match='--users'):
+        call_command('generate_synthetic_data', users=0, stdout=StringIO())
+    assert not User.objects.exists()
+
+
+@pytest.mark.django_db
+def test_import_users_bulk_creates_profiles_and_incomes(tmp_path):
+    """Test that the CSV import creates users, profiles and incomes with one INSERT per table and batch."""
+    path = tmp_path / 'users.csv'
+    rows = ["email,username,first_name,password,income"]
+    rows += [f"Imported{index}@EXAMPLE.com,imported{index},Name{index},Pass{index}word!,{index}00.50"
+             for index in range(5)]
+    rows.append("nopassword@example.com,nopassword,,,")
+    path.write_text("\n".join(rows) + "\n")
+
+    with CaptureQueriesContext(connection) as queries:
+        call_command('import_users', str(path), batch_size=4, stdout=StringIO())
+
+    assert count_writes(queries, 'INSERT') == {'users_useraccount': 2, 'users_profile': 2, 'income_income': 2}
+    user = User.objects.get(email="Imported3@example.com")
+    assert user.check_password("Pass3word!")
+    assert user.income.amount == Decimal('300.50')
+    assert user.profile.balance == 0
+    assert not User.objects.get(username="nopassword").has_usable_password()
+    assert Profile.objects.filter(user__username__startswith='imported').count() == 5
+
+    with pytest.raises(CommandError):
+        call_command('import_users', str(path), stdout=StringIO())
+
+
+@pytest.mark.django_db
+def test_login_records_activity_without_saving_the_user(api_client, test_user):
+    """Test that a JWT login appends to the login activity and updates only the last login columns."""
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.post(reverse('api:auth:jwt-create'), {
+            "email": test_user.email,
+            "password": "TestPass123!",
+        }, HTTP_USER_AGENT="pytest", REMOTE_ADDR="10.0.0.7")
+
+    assert response.status_code == 200
+    updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+    assert len(updates) == 1
+    assert 'SET "last_login" = ' in updates[0] and '"email"' not in updates[0]
+
+    activity = LoginActivity.objects.get(user=test_user)
+    assert (activity.ip_address, activity.user_agent) == ("10.0.0.7", "pytest")
+    test_user.refresh_from_db()
+    assert test_user.last_login == activity.created_at
+    assert test_user.last_login_ip == "10.0.0.7"
+
+
+@pytest.mark.django_db
+def test_flush_last_logins_coalesces_logins(settings, api_client, test_user):
+    """Test that with asynchronous flushing logins only append activity, and the flush applies the latest one."""
+    settings.LAST_LOGIN_FLUSH_ASYNC = True
+    for address in ("10.0.0.1", "10.0.0.2"):
+        api_client.post(reverse('api:auth:jwt-create'), {
+            "email": test_user.email,
+            "password": "TestPass123!",
+        }, REMOTE_ADDR=address)
+    test_user.refresh_from_db()
+    assert test_user.last_login is None
+    assert LoginActivity.objects.filter(user=test_user).count() == 2
+
+    assert flush_last_logins() == 1
+    test_user.refresh_from_db()
+    assert test_user.last_login == LoginActivity.objects.filter(user=test_user).first().created_at
+    assert test_user.last_login_ip == "10.0.0.2"
+    # Users already up to date are left alone
+    assert flush_last_logins() == 0
+
+
+@pytest.mark.django_db
+def test_ledger_records_every_balance_change(auth_client, test_user):
+    """Test that income changes and expenses append to the ledger, whose balance matches the profile's."""
+    from expenses.models import Category
+
+    category = Category.objects.create(name="Food")
+    auth_client.patch(reverse('api:income:update_income'), {"amount": "500.00"})
+    for amount in ("20.00", "5.50"):
+        response = auth_client.post(reverse('api:expenses:expense-create'), {"amount": amount, "category_id": category.pk})
+        assert response.status_code == 201
+
+    entries = LedgerEntry.objects.filter(user=test_user).order_by('pk')
+    assert list(entries.values_list('kind', 'amount', 'source_type')) == [
+        ('credit', Decimal('500.00'), 'income'),
+        ('debit', Decimal('20.00'), 'expense'),
+        ('debit', Decimal('5.50'), 'expense'),
+    ]
+    assert LedgerEntry.objects.balance(test_user) == Profile.objects.get(user=test_user).balance == Decimal('474.50')
+
+    # After a checkpoint only the entries appended since are summed
+    assert checkpoint_ledgers(interval=3) == 1
+    auth_client.post(reverse('api:expenses:expense-create'), {"amount": "4.50", "category_id": category.pk})
+    profile = Profile.objects.with_ledger_balance().get(user=test_user)
+    assert (profile.ledger_balance, profile.ledger_tail) == (Decimal('470.00'), 1)
+    assert profile.balance == Decimal('470.00')
+    assert checkpoint_ledgers(interval=3) == 0
+
+
+@pytest.mark.django_db
+def test_reconcile_ledger_detects_and_fixes_drift():
+    """Test that reconciliation passes on consistent ledgers, fails on drift and fixes it with --fix."""
+    users = User.objects.bulk_create_users(
+        [User(email=f"ledger{index}@example.com", username=f"ledger{index}") for index in range(6)],
+        balances=[Decimal(index * 10) for index in range(6)],
+    )
+    LedgerEntry.objects.checkpoint([user.pk for user in users[:3]])
+    call_command('reconcile_ledger', workers=1, stdout=StringIO())
+
+    Profile.objects.filter(user=users[4]).update(balance=Decimal('1.00'))
+    with pytest.raises(CommandError, match="1 mismatched"):
+        call_command('reconcile_ledger', workers=1, chunk_size=2, stdout=StringIO())
+
+    call_command('reconcile_ledger', workers=1, fix=True, stdout=StringIO())
+    assert Profile.objects.get(user=users[4]).balance == Decimal('40.00')
+    call_command('reconcile_ledger', workers=1, stdout=StringIO())
+
+
+@pytest.mark.django_db
+def test_update_balance_resumes_from_its_checkpoint(test_user):
+    """Test that update_balance only sums expenses newer than its checkpoint, and that full rebuilds it."""
+    from expenses.models import Expense
+
+    Income.objects.filter(user=test_user).update(amount=Decimal('300.00'))
+    first = Expense.objects.create(user=test_user, amount=Decimal('40.00'))
+    profile = Profile.objects.get(user=test_user)
+    assert profile.update_balance() == Decimal('260.00')
+    assert profile.expenses_checkpoint_id == first.pk
+
+    second = Expense.objects.create(user=test_user, amount=Decimal('10.00'))
+    with CaptureQueriesContext(connection) as queries:
+        assert profile.update_balance() == Decimal('250.00')
+    aggregate = next(query['sql'] for query in queries if 'SUM' in query['sql'])
+    assert f'"expenses_expense"."id" > {first.pk}' in aggregate
+    assert profile.expenses_checkpoint_id == second.pk
+
+    # Edits and deletions of checkpointed expenses move its total
+    first.amount = Decimal('30.00')
+    first.save()
+    second.delete()
+    assert profile.update_balance() == Decimal('270.00')
+
+    # Changes bypassing the signals leave the checkpoint stale until a full rebuild
+    Expense.objects.filter(pk=first.pk).update(amount=Decimal('100.00'))
+    assert profile.update_balance() == Decimal('270.00')
+    assert profile.update_balance(full=True) == Decimal('200.00')
+    assert Profile.objects.get(user=test_user).balance == LedgerEntry.objects.balance(test_user) == Decimal('200.00')